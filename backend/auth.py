@@ -3,7 +3,7 @@ import os
 from datetime import datetime, timedelta
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 
@@ -44,16 +44,14 @@ def decode_token(token: str) -> dict | None:
         return None
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
-) -> dict:
-    if not credentials or credentials.scheme != "Bearer":
+def _user_from_token(token: str | None) -> dict:
+    if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    payload = decode_token(credentials.credentials)
+    payload = decode_token(token)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,3 +59,19 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     return payload
+
+
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
+) -> dict:
+    token = credentials.credentials if credentials and credentials.scheme == "Bearer" else None
+    return _user_from_token(token)
+
+
+async def get_current_user_stream(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(security)],
+    access_token: Annotated[str | None, Query()] = None,
+) -> dict:
+    """Like get_current_user, but also accepts ?access_token= (EventSource cannot send headers)."""
+    token = credentials.credentials if credentials and credentials.scheme == "Bearer" else access_token
+    return _user_from_token(token)
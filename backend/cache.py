@@ -0,0 +1,92 @@
+"""Response cache for read endpoints, keyed on the label store's data revision.
+
+Each cached view gets an ETag derived from (endpoint, params, revision). A request whose
+If-None-Match matches gets 304 without touching the data; otherwise the serialised body is
+served from an in-process LRU, and only built from scratch when the revision has moved on.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from property_pipeline.db import get_db, get_data_revision
+from property_pipeline.config import DB_PATH
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "128"))
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            body = self._data.get(key)
+            if body is not None:
+                self._data.move_to_end(key)
+            return body
+
+    def put(self, key: str, body: bytes) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = body
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+response_cache = LRUCache()
+
+
+def current_revision() -> str:
+    with get_db(DB_PATH) as conn:
+        return get_data_revision(conn)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {c.strip() for c in header.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def cached_json(
+    request: Request,
+    endpoint: str,
+    params: dict,
+    build: Callable[[], Any],
+    revision: str | None = None,
+) -> Response:
+    """Serve build()'s JSON for (endpoint, params) with ETag/304 and LRU caching.
+
+    revision defaults to the DB data revision; pass a composite string when the view
+    also depends on something else (e.g. files in checked/).
+    """
+    if revision is None:
+        revision = current_revision()
+    key = json.dumps([endpoint, params, revision], sort_keys=True, default=str)
+    etag = '"' + hashlib.sha1(key.encode("utf-8")).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key)
+    if body is None:
+        body = JSONResponse(content=jsonable_encoder(build())).body
+        response_cache.put(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,185 @@
+"""Background jobs for long pipeline operations (run_month, finalize_month, grade_rules, train_ml).
+
+Jobs run on a bounded thread pool (JOB_WORKERS). Status and progress are stored in the
+`jobs` table so any API worker can serve polling and Server-Sent Events for them.
+Jobs touching the same month are serialised; submitting a job identical to one that
+is still queued or running returns the existing job.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable
+
+from property_pipeline.db import get_db
+from property_pipeline.config import DB_PATH, MODEL_PATH
+from property_pipeline import pipeline as pl
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+
+ACTIVE_STATUSES = ("queued", "running")
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+Progress = Callable[[float, str], None]
+
+
+def _run_month_job(params: dict, progress: Progress) -> dict:
+    return pl.run_month(params["month"], db_path=DB_PATH, use_ml=bool(params.get("use_ml")), progress=progress)
+
+
+def _finalize_month_job(params: dict, progress: Progress) -> dict:
+    path = pl.finalize_month(params["month"], db_path=DB_PATH)
+    return {"path": str(path)}
+
+
+def _grade_rules_job(params: dict, progress: Progress) -> dict:
+    from property_pipeline.historical import grade_rules
+    return grade_rules(db_path=DB_PATH)
+
+
+def _train_ml_job(params: dict, progress: Progress) -> dict:
+    from property_pipeline.ml_model import train
+    res = train(db_path=DB_PATH, model_path=MODEL_PATH)
+    if not res.get("ok"):
+        raise RuntimeError(f"Training skipped: {res.get('reason', 'unknown')} (n={res.get('n', 0)})")
+    return res
+
+
+JOB_KINDS: dict[str, Callable[[dict, Progress], dict]] = {
+    "run_month": _run_month_job,
+    "finalize_month": _finalize_month_job,
+    "grade_rules": _grade_rules_job,
+    "train_ml": _train_ml_job,
+}
+
+MONTH_REQUIRED = {"run_month", "finalize_month"}
+
+
+def _row_to_job(row) -> dict:
+    job = dict(row)
+    job["params"] = json.loads(job.pop("params_json") or "{}")
+    result = job.pop("result_json")
+    job["result"] = json.loads(result) if result else None
+    return job
+
+
+def get_job(job_id: str) -> dict | None:
+    with get_db(DB_PATH) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs(limit: int = 50, kind: str | None = None) -> list[dict]:
+    sql = "SELECT * FROM jobs"
+    params: list = []
+    if kind:
+        sql += " WHERE kind = ?"
+        params.append(kind)
+    sql += " ORDER BY created_at DESC, rowid DESC LIMIT ?"
+    params.append(limit)
+    with get_db(DB_PATH) as conn:
+        return [_row_to_job(r) for r in conn.execute(sql, params).fetchall()]
+
+
+def _update_job(job_id: str, **fields) -> None:
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    with get_db(DB_PATH) as conn:
+        conn.execute(f"UPDATE jobs SET {cols} WHERE job_id = ?", list(fields.values()) + [job_id])
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self._max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._month_locks = {}  # month -> threading.Lock
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="job")
+
+    def fail_interrupted(self) -> None:
+        """Mark jobs left queued/running by a previous server process as failed."""
+        with get_db(DB_PATH) as conn:
+            conn.execute(
+                """UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart',
+                          finished_at = strftime('%Y-%m-%dT%H:%M:%S','now')
+                   WHERE status IN ('queued', 'running')"""
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def submit(self, kind: str, params: dict | None = None) -> dict:
+        """Queue a job and return its row. Raises ValueError for unknown kinds or missing month."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'. Expected one of: {', '.join(sorted(JOB_KINDS))}")
+        params = dict(params or {})
+        if kind in MONTH_REQUIRED and not params.get("month"):
+            raise ValueError(f"Job '{kind}' requires a month parameter")
+        params_json = json.dumps(params, sort_keys=True)
+        if self._executor is None:
+            self.start()
+        with self._lock:
+            with get_db(DB_PATH) as conn:
+                row = conn.execute(
+                    f"""SELECT job_id FROM jobs WHERE kind = ? AND params_json = ?
+                        AND status IN ({','.join('?' * len(ACTIVE_STATUSES))})
+                        ORDER BY created_at DESC LIMIT 1""",
+                    (kind, params_json, *ACTIVE_STATUSES),
+                ).fetchone()
+                if row:
+                    return get_job(row["job_id"])
+                job_id = uuid.uuid4().hex
+                conn.execute(
+                    "INSERT INTO jobs (job_id, kind, params_json, status, message) VALUES (?, ?, ?, 'queued', 'Queued')",
+                    (job_id, kind, params_json),
+                )
+            self._executor.submit(self._run, job_id, kind, params)
+        return get_job(job_id)
+
+    def _month_lock(self, month: str | None):
+        if not month:
+            return None
+        with self._lock:
+            return self._month_locks.setdefault(month, threading.Lock())
+
+    def _run(self, job_id: str, kind: str, params: dict) -> None:
+        month_lock = self._month_lock(params.get("month"))
+        if month_lock is not None:
+            month_lock.acquire()
+        try:
+            _update_job(job_id, status="running", message="Running", started_at=_now())
+
+            def progress(fraction: float, message: str) -> None:
+                try:
+                    _update_job(job_id, progress=max(0.0, min(1.0, float(fraction))), message=message)
+                except sqlite3.OperationalError:
+                    logger.warning("Could not record progress for job %s", job_id)  # best effort
+
+            result = JOB_KINDS[kind](params, progress)
+            _update_job(job_id, status="succeeded", progress=1.0, message="Done",
+                        result_json=json.dumps(result, default=str), finished_at=_now())
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            _update_job(job_id, status="failed", message="Failed", error=str(e), finished_at=_now())
+        finally:
+            if month_lock is not None:
+                month_lock.release()
+
+
+def _now() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+
+
+job_runner = JobRunner()
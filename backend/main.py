@@ -9,17 +9,35 @@ if str(_repo_root) not in os.environ.get("PYTHONPATH", ""):
     if _repo_root not in sys.path:
         sys.path.insert(0, str(_repo_root))
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 from backend.auth import verify_password, create_access_token, get_current_user
+from backend.jobs import job_runner
+from backend.review_queue import review_queue_writer
+from property_pipeline.config import DB_PATH
+from property_pipeline.db import init_db
 
 
 class LoginBody(BaseModel):
     password: str = ""
 
-app = FastAPI(title="Property Review API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_PATH.exists():
+        init_db(DB_PATH)  # adds tables introduced since the DB was seeded (e.g. jobs)
+        job_runner.fail_interrupted()
+    job_runner.start()
+    yield
+    job_runner.shutdown(wait=False)
+    # Don't drop review queue rewrites still waiting out their debounce window
+    review_queue_writer.flush()
+
+
+app = FastAPI(title="Property Review API", version="0.1.0", lifespan=lifespan)
 
 # CORS: allow React dev (localhost) and production origin
 ALLOWED_ORIGINS = os.environ.get("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
@@ -50,8 +68,12 @@ def me(user: dict = Depends(get_current_user)):
     return {"user": user.get("sub", "user")}
 
 
-from backend.routers import draft, review_actions, reports, lists
+from backend.routers import draft, review_actions, reports, lists, jobs, tenancies, analytics, backtests
 app.include_router(draft.router)
 app.include_router(review_actions.router)
 app.include_router(reports.router)
 app.include_router(lists.router)
+app.include_router(jobs.router)
+app.include_router(tenancies.router)
+app.include_router(analytics.router)
+app.include_router(backtests.router)
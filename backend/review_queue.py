@@ -0,0 +1,120 @@
+"""Background regeneration of review_queue_MMMYYYY.xlsx.
+
+Review endpoints only write labels to the DB and call schedule(month). The XLSX is
+rebuilt on a timer thread once corrections for that month go quiet for
+REVIEW_QUEUE_DEBOUNCE_SECONDS, with at most one write in flight per month. Files are
+written to a temporary name and renamed into place, so readers never see half a workbook.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+
+from property_pipeline.db import get_db
+from property_pipeline.config import DB_PATH, REVIEW_DIR
+from property_pipeline.expected_payments import load_exceptions
+from property_pipeline.export import ExportContext, write_review_queue
+from property_pipeline.pipeline import _load_canonical_for_month, _load_properties_set
+from property_pipeline.rules_seed import get_categories_and_subcategories
+
+logger = logging.getLogger(__name__)
+
+REVIEW_QUEUE_DEBOUNCE_SECONDS = float(os.environ.get("REVIEW_QUEUE_DEBOUNCE_SECONDS", "2.0"))
+
+
+def write_review_queue_for_month(month: str, review_dir: Path | None = None) -> int:
+    """Rebuild review_queue_MMMYYYY.xlsx from current DB state. Returns the number of rows written."""
+    from backend.routers.draft import _load_latest_labels_with_meta
+
+    with get_db(DB_PATH) as conn:
+        canonical = _load_canonical_for_month(conn, month)
+        if not canonical:
+            return 0
+        labels = _load_latest_labels_with_meta(conn, [c["tx_id"] for c in canonical])
+        props = sorted(_load_properties_set(conn))
+        exceptions = load_exceptions(conn, month)
+    categories, subcategories = get_categories_and_subcategories()
+
+    review_path = (review_dir or REVIEW_DIR) / f"review_queue_{month}.xlsx"
+    # Write next to the queue and swap it in, so readers never see a half-written workbook
+    tmp_path = review_path.with_name(f".{review_path.stem}.{os.getpid()}.tmp.xlsx")
+    try:
+        n = write_review_queue(
+            ExportContext(canonical, labels),
+            tmp_path,
+            property_codes=props,
+            categories=categories,
+            subcategories=subcategories,
+            exceptions=exceptions,
+        )
+        if n or not exceptions.empty:
+            os.replace(tmp_path, review_path)
+        return n
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+class ReviewQueueWriter:
+    """Coalesces bursts of schedule(month) calls into one background write per month."""
+
+    def __init__(self, write_fn=write_review_queue_for_month, delay: float = REVIEW_QUEUE_DEBOUNCE_SECONDS):
+        self._write_fn = write_fn
+        self._delay = delay
+        self._lock = threading.Lock()
+        self._timers: dict[str, threading.Timer] = {}
+        self._running: set[str] = set()
+        self._dirty: set[str] = set()
+
+    def schedule(self, month: str) -> None:
+        """Request a rewrite of month's queue; restarts the debounce window."""
+        with self._lock:
+            if month in self._running:
+                # Picked up again as soon as the in-flight write finishes
+                self._dirty.add(month)
+                return
+            old = self._timers.pop(month, None)
+            if old is not None:
+                old.cancel()
+            timer = threading.Timer(self._delay, self._fire, args=(month,))
+            timer.daemon = True
+            self._timers[month] = timer
+            timer.start()
+
+    def _fire(self, month: str) -> None:
+        with self._lock:
+            if self._timers.get(month) is not threading.current_thread():
+                return  # superseded by a later schedule()
+            del self._timers[month]
+            self._running.add(month)
+        self._run(month)
+
+    def _run(self, month: str) -> None:
+        try:
+            self._write_fn(month)
+        except Exception:
+            logger.exception("Review queue write failed for %s", month)
+        finally:
+            with self._lock:
+                self._running.discard(month)
+                rerun = month in self._dirty
+                self._dirty.discard(month)
+            if rerun:
+                self.schedule(month)
+
+    def pending(self) -> set[str]:
+        """Months with a write scheduled, running or queued behind a running one."""
+        with self._lock:
+            return set(self._timers) | self._running | self._dirty
+
+    def flush(self) -> None:
+        """Run every scheduled write now, in the calling thread (used at shutdown)."""
+        with self._lock:
+            months = list(self._timers)
+            for month in months:
+                self._timers.pop(month).cancel()
+            self._running.update(months)
+        for month in months:
+            self._run(month)
+
+
+review_queue_writer = ReviewQueueWriter()
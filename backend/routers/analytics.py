@@ -0,0 +1,49 @@
+"""Analytics API: the named DuckDB queries in property_pipeline.analytics over labels.db or the checked dataset.
+
+Read-only: the checked dataset is queried as it stands (finalize_month and export_parquet keep it in sync).
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from property_pipeline.analytics import QUERIES, analytics_records, list_queries, run_query
+from property_pipeline.config import DB_PATH
+from property_pipeline.dataset import dataset_fingerprint
+
+from backend.auth import get_current_user
+from backend.cache import cached_json, current_revision
+
+router = APIRouter(prefix="/api", tags=["analytics"])
+
+
+@router.get("/analytics")
+def get_analytics_queries(user: dict = Depends(get_current_user)):
+    """Available queries with their parameters."""
+    return {"queries": list_queries()}
+
+
+@router.get("/analytics/{name}")
+def get_analytics_query(
+    request: Request,
+    name: str,
+    source: str = Query("labels", description="labels (labels.db) or checked (the checked/ history)"),
+    user: dict = Depends(get_current_user),
+):
+    """Run a query; its parameters (start, end, ...) are passed as query-string values."""
+    if name not in QUERIES:
+        raise HTTPException(status_code=404, detail=f"Unknown query {name}")
+    params = {k: request.query_params[k] for k in QUERIES[name].params if k in request.query_params}
+    revision = current_revision()
+    if source == "checked":
+        revision = f"{revision}:{dataset_fingerprint()}"
+
+    def build():
+        try:
+            df = run_query(name, params, source=source, db_path=DB_PATH)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return {"query": name, "source": source, "params": params, "rows": analytics_records(df)}
+
+    return cached_json(request, f"analytics/{name}", [source, params], build, revision=revision)
@@ -0,0 +1,41 @@
+"""Backtests API: saved backtest runs (backtests.db) for accuracy and timing trends."""
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from property_pipeline.backtest_store import confusion, latest_run_ids, month_results, trend
+
+from backend.auth import get_current_user
+from backend.cache import cached_json
+
+router = APIRouter(prefix="/api", tags=["backtests"])
+
+
+def _revision() -> str:
+    ids = latest_run_ids(1)
+    return str(ids[0]) if ids else "0"
+
+
+@router.get("/backtests/trend")
+def get_backtest_trend(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000, description="Newest runs to include"),
+    user: dict = Depends(get_current_user),
+):
+    """Runs oldest first: average accuracies, wall time and seconds per stage, rule-set fingerprint."""
+    return cached_json(request, "backtests/trend", [limit], lambda: {"runs": trend(limit)}, revision=_revision())
+
+
+@router.get("/backtests/{run_id}")
+def get_backtest_run(request: Request, run_id: int, user: dict = Depends(get_current_user)):
+    """Per-month metrics and the category confusion counts of one run."""
+    def build():
+        try:
+            months = month_results(run_id)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"No backtest run {run_id}")
+        return {
+            "run_id": run_id,
+            "months": months.reset_index().to_dict(orient="records"),
+            "confusion": confusion(run_id).to_dict(orient="records"),
+        }
+
+    return cached_json(request, "backtests/run", [run_id], build, revision=_revision())
@@ -1,14 +1,17 @@
 """Draft and review read endpoints: months, lists, draft, review queue."""
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 
-from property_pipeline.db import get_db
+from property_pipeline.db import get_db, get_connection
 from property_pipeline.config import DB_PATH
 from property_pipeline.rules_seed import get_categories_and_subcategories
 from property_pipeline.pipeline import _load_canonical_for_month
+from property_pipeline.search import build_match_query, search_tx_ids
 
 from backend.auth import get_current_user
+from backend.cache import cached_json
+from backend.streaming import STREAM_FORMATS, stream_rows
 
 router = APIRouter(prefix="/api", tags=["draft"])
 
@@ -34,51 +37,68 @@ def _load_latest_labels_with_meta(conn, tx_ids: list[str]) -> list[dict]:
     return [dict(row) for row in cursor.fetchall()]
 
 
-def _apply_filters(rows: list[dict], properties: list[str], categories: list[str],
-                   subcategories: list[str], search: str | None,
-                   date_from: str | None, date_to: str | None,
-                   needs_review_only: bool = False) -> list[dict]:
-    if not rows:
-        return rows
-    if properties:
-        rows = [r for r in rows if (r.get("property_code") or "") in properties or (r.get("Property") or "") in properties]
-    if categories:
-        rows = [r for r in rows if (r.get("category") or r.get("Cat") or "") in categories]
-    if subcategories:
-        rows = [r for r in rows if (r.get("subcategory") or r.get("Subcat") or "") in subcategories]
-    if needs_review_only:
-        rows = [r for r in rows if r.get("needs_review") == 1]
-    if search and search.strip():
-        q = search.strip().lower()
-        rows = [
-            r for r in rows
-            if q in (r.get("memo") or "").lower() or q in (r.get("counterparty") or "").lower()
-        ]
-    if date_from or date_to:
-        def parse_d(s):
-            if not s:
-                return None
-            try:
-                return datetime.strptime(s[:10], "%Y-%m-%d").date()
-            except Exception:
-                return None
-        d_from = parse_d(date_from)
-        d_to = parse_d(date_to)
-        def keep(r):
+def _row_predicate(properties: list[str], categories: list[str], subcategories: list[str],
+                   search: str | None, date_from: str | None, date_to: str | None,
+                   needs_review_only: bool = False, search_ids: set[str] | None = None):
+    """Build a keep(row) test for API rows, shared by list filtering and streamed exports."""
+    q = search.strip().lower() if search and search.strip() else None
+
+    def parse_d(s):
+        if not s:
+            return None
+        try:
+            return datetime.strptime(s[:10], "%Y-%m-%d").date()
+        except Exception:
+            return None
+    d_from = parse_d(date_from)
+    d_to = parse_d(date_to)
+
+    def keep(r: dict) -> bool:
+        if properties and (r.get("property_code") or "") not in properties and (r.get("Property") or "") not in properties:
+            return False
+        if categories and (r.get("category") or r.get("Cat") or "") not in categories:
+            return False
+        if subcategories and (r.get("subcategory") or r.get("Subcat") or "") not in subcategories:
+            return False
+        if needs_review_only and r.get("needs_review") != 1:
+            return False
+        if search_ids is not None:
+            if r.get("tx_id") not in search_ids:
+                return False
+        elif q and q not in (r.get("memo") or "").lower() and q not in (r.get("counterparty") or "").lower():
+            return False
+        if d_from or d_to:
             ds = r.get("posted_date") or r.get("Date")
             if isinstance(ds, str):
                 d = parse_d(ds)
             else:
                 d = ds.date() if hasattr(ds, "date") else None
-            if not d:
-                return True
-            if d_from and d < d_from:
+            if d and d_from and d < d_from:
                 return False
-            if d_to and d > d_to:
+            if d and d_to and d > d_to:
                 return False
-            return True
-        rows = [r for r in rows if keep(r)]
-    return rows
+        return True
+    return keep
+
+
+def _apply_filters(rows: list[dict], properties: list[str], categories: list[str],
+                   subcategories: list[str], search: str | None,
+                   date_from: str | None, date_to: str | None,
+                   needs_review_only: bool = False,
+                   search_ids: set[str] | None = None) -> list[dict]:
+    """Filter API rows. search_ids (from the full-text index) replaces the substring scan when given."""
+    if not rows:
+        return rows
+    keep = _row_predicate(properties, categories, subcategories, search, date_from, date_to,
+                          needs_review_only=needs_review_only, search_ids=search_ids)
+    return [r for r in rows if keep(r)]
+
+
+def _search_ids_for_month(conn, search: str | None, month: str) -> set[str] | None:
+    """tx_ids in month matching search via FTS, or None when search has no indexable words."""
+    if not search or build_match_query(search) is None:
+        return None
+    return {m["tx_id"] for m in search_tx_ids(conn, search, month=month)}
 
 
 def _get(d: dict, *keys: str, default=""):
@@ -93,6 +113,46 @@ def _get(d: dict, *keys: str, default=""):
     return default
 
 
+def _to_api_row(c, lab) -> dict:
+    """One canonical row + its latest label (mappings; lab may be empty) in API row shape."""
+    posted = _get(c, "posted_date")
+    if hasattr(posted, "isoformat"):
+        date_str = posted.isoformat()[:10]
+    else:
+        date_str = str(posted)[:10] if posted else ""
+    amount_val = _get(c, "amount")
+    try:
+        amount_float = float(amount_val) if amount_val not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        amount_float = 0.0
+    conf = lab.get("confidence")
+    if conf is not None:
+        try:
+            conf = float(conf)
+        except (TypeError, ValueError):
+            conf = None
+    return {
+        "tx_id": _get(c, "tx_id"),
+        "Date": date_str,
+        "Account": _get(c, "source_account"),
+        "Amount": amount_float,
+        "Subcategory": _get(c, "effective_subcategory"),
+        "Memo": _get(c, "memo"),
+        "Property": _get(lab, "property_code"),
+        "property_code": _get(lab, "property_code"),
+        "Description": _get(c, "description"),
+        "Cat": _get(lab, "category"),
+        "category": _get(lab, "category"),
+        "Subcat": _get(lab, "subcategory"),
+        "subcategory": _get(lab, "subcategory"),
+        "counterparty": _get(c, "counterparty"),
+        "confidence": conf,
+        "needs_review": 1 if lab.get("needs_review") else 0,
+        "rule_strength": _get(lab, "rule_strength"),
+        "reviewed_at": _get(lab, "reviewed_at"),
+    }
+
+
 def _canonical_and_labels_to_rows(canonical: list[dict], labels: list[dict]) -> list[dict]:
     """Merge canonical + latest labels into API row shape. Date as ISO string."""
     lab_by_tx = {lab["tx_id"]: lab for lab in labels}
@@ -101,58 +161,27 @@ def _canonical_and_labels_to_rows(canonical: list[dict], labels: list[dict]) ->
         tx_id = _get(c, "tx_id") or ""
         if not tx_id:
             continue
-        lab = lab_by_tx.get(tx_id) or {}
-        posted = _get(c, "posted_date")
-        if hasattr(posted, "isoformat"):
-            date_str = posted.isoformat()[:10]
-        else:
-            date_str = str(posted)[:10] if posted else ""
-        amount_val = _get(c, "amount")
-        try:
-            amount_float = float(amount_val) if amount_val not in (None, "") else 0.0
-        except (TypeError, ValueError):
-            amount_float = 0.0
-        conf = lab.get("confidence")
-        if conf is not None:
-            try:
-                conf = float(conf)
-            except (TypeError, ValueError):
-                conf = None
-        rows.append({
-            "tx_id": tx_id,
-            "Date": date_str,
-            "Account": _get(c, "source_account"),
-            "Amount": amount_float,
-            "Subcategory": _get(c, "effective_subcategory"),
-            "Memo": _get(c, "memo"),
-            "Property": _get(lab, "property_code"),
-            "property_code": _get(lab, "property_code"),
-            "Description": _get(c, "description"),
-            "Cat": _get(lab, "category"),
-            "category": _get(lab, "category"),
-            "Subcat": _get(lab, "subcategory"),
-            "subcategory": _get(lab, "subcategory"),
-            "counterparty": _get(c, "counterparty"),
-            "confidence": conf,
-            "needs_review": 1 if lab.get("needs_review") else 0,
-            "rule_strength": _get(lab, "rule_strength"),
-            "reviewed_at": _get(lab, "reviewed_at"),
-        })
+        rows.append(_to_api_row(c, lab_by_tx.get(tx_id) or {}))
     return rows
 
 
 @router.get("/months")
-def get_months(user: dict = Depends(get_current_user)):
-    with get_db(DB_PATH) as conn:
-        cursor = conn.execute(
-            "SELECT DISTINCT import_batch_id FROM transactions_canonical ORDER BY import_batch_id DESC"
-        )
-        months = [row["import_batch_id"] for row in cursor.fetchall()]
-    return months
+def get_months(request: Request, user: dict = Depends(get_current_user)):
+    def build():
+        with get_db(DB_PATH) as conn:
+            cursor = conn.execute(
+                "SELECT DISTINCT import_batch_id FROM transactions_canonical ORDER BY import_batch_id DESC"
+            )
+            return [row["import_batch_id"] for row in cursor.fetchall()]
+    return cached_json(request, "months", {}, build)
 
 
 @router.get("/lists")
-def get_lists(user: dict = Depends(get_current_user)):
+def get_lists(request: Request, user: dict = Depends(get_current_user)):
+    return cached_json(request, "lists", {}, _build_lists)
+
+
+def _build_lists() -> dict:
     categories, subcategories = get_categories_and_subcategories()
     with get_db(DB_PATH) as conn:
         cursor = conn.execute("SELECT property_code FROM properties ORDER BY property_code")
@@ -176,8 +205,30 @@ def get_lists(user: dict = Depends(get_current_user)):
     }
 
 
+def _load_rows(month: str, property_codes: str | None, category: str | None, subcategory: str | None,
+               search: str | None, date_from: str | None, date_to: str | None,
+               needs_review_only: bool) -> list[dict]:
+    """Draft/review rows for month after filters (comma-separated filter strings as passed to the API)."""
+    properties = [p.strip() for p in (property_codes or "").split(",") if p.strip()]
+    categories = [c.strip() for c in (category or "").split(",") if c.strip()]
+    subcategories = [s.strip() for s in (subcategory or "").split(",") if s.strip()]
+
+    with get_db(DB_PATH) as conn:
+        canonical = _load_canonical_for_month(conn, month)
+        if not canonical:
+            return []
+        tx_ids = [c["tx_id"] for c in canonical]
+        labels = _load_latest_labels_with_meta(conn, tx_ids)
+        search_ids = _search_ids_for_month(conn, search, month)
+
+    rows = _canonical_and_labels_to_rows(canonical, labels)
+    return _apply_filters(rows, properties, categories, subcategories, search, date_from, date_to,
+                          needs_review_only=needs_review_only, search_ids=search_ids)
+
+
 @router.get("/draft")
 def get_draft(
+    request: Request,
     month: str = Query(..., description="e.g. OCT2025"),
     property_codes: str | None = Query(None, alias="property", description="Comma-separated property codes"),
     category: str | None = Query(None, description="Comma-separated categories"),
@@ -185,32 +236,18 @@ def get_draft(
     search: str | None = Query(None),
     date_from: str | None = Query(None),
     date_to: str | None = Query(None),
-    format: str | None = Query(None, description="csv to get CSV response"),
+    format: str | None = Query(None, description="csv or ndjson to stream rows (month may then be comma-separated)"),
     user: dict = Depends(get_current_user),
 ):
-    properties = [p.strip() for p in (property_codes or "").split(",") if p.strip()]
-    categories = [c.strip() for c in (category or "").split(",") if c.strip()]
-    subcategories = [s.strip() for s in (subcategory or "").split(",") if s.strip()]
-
-    with get_db(DB_PATH) as conn:
-        canonical = _load_canonical_for_month(conn, month)
-    if not canonical:
-        return [] if format != "csv" else _empty_csv_response()
-
-    tx_ids = [c["tx_id"] for c in canonical]
-    with get_db(DB_PATH) as conn:
-        labels = _load_latest_labels_with_meta(conn, tx_ids)
-
-    rows = _canonical_and_labels_to_rows(canonical, labels)
-    rows = _apply_filters(rows, properties, categories, subcategories, search, date_from, date_to, needs_review_only=False)
-
-    if format == "csv":
-        return _rows_to_csv_response(rows)
-    return rows
+    args = (month, property_codes, category, subcategory, search, date_from, date_to)
+    if format in STREAM_FORMATS:
+        return _stream_export(request, format, *args, needs_review_only=False)
+    return cached_json(request, "draft", list(args), lambda: _load_rows(*args, needs_review_only=False))
 
 
 @router.get("/review")
 def get_review(
+    request: Request,
     month: str = Query(...),
     property_codes: str | None = Query(None, alias="property"),
     category: str | None = Query(None),
@@ -221,43 +258,95 @@ def get_review(
     format: str | None = Query(None),
     user: dict = Depends(get_current_user),
 ):
-    properties = [p.strip() for p in (property_codes or "").split(",") if p.strip()]
-    categories = [c.strip() for c in (category or "").split(",") if c.strip()]
-    subcategories = [s.strip() for s in (subcategory or "").split(",") if s.strip()]
+    args = (month, property_codes, category, subcategory, search, date_from, date_to)
+    if format in STREAM_FORMATS:
+        return _stream_export(request, format, *args, needs_review_only=True)
+    return cached_json(request, "review", list(args), lambda: _load_rows(*args, needs_review_only=True))
 
-    with get_db(DB_PATH) as conn:
-        canonical = _load_canonical_for_month(conn, month)
-    if not canonical:
-        return [] if format != "csv" else _empty_csv_response()
 
-    tx_ids = [c["tx_id"] for c in canonical]
+@router.get("/search")
+def search_transactions(
+    q: str = Query(..., description="Words to find in memo, counterparty, reference; prefixes match"),
+    month: str | None = Query(None, description="Restrict to one month e.g. OCT2025"),
+    limit: int = Query(200, ge=1, le=5000),
+    user: dict = Depends(get_current_user),
+):
+    """Ranked full-text search across every imported month. Rows are in draft shape plus month and score."""
     with get_db(DB_PATH) as conn:
+        matches = search_tx_ids(conn, q, month=month, limit=limit)
+        if not matches:
+            return []
+        tx_ids = [m["tx_id"] for m in matches]
+        placeholders = ",".join(["?"] * len(tx_ids))
+        cursor = conn.execute(
+            f"SELECT * FROM transactions_canonical WHERE tx_id IN ({placeholders})", tx_ids
+        )
+        canonical_by_tx = {row["tx_id"]: dict(row) for row in cursor.fetchall()}
         labels = _load_latest_labels_with_meta(conn, tx_ids)
 
+    canonical = [canonical_by_tx[t] for t in tx_ids if t in canonical_by_tx]
     rows = _canonical_and_labels_to_rows(canonical, labels)
-    rows = _apply_filters(rows, properties, categories, subcategories, search, date_from, date_to, needs_review_only=True)
-
-    if format == "csv":
-        return _rows_to_csv_response(rows)
+    meta = {m["tx_id"]: m for m in matches}
+    for r in rows:
+        r["month"] = meta[r["tx_id"]]["import_batch_id"]
+        r["score"] = meta[r["tx_id"]]["score"]
     return rows
 
 
-def _empty_csv_response():
-    from fastapi.responses import PlainTextResponse
-    return PlainTextResponse("Date,Account,Amount,Memo,Property,Cat,Subcat,tx_id,confidence,needs_review\n", media_type="text/csv")
+CSV_COLUMNS = ["Date", "Account", "Amount", "Memo", "Property", "Cat", "Subcat", "tx_id", "confidence", "needs_review"]
 
+STREAM_BATCH_ROWS = 1000
 
-def _rows_to_csv_response(rows: list[dict]):
-    import csv
-    import io
-    from fastapi.responses import PlainTextResponse
-    out = io.StringIO()
-    if not rows:
-        out.write("Date,Account,Amount,Memo,Property,Cat,Subcat,tx_id,confidence,needs_review\n")
-    else:
-        cols = ["Date", "Account", "Amount", "Memo", "Property", "Cat", "Subcat", "tx_id", "confidence", "needs_review"]
-        w = csv.DictWriter(out, fieldnames=cols, extrasaction="ignore")
-        w.writeheader()
-        for r in rows:
-            w.writerow({k: r.get(k, "") for k in cols})
-    return PlainTextResponse(out.getvalue(), media_type="text/csv")
+_STREAM_SQL = """
+    SELECT c.tx_id, c.posted_date, c.source_account, c.amount, c.effective_subcategory,
+           c.memo, c.description, c.counterparty,
+           l.property_code, l.category, l.subcategory, l.confidence, l.needs_review,
+           l.rule_strength, l.reviewed_at
+    FROM transactions_canonical c
+    LEFT JOIN transactions_labels_latest l ON l.tx_id = c.tx_id
+    WHERE c.import_batch_id IN ({months}) AND c.is_superseded = 0 {review}
+    ORDER BY c.posted_date, c.tx_id
+"""
+
+
+def _iter_rows(months: list[str], property_codes: str | None, category: str | None, subcategory: str | None,
+               search: str | None, date_from: str | None, date_to: str | None,
+               needs_review_only: bool):
+    """Yield filtered API rows for months straight off one cursor (same rows as _load_rows, in date order)."""
+    properties = [p.strip() for p in (property_codes or "").split(",") if p.strip()]
+    categories = [c.strip() for c in (category or "").split(",") if c.strip()]
+    subcategories = [s.strip() for s in (subcategory or "").split(",") if s.strip()]
+
+    # Iterated on the threadpool one chunk at a time, so successive reads may run on different threads
+    conn = get_connection(DB_PATH, check_same_thread=False)
+    try:
+        search_ids = None
+        for m in months:
+            ids = _search_ids_for_month(conn, search, m)
+            if ids is not None:
+                search_ids = (search_ids or set()) | ids
+        keep = _row_predicate(properties, categories, subcategories, search, date_from, date_to,
+                              needs_review_only=needs_review_only, search_ids=search_ids)
+        sql = _STREAM_SQL.format(
+            months=",".join(["?"] * len(months)),
+            review="AND l.needs_review = 1" if needs_review_only else "",
+        )
+        cursor = conn.execute(sql, months)
+        while True:
+            batch = cursor.fetchmany(STREAM_BATCH_ROWS)
+            if not batch:
+                break
+            for row in batch:
+                d = dict(row)
+                r = _to_api_row(d, d)
+                if keep(r):
+                    yield r
+    finally:
+        conn.close()
+
+
+def _stream_export(request: Request, fmt: str, month: str, *filters, needs_review_only: bool):
+    """format=csv|ndjson: month may be a comma-separated list (e.g. a year of months)."""
+    months = [m.strip() for m in month.split(",") if m.strip()]
+    rows = _iter_rows(months, *filters, needs_review_only=needs_review_only)
+    return stream_rows(request, rows, fmt, CSV_COLUMNS)
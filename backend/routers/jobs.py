@@ -0,0 +1,90 @@
+"""Jobs API: submit long pipeline operations, poll their status, or follow them over SSE."""
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from backend.auth import get_current_user, get_current_user_stream
+from backend.jobs import job_runner, get_job, list_jobs, TERMINAL_STATUSES
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+SSE_POLL_SECONDS = 0.5
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+class SubmitJobBody(BaseModel):
+    kind: str
+    month: str | None = None
+    use_ml: bool = False
+
+
+def submit_job(kind: str, params: dict) -> dict:
+    try:
+        return job_runner.submit(kind, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/jobs")
+def post_job(body: SubmitJobBody, user: dict = Depends(get_current_user)):
+    """Body: { kind: run_month|finalize_month|grade_rules|train_ml, month?, use_ml? }. Returns the job (202-style: poll it)."""
+    params = {}
+    if body.month:
+        params["month"] = body.month
+    if body.kind == "run_month" and body.use_ml:
+        params["use_ml"] = True
+    return submit_job(body.kind, params)
+
+
+@router.get("/jobs")
+def get_jobs(
+    kind: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    user: dict = Depends(get_current_user),
+):
+    return list_jobs(limit=limit, kind=kind)
+
+
+@router.get("/jobs/{job_id}")
+def get_job_status(job_id: str, user: dict = Depends(get_current_user)):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, user: dict = Depends(get_current_user_stream)):
+    """Server-Sent Events: one `job` event per status/progress change; the stream ends when the job finishes."""
+    job = await run_in_threadpool(get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last = None
+        idle = 0.0
+        current = job
+        while True:
+            snapshot = json.dumps(current, default=str)
+            if snapshot != last:
+                yield f"event: job\ndata: {snapshot}\n\n"
+                last = snapshot
+                idle = 0.0
+            elif idle >= SSE_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            if current["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(SSE_POLL_SECONDS)
+            idle += SSE_POLL_SECONDS
+            current = await run_in_threadpool(get_job, job_id) or current
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,18 +1,19 @@
-"""Reports API: summary aggregations from checked data."""
-from pathlib import Path
+"""Reports API: summary aggregations from the monthly_aggregates table (fed by checked data)."""
+from fastapi import APIRouter, Depends, Query, Request
 
-from fastapi import APIRouter, Depends, Query
-
-from property_pipeline.report_summary import build_report_summary
-from property_pipeline.config import CHECKED_DIR
+from property_pipeline.report_summary import build_report_summary, checked_dir_fingerprint
+from property_pipeline.rent_statement import build_rent_statement, rent_statement_records
+from property_pipeline.config import CHECKED_DIR, DB_PATH
 
 from backend.auth import get_current_user
+from backend.cache import cached_json, current_revision
 
 router = APIRouter(prefix="/api", tags=["reports"])
 
 
 @router.get("/reports/summary")
 def get_reports_summary(
+    request: Request,
     month: str | None = Query(None, description="Single month e.g. OCT2025"),
     from_month: str | None = Query(None, alias="from", description="Start month e.g. OCT2025"),
     to: str | None = Query(None, description="End month e.g. NOV2025"),
@@ -32,5 +33,36 @@ def get_reports_summary(
             "outgoings": [],
             "personal_spending": [],
         }
-    result = build_report_summary(month_from, month_to, checked_dir=CHECKED_DIR)
-    return result
+    # Reports read checked/ files, which can also be edited by hand in Excel
+    revision = f"{current_revision()}:{checked_dir_fingerprint(CHECKED_DIR)}"
+    return cached_json(
+        request, "reports/summary", [month_from, month_to],
+        lambda: build_report_summary(month_from, month_to, checked_dir=CHECKED_DIR, db_path=DB_PATH),
+        revision=revision,
+    )
+
+
+@router.get("/reports/rent-statement")
+def get_rent_statement(
+    request: Request,
+    month: str | None = Query(None, description="Single month e.g. OCT2025"),
+    from_month: str | None = Query(None, alias="from", description="Start month e.g. OCT2025"),
+    to: str | None = Query(None, description="End month e.g. NOV2025"),
+    paid_in_advance: list[str] = Query([], description="Tenants (label or name) to mark PaidInAdvance"),
+    in_arrears: list[str] = Query([], description="Tenants (label or name) to mark InArrears"),
+    user: dict = Depends(get_current_user),
+):
+    """Per property and month: tenant, agent, Received/Bills/Mortgage/Net and payment status, plus Service Charges and Totals rows."""
+    month_from = month or from_month
+    month_to = month or to or from_month
+    if not month_from:
+        return {"rent_statement": []}
+    revision = f"{current_revision()}:{checked_dir_fingerprint(CHECKED_DIR)}"
+    params = [month_from, month_to, sorted(paid_in_advance), sorted(in_arrears)]
+
+    def build():
+        df = build_rent_statement(month_from, month_to, paid_in_advance=paid_in_advance, in_arrears=in_arrears,
+                                  db_path=DB_PATH, checked_dir=CHECKED_DIR)
+        return {"rent_statement": rent_statement_records(df)}
+
+    return cached_json(request, "reports/rent-statement", params, build, revision=revision)
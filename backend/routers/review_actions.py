@@ -1,31 +1,16 @@
 """Review write endpoints: add to review, remove from review, correct label, submit review."""
-from pathlib import Path
-
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 
 from property_pipeline.db import get_db
-from property_pipeline.config import DB_PATH, REVIEW_DIR
-from property_pipeline.pipeline import _load_canonical_for_month
-from property_pipeline.export import write_review_queue
-from property_pipeline.rules_seed import get_categories_and_subcategories
-from property_pipeline import pipeline as pl
-
+from property_pipeline.config import DB_PATH
 from backend.auth import get_current_user
+from backend.review_queue import review_queue_writer
+from backend.routers.jobs import submit_job
 
 router = APIRouter(prefix="/api", tags=["review-actions"])
 
 
-def _get_latest_label(conn, tx_id: str) -> dict | None:
-    cursor = conn.execute(
-        """SELECT property_code, category, subcategory FROM transactions_labels
-           WHERE tx_id = ? ORDER BY label_version DESC LIMIT 1""",
-        (tx_id,),
-    )
-    row = cursor.fetchone()
-    return dict(row) if row else None
-
-
 def _insert_label(conn, tx_id: str, property_code: str, category: str, subcategory: str,
                   needs_review: int, reviewed: int) -> None:
     cur = conn.execute(
@@ -45,6 +30,38 @@ def _insert_label(conn, tx_id: str, property_code: str, category: str, subcatego
     )
 
 
+def _relabel_latest(conn, where_sql: str, params: list, needs_review: int, reviewed: int) -> int:
+    """Copy the latest label of every row matching where_sql (over transactions_labels_latest l)
+    into a new manual version with the given flags, in one INSERT ... SELECT. Returns rows written."""
+    cur = conn.execute(
+        f"""INSERT INTO transactions_labels
+            (tx_id, label_version, property_code, category, subcategory,
+             source, confidence, rule_id, rule_strength, needs_review,
+             reviewed, reviewed_at)
+            SELECT l.tx_id, l.label_version + 1, COALESCE(l.property_code, ''),
+                   COALESCE(l.category, ''), COALESCE(l.subcategory, ''),
+                   'manual', 1.0, NULL, NULL, ?, ?,
+                   strftime('%Y-%m-%dT%H:%M:%S','now')
+            FROM transactions_labels_latest l
+            WHERE {where_sql}""",
+        [needs_review, reviewed] + list(params),
+    )
+    return cur.rowcount
+
+
+def _relabel_tx_ids(conn, tx_ids: list[str], needs_review: int, reviewed: int) -> int:
+    tx_ids = list({t for t in tx_ids if t})
+    if not tx_ids:
+        return 0
+    placeholders = ",".join(["?"] * len(tx_ids))
+    return _relabel_latest(conn, f"l.tx_id IN ({placeholders})", tx_ids, needs_review, reviewed)
+
+
+_MONTH_TX_SQL = (
+    "l.tx_id IN (SELECT tx_id FROM transactions_canonical WHERE import_batch_id = ? AND is_superseded = 0)"
+)
+
+
 class ReviewAddRemoveBody(BaseModel):
     month: str
     tx_ids: list[str]
@@ -66,122 +83,42 @@ class AddByRuleBody(BaseModel):
 @router.post("/review/add-by-rule")
 def review_add_by_rule(body: AddByRuleBody, user: dict = Depends(get_current_user)):
     """Add to review all rows matching: optional category, optional property_empty (Cat in OurRent/Mortgage/PropertyExpense/BealsRent and no property)."""
+    where = [_MONTH_TX_SQL]
+    params: list = [body.month]
+    if body.category:
+        where.append("COALESCE(l.category, '') = ?")
+        params.append(body.category)
+    if body.property_empty:
+        where.append("l.category IN ('OurRent', 'Mortgage', 'PropertyExpense', 'BealsRent')")
+        where.append("TRIM(COALESCE(l.property_code, '')) = ''")
     with get_db(DB_PATH) as conn:
-        canonical = _load_canonical_for_month(conn, body.month)
-    if not canonical:
-        return {"ok": True, "count": 0}
-    tx_ids = [c["tx_id"] for c in canonical]
-    from backend.routers.draft import _load_latest_labels_with_meta
-    with get_db(DB_PATH) as conn:
-        labels = _load_latest_labels_with_meta(conn, tx_ids)
-    lab_by = {l["tx_id"]: l for l in labels}
-    must_review_cats = {"OurRent", "Mortgage", "PropertyExpense", "BealsRent"}
-    tx_ids_to_add = []
-    for c in canonical:
-        tx_id = c["tx_id"]
-        lab = lab_by.get(tx_id) or {}
-        if body.category and (lab.get("category") or "") != body.category:
-            continue
-        if body.property_empty:
-            if (lab.get("category") or "") not in must_review_cats:
-                continue
-            if (lab.get("property_code") or "").strip():
-                continue
-        tx_ids_to_add.append(tx_id)
-    if not tx_ids_to_add:
-        return {"ok": True, "count": 0}
-    with get_db(DB_PATH) as conn:
-        for tx_id in tx_ids_to_add:
-            lab = _get_latest_label(conn, tx_id)
-            if not lab:
-                continue
-            _insert_label(
-                conn, tx_id,
-                lab.get("property_code") or "",
-                lab.get("category") or "",
-                lab.get("subcategory") or "",
-                needs_review=1,
-                reviewed=0,
-            )
-    return {"ok": True, "count": len(tx_ids_to_add)}
+        count = _relabel_latest(conn, " AND ".join(where), params, needs_review=1, reviewed=0)
+    return {"ok": True, "count": count}
 
 
 @router.post("/review/add")
 def review_add(body: ReviewAddRemoveBody, user: dict = Depends(get_current_user)):
     """Add given tx_ids to review (set needs_review=1, keep current labels)."""
     with get_db(DB_PATH) as conn:
-        for tx_id in body.tx_ids:
-            if not tx_id:
-                continue
-            lab = _get_latest_label(conn, tx_id)
-            if not lab:
-                continue
-            _insert_label(
-                conn, tx_id,
-                lab.get("property_code") or "",
-                lab.get("category") or "",
-                lab.get("subcategory") or "",
-                needs_review=1,
-                reviewed=0,
-            )
-    _write_review_queue_for_month(body.month)
-    return {"ok": True, "count": len(body.tx_ids)}
+        count = _relabel_tx_ids(conn, body.tx_ids, needs_review=1, reviewed=0)
+    review_queue_writer.schedule(body.month)
+    return {"ok": True, "count": count}
 
 
 @router.post("/review/remove")
 def review_remove(body: ReviewAddRemoveBody, user: dict = Depends(get_current_user)):
     """Remove given tx_ids from review (set needs_review=0)."""
     with get_db(DB_PATH) as conn:
-        for tx_id in body.tx_ids:
-            if not tx_id:
-                continue
-            lab = _get_latest_label(conn, tx_id)
-            if not lab:
-                continue
-            _insert_label(
-                conn, tx_id,
-                lab.get("property_code") or "",
-                lab.get("category") or "",
-                lab.get("subcategory") or "",
-                needs_review=0,
-                reviewed=0,
-            )
-    _write_review_queue_for_month(body.month)
-    return {"ok": True, "count": len(body.tx_ids)}
-
-
-def _write_review_queue_for_month(month: str) -> None:
-    """Update review_queue_MMMYYYY.xlsx from current DB so spreadsheet reflects partial progress."""
-    try:
-        with get_db(DB_PATH) as conn:
-            canonical = _load_canonical_for_month(conn, month)
-        if not canonical:
-            return
-        tx_ids = [c["tx_id"] for c in canonical]
-        from backend.routers.draft import _load_latest_labels_with_meta
-        with get_db(DB_PATH) as conn:
-            labels = _load_latest_labels_with_meta(conn, tx_ids)
-        categories, subcategories = get_categories_and_subcategories()
-        with get_db(DB_PATH) as conn:
-            from property_pipeline.pipeline import _load_properties_set
-            props = sorted(_load_properties_set(conn))
-        review_path = REVIEW_DIR / f"review_queue_{month}.xlsx"
-        write_review_queue(
-            canonical,
-            labels,
-            review_path,
-            property_codes=props,
-            categories=categories,
-            subcategories=subcategories,
-        )
-    except Exception:
-        pass
+        count = _relabel_tx_ids(conn, body.tx_ids, needs_review=0, reviewed=0)
+    review_queue_writer.schedule(body.month)
+    return {"ok": True, "count": count}
 
 
 @router.post("/review/correct")
 def review_correct(body: CorrectBody, user: dict = Depends(get_current_user)):
     """Apply a single correction (new manual label, reviewed=1, needs_review=0). Persisted to DB immediately.
-    The review queue spreadsheet is updated so it shows remaining items (partial progress) when you come back later."""
+    The review queue spreadsheet is rebuilt in the background (debounced per month) so it shows remaining
+    items (partial progress) when you come back later."""
     with get_db(DB_PATH) as conn:
         _insert_label(
             conn, body.tx_id,
@@ -197,7 +134,7 @@ def review_correct(body: CorrectBody, user: dict = Depends(get_current_user)):
         row = cur.fetchone()
         month = row["import_batch_id"] if row else None
     if month:
-        _write_review_queue_for_month(month)
+        review_queue_writer.schedule(month)
     return {"ok": True}
 
 
@@ -208,62 +145,16 @@ def review_submit(
 ):
     """Apply submit: for all rows in review for this month, write new label with reviewed=1, needs_review=0. Optionally update review queue XLSX."""
     with get_db(DB_PATH) as conn:
-        canonical = _load_canonical_for_month(conn, month)
-    if not canonical:
-        return {"ok": True, "applied": 0}
-
-    tx_ids = [c["tx_id"] for c in canonical]
-    # Get latest label per tx_id and find those with needs_review=1
-    with get_db(DB_PATH) as conn:
-        cursor = conn.execute(
-            """SELECT l.tx_id, l.property_code, l.category, l.subcategory, l.needs_review
-               FROM transactions_labels l
-               INNER JOIN (
-                 SELECT tx_id, MAX(label_version) AS mv FROM transactions_labels
-                 WHERE tx_id IN (""" + ",".join("?" * len(tx_ids)) + """) GROUP BY tx_id
-               ) m ON l.tx_id = m.tx_id AND l.label_version = m.mv
-               WHERE l.tx_id IN (""" + ",".join("?" * len(tx_ids)) + """) AND l.needs_review = 1""",
-            tx_ids + tx_ids,
+        applied = _relabel_latest(
+            conn, _MONTH_TX_SQL + " AND l.needs_review = 1", [month], needs_review=0, reviewed=1,
         )
-        to_submit = [dict(row) for row in cursor.fetchall()]
-
-    with get_db(DB_PATH) as conn:
-        for row in to_submit:
-            _insert_label(
-                conn, row["tx_id"],
-                row.get("property_code") or "",
-                row.get("category") or "",
-                row.get("subcategory") or "",
-                needs_review=0,
-                reviewed=1,
-            )
+    if not applied:
+        return {"ok": True, "applied": 0}
 
-    # Write review queue XLSX from current DB state (remaining needs_review=1 rows) so CLI stays in sync
-    try:
-        with get_db(DB_PATH) as conn:
-            canonical = _load_canonical_for_month(conn, month)
-        if canonical:
-            tx_ids = [c["tx_id"] for c in canonical]
-            from backend.routers.draft import _load_latest_labels_with_meta
-            with get_db(DB_PATH) as conn:
-                labels = _load_latest_labels_with_meta(conn, tx_ids)
-            categories, subcategories = get_categories_and_subcategories()
-            with get_db(DB_PATH) as conn:
-                from property_pipeline.pipeline import _load_properties_set
-                props = sorted(_load_properties_set(conn))
-            review_path = REVIEW_DIR / f"review_queue_{month}.xlsx"
-            write_review_queue(
-                canonical,
-                labels,
-                review_path,
-                property_codes=props,
-                categories=categories,
-                subcategories=subcategories,
-            )
-    except Exception:
-        pass  # non-fatal: submit already applied to DB
+    # Rebuild review queue XLSX in the background (remaining needs_review=1 rows) so CLI stays in sync
+    review_queue_writer.schedule(month)
 
-    return {"ok": True, "applied": len(to_submit)}
+    return {"ok": True, "applied": applied}
 
 
 @router.post("/finalize")
@@ -271,10 +162,7 @@ def finalize_month(
     month: str = Query(..., description="e.g. OCT2025"),
     user: dict = Depends(get_current_user),
 ):
-    """Build finalized output from DB and write to checked/ and update generated/."""
-    try:
-        path = pl.finalize_month(month, db_path=DB_PATH)
-        return {"ok": True, "path": str(path)}
-    except Exception as e:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    """Queue a finalize_month job (build output from DB, write to checked/ and update generated/).
+    Returns the job; poll /api/jobs/{job_id} or follow /api/jobs/{job_id}/events for the result path."""
+    job = submit_job("finalize_month", {"month": month})
+    return {"ok": True, "job_id": job["job_id"], "status": job["status"]}
@@ -0,0 +1,49 @@
+"""Tenancy lookups: tenant of a property on a date, and void properties over a date range."""
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query, Request
+
+from property_pipeline.db import get_db
+from property_pipeline.config import DB_PATH
+from property_pipeline.tenancy_index import TenancyIndex
+
+from backend.auth import get_current_user
+from backend.cache import cached_json
+
+router = APIRouter(prefix="/api", tags=["tenancies"])
+
+
+def _load_index() -> TenancyIndex:
+    with get_db(DB_PATH) as conn:
+        return TenancyIndex.from_db(conn)
+
+
+@router.get("/tenancies/tenant")
+def get_tenant(
+    request: Request,
+    property_code: str = Query(..., alias="property", description="Property code e.g. F1321LON"),
+    on: date = Query(..., alias="date", description="Date (YYYY-MM-DD)"),
+    user: dict = Depends(get_current_user),
+):
+    """The tenancy of a property on a date; tenancy is null when the property was void."""
+    def build():
+        t = _load_index().tenant_on(property_code, on)
+        return {"property_code": property_code, "date": on, "tenancy": t._asdict() if t else None}
+
+    return cached_json(request, "tenancies/tenant", [property_code, on], build)
+
+
+@router.get("/tenancies/void")
+def get_void_properties(
+    request: Request,
+    from_date: date = Query(..., alias="from", description="Start date (YYYY-MM-DD)"),
+    to: date | None = Query(None, description="End date (YYYY-MM-DD), default from"),
+    user: dict = Depends(get_current_user),
+):
+    """Properties with tenancies on record that were not let at any point in the range."""
+    to = to or from_date
+
+    def build():
+        return {"from": from_date, "to": to, "void": _load_index().void_properties(from_date, to)}
+
+    return cached_json(request, "tenancies/void", [from_date, to], build)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark export.write_xlsx against the old pandas ExcelWriter + cell-walk widths.
+
+Builds a synthetic draft (the run_month output columns) for each row count and writes
+it with dropdown validation both ways, reporting the best wall time and the peak
+Python memory (tracemalloc) of one write:
+  - old:  pd.ExcelWriter(engine="openpyxl") in normal mode, then widths from every cell
+  - new:  write_xlsx (openpyxl write-only mode, widths from the frame's string lengths)
+
+  python -m benchmarks.bench_export --rows 10000 25000 50000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.datavalidation import DataValidation
+
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from property_pipeline.export import VALIDATION_LIST_ROWS, write_xlsx  # noqa: E402
+
+PROPERTY_CODES = ["F1321LON", "169FAW", "F2046ALH", "196AKIN", "SHOP196KIN"]
+CATEGORIES = ["Mortgage", "OurRent", "BealsRent", "PersonalExpense", "PropertyExpense", "RegularPayment"]
+SUBCATEGORIES = ["Gas", "Electric", "Water", "Council Tax", "Insurance"]
+
+
+def _draft(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    days = rng.integers(0, 31, rows)
+    return pd.DataFrame({
+        "Account": rng.choice(["20-74-09 60458872", "60-83-71 00558156"], rows),
+        "Amount": rng.normal(-50, 200, rows).round(2),
+        "Subcategory": rng.choice(["DIRECT DEBIT", "FASTER PAYMENT", "CARD PAYMENT"], rows),
+        "Memo": [f"MEMO {k} REF {k * 7919 % 100000}" for k in rng.integers(0, 5000, rows)],
+        "Property": rng.choice(["", *PROPERTY_CODES], rows),
+        "Description": "",
+        "Cat": rng.choice(CATEGORIES, rows),
+        "Subcat": rng.choice(["", *SUBCATEGORIES], rows),
+    }, index=pd.Index(pd.Timestamp("2025-10-01") + pd.to_timedelta(days, unit="D"), name="Date")).sort_index()
+
+
+def _old_write_xlsx(df: pd.DataFrame, output_path: Path) -> None:
+    """The previous writer: whole workbook in memory, widths by walking every cell."""
+    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="Data", index=True)
+        wb = writer.book
+        ws = wb["Data"]
+        ws_lists = wb.create_sheet("Lists", 1)
+        ws_lists.append(["Property", "Category", "Subcategory"])
+        for i, values in enumerate((PROPERTY_CODES, CATEGORIES, SUBCATEGORIES), 1):
+            for r, v in enumerate(values, 2):
+                ws_lists.cell(row=r, column=i, value=v)
+        max_row = max(ws.max_row or 2, 2)
+        for list_col, col in (("A", "F"), ("B", "H"), ("C", "I")):
+            dv = DataValidation(type="list", formula1=f"Lists!${list_col}$2:${list_col}${VALIDATION_LIST_ROWS + 1}",
+                                allow_blank=True)
+            dv.add(f"{col}2:{col}{max_row}")
+            ws.add_data_validation(dv)
+        for col_idx in range(1, ws.max_column + 1):
+            max_len = 0
+            for row in range(1, ws.max_row + 1):
+                val = ws.cell(row=row, column=col_idx).value
+                if val is not None:
+                    max_len = max(max_len, len(str(val)))
+            if max_len > 0:
+                ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len, 255)
+        ws.auto_filter.ref = f"A1:{get_column_letter(ws.max_column)}{ws.max_row}"
+
+
+def _new_write_xlsx(df: pd.DataFrame, output_path: Path) -> None:
+    write_xlsx(df, output_path, property_codes=PROPERTY_CODES, categories=CATEGORIES, subcategories=SUBCATEGORIES)
+
+
+def _measure(fn, repeat: int) -> tuple[float, float]:
+    """(best seconds, peak MiB of one traced run)."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 25000, 50000])
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} | {'old time':>8} {'new time':>8} {'x':>5} | {'old MiB':>8} {'new MiB':>8} {'x':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            df = _draft(rows)
+            t_old, m_old = _measure(lambda: _old_write_xlsx(df, Path(tmp) / "old.xlsx"), args.repeat)
+            t_new, m_new = _measure(lambda: _new_write_xlsx(df, Path(tmp) / "new.xlsx"), args.repeat)
+            print(f"{rows:>7} | {t_old:>7.2f}s {t_new:>7.2f}s {t_old / t_new:>5.1f} |"
+                  f" {m_old:>8.1f} {m_new:>8.1f} {m_old / m_new:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
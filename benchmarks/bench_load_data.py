@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark report_summary.load_data against the old concat-per-month loop.
+
+Writes synthetic checked CSVs for up to --max-months months into a temp directory and
+times, for growing month counts:
+  - concat:  pd.concat inside the loop (old) vs one concat at the end, frames already in memory
+  - load:    the old serial read-and-concat loop vs load_data (threaded reads, single concat)
+
+  python -m benchmarks.bench_load_data --max-months 72 --rows 1500
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+from property_pipeline.report_summary import (  # noqa: E402
+    OUTPUT_COLUMNS, checked_path, load_data, months_in_range, read_checked_file,
+)
+
+
+def _write_months(checked_dir: Path, start: pd.Timestamp, n_months: int, rows: int) -> None:
+    rng = np.random.default_rng(0)
+    cats = np.array(["Mortgage", "OurRent", "PersonalExpense", "PropertyExpense", "RegularPayment", ""])
+    for i in range(n_months):
+        month_start = start + pd.DateOffset(months=i)
+        days = rng.integers(0, month_start.days_in_month, rows)
+        df = pd.DataFrame({
+            "Account": rng.choice(["20-74-09 60458872", "60-83-71 00558156"], rows),
+            "Amount": rng.normal(-50, 200, rows).round(2),
+            "Subcategory": "",
+            "Memo": [f"MEMO {k}" for k in rng.integers(0, 5000, rows)],
+            "Property": rng.choice(["", "F1321LON", "169FAW"], rows),
+            "Description": "",
+            "Cat": rng.choice(cats, rows),
+            "Subcat": "",
+        }, index=pd.Index((month_start + pd.to_timedelta(days, unit="D")).strftime("%d/%m/%Y"), name="Date"))
+        name = month_start.strftime("%b").upper() + month_start.strftime("%Y")
+        df.to_csv(checked_dir / f"{name}_codedAndCategorised.csv")
+
+
+def _old_load_data(start: str, end: str, checked_dir: Path) -> pd.DataFrame:
+    df_all = pd.DataFrame(columns=OUTPUT_COLUMNS)
+    for month in months_in_range(start, end):
+        path = checked_path(month, checked_dir)
+        if path is not None:
+            df_all = pd.concat([df_all, read_checked_file(path)])
+    return df_all
+
+
+def _timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-months", type=int, default=72)
+    parser.add_argument("--step", type=int, default=12)
+    parser.add_argument("--rows", type=int, default=1500, help="Transactions per month")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = pd.Timestamp("2019-01-01")
+    with tempfile.TemporaryDirectory() as tmp:
+        checked_dir = Path(tmp)
+        _write_months(checked_dir, start, args.max_months, args.rows)
+        frames_all = [read_checked_file(checked_path(m, checked_dir))
+                      for m in months_in_range("2019-01-01", (start + pd.DateOffset(months=args.max_months - 1)).strftime("%Y-%m-%d"))]
+
+        print(f"{'months':>6} {'rows':>8} | {'concat old':>10} {'concat new':>10} {'x':>5} | {'load old':>9} {'load new':>9} {'x':>5}")
+        for n in range(args.step, args.max_months + 1, args.step):
+            end = (start + pd.DateOffset(months=n) - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+            frames = frames_all[:n]
+
+            def concat_old():
+                acc = pd.DataFrame(columns=OUTPUT_COLUMNS)
+                for f in frames:
+                    acc = pd.concat([acc, f])
+                return acc
+
+            c_old = _timed(concat_old, args.repeat)
+            c_new = _timed(lambda: pd.concat(frames), args.repeat)
+            l_old = _timed(lambda: _old_load_data("2019-01-01", end, checked_dir), args.repeat)
+            l_new = _timed(lambda: load_data("2019-01-01", end, checked_dir=checked_dir), args.repeat)
+            print(f"{n:>6} {n * args.rows:>8} | {c_old:>9.3f}s {c_new:>9.3f}s {c_old / c_new:>5.1f} |"
+                  f" {l_old:>8.3f}s {l_new:>8.3f}s {l_old / l_new:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
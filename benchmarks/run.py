@@ -0,0 +1,360 @@
+"""Run the benchmark scenarios over synthetic bank files and compare with a saved baseline.
+
+Generates months x accounts of Barclays and Starling statements (synthetic.py) in a
+scratch DATA_PATH, then times each stage the way the pipeline runs it, in order:
+  import       load_month_files for every month
+  engine       run_engine over each month's canonical rows
+  db_store     raw, canonical and labels into a fresh labels.db
+  export       draft XLSX, CSV and Parquet per month (copied to checked/ as ground truth)
+  backtest     run_backtest_all over every month
+  grade_rules  rule_performance from the manual labels (load_historical run first)
+  train_ml     ml_model.train on those labels
+  api:<name>   each read endpoint of the review app, response cache cleared per request
+Reported per scenario: best wall time of --repeat runs, rows per second and the peak
+Python memory (tracemalloc) of one extra run. Results are compared with the baseline
+recorded for the same volume (--save-baseline writes it).
+
+  python -m benchmarks.run --months 12 --accounts 2
+  python -m benchmarks.run --years 10 --accounts 3 --scenarios import engine db_store
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+STAGES = ["import", "engine", "db_store", "export", "backtest", "grade_rules", "train_ml"]
+
+# Read endpoints of the review app; {first}/{last} are months, {start}/{end} dates
+API_ENDPOINTS = {
+    "months": "/api/months",
+    "lists": "/api/lists",
+    "draft": "/api/draft?month={last}",
+    "review": "/api/review?month={last}",
+    "search": "/api/search?q=mortgage",
+    "reports_summary": "/api/reports/summary?from={first}&to={last}",
+    "rent_statement": "/api/reports/rent-statement?month={last}",
+    "tenancies_void": "/api/tenancies/void?from={start}&to={end}",
+    "analytics": "/api/analytics/income_vs_expenditure?start={start}&end={end}",
+    "backtests_trend": "/api/backtests/trend",
+}
+API_PASSWORD = "benchmark"
+
+
+class Result(NamedTuple):
+    seconds: float
+    peak_mib: float | None
+    rows: int | None
+
+
+def _quiet(fn: Callable, *args, **kwargs):
+    """fn(*args, **kwargs) with its progress output swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def _measure(fn: Callable[[], object], repeat: int, memory: bool, prepare: Callable[[], object] | None = None):
+    """(best seconds, peak MiB of one traced run or None); prepare runs untimed before each run."""
+    best = float("inf")
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    if not memory:
+        return best, None
+    if prepare:
+        prepare()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+
+class Suite:
+    """The scenarios over one generated data set; each stage leaves the state the next one needs."""
+
+    def __init__(self, months: list[str]):
+        from property_pipeline import config
+
+        self.config = config
+        self.months = months
+        self.bank_dir = config.BANK_DOWNLOAD_DIR
+        self.checked_dir = config.CHECKED_DIR
+        self.canonical: dict[str, list[dict]] = {}
+        self.raw: dict[str, list[dict]] = {}
+        self.labels: dict[str, list[dict]] = {}
+        self.client = None
+
+    @property
+    def n_rows(self) -> int:
+        return sum(len(rows) for rows in self.canonical.values())
+
+    # Each stage returns (run, prepare); run is what gets timed
+
+    def import_(self):
+        from property_pipeline.importers import load_month_files
+
+        def run():
+            for m in self.months:
+                self.raw[m], self.canonical[m] = load_month_files(self.bank_dir, m)
+        return run, None
+
+    def engine(self):
+        from property_pipeline.engine import run_engine
+        from property_pipeline.rules_seed import PROPERTIES_SEED, get_all_rules
+
+        rules = get_all_rules()
+        properties_set = {p["property_code"] for p in PROPERTIES_SEED}
+
+        def run():
+            for m in self.months:
+                self.labels[m] = run_engine(self.canonical[m], rules, properties_set)
+        return run, None
+
+    def db_store(self):
+        from property_pipeline.db import get_db
+        from property_pipeline.pipeline import _store_canonical_rows, _store_labels, _store_raw_rows, seed_db
+
+        db = self.config.DB_PATH
+
+        def prepare():
+            for path in db.parent.glob(db.name + "*"):
+                path.unlink()
+            seed_db(db)
+
+        def run():
+            with get_db(db) as conn:
+                for m in self.months:
+                    _store_raw_rows(conn, self.raw[m])
+                    _store_canonical_rows(conn, self.canonical[m])
+                    _store_labels(conn, self.labels[m])
+        return run, prepare
+
+    def export(self):
+        from property_pipeline.export import build_output_dataframe, pa, write_csv, write_parquet, write_xlsx
+        from property_pipeline.rules_seed import PROPERTIES_SEED, get_categories_and_subcategories
+
+        categories, subcategories = get_categories_and_subcategories()
+        lists = dict(property_codes=sorted(p["property_code"] for p in PROPERTIES_SEED),
+                     categories=categories, subcategories=subcategories)
+        gen_dir = self.config.GENERATED_DIR
+        gen_dir.mkdir(parents=True, exist_ok=True)
+
+        def run():
+            for m in self.months:
+                df = build_output_dataframe(self.canonical[m], self.labels[m])
+                write_xlsx(df, gen_dir / f"{m}_codedAndCategorised.xlsx", **lists)
+                write_csv(df, gen_dir / f"{m}_codedAndCategorised.csv")
+                if pa is not None:
+                    write_parquet(df, gen_dir / f"{m}_codedAndCategorised.parquet")
+        return run, None
+
+    def after_export(self) -> None:
+        """The drafts become the checked history (ground truth for backtest, load_historical and reports)."""
+        self.checked_dir.mkdir(parents=True, exist_ok=True)
+        for m in self.months:
+            shutil.copy2(self.config.GENERATED_DIR / f"{m}_codedAndCategorised.xlsx", self.checked_dir)
+
+    def backtest(self):
+        from property_pipeline.backtest import run_backtest_all
+
+        def run():
+            _quiet(run_backtest_all, self.bank_dir, self.checked_dir, self.months)
+        return run, None
+
+    def grade_rules(self):
+        from property_pipeline.historical import grade_rules, load_historical_into_db
+
+        _quiet(load_historical_into_db, self.months, self.bank_dir, self.checked_dir, self.config.DB_PATH)
+
+        def run():
+            _quiet(grade_rules, self.config.DB_PATH)
+        return run, None
+
+    def train_ml(self):
+        from property_pipeline.ml_model import train
+
+        def run():
+            stats = train(self.config.DB_PATH, self.config.MODEL_PATH)
+            if not stats["ok"]:
+                raise RuntimeError(f"train_ml: {stats}")
+        return run, None
+
+    def api(self, name: str):
+        from fastapi.testclient import TestClient
+
+        from backend.cache import response_cache
+        from backend.main import app
+
+        if self.client is None:
+            self.client = TestClient(app)
+            token = self.client.post("/api/auth/login", json={"password": API_PASSWORD}).json()["access_token"]
+            self.client.headers["Authorization"] = f"Bearer {token}"
+        first, last = self.months[0], self.months[-1]
+        start = time.strftime("%Y-%m-%d", time.strptime("01" + first, "%d%b%Y"))
+        end = time.strftime("%Y-%m-28", time.strptime("01" + last, "%d%b%Y"))
+        url = API_ENDPOINTS[name].format(first=first, last=last, start=start, end=end)
+
+        def run():
+            response_cache.clear()
+            response = _quiet(self.client.get, url)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url}: {response.status_code} {response.text[:200]}")
+        return run, None
+
+
+def _scenario_names(selected: list[str] | None) -> list[str]:
+    every = STAGES + [f"api:{name}" for name in API_ENDPOINTS]
+    if not selected:
+        return every
+    names = set()
+    for s in selected:
+        if s == "api":
+            names.update(n for n in every if n.startswith("api:"))
+        elif s in every:
+            names.add(s)
+        else:
+            raise SystemExit(f"Unknown scenario {s!r}; expected one of {', '.join(['api', *every])}")
+    return [n for n in every if n in names]
+
+
+def run_suite(args, months: list[str]) -> dict[str, Result]:
+    """Generate the data, then run every stage up to the last selected scenario (unselected ones untimed)."""
+    from benchmarks.synthetic import generate_bank_files
+
+    selected = _scenario_names(args.scenarios)
+    suite = Suite(months)
+    t0 = time.perf_counter()
+    generated = generate_bank_files(suite.bank_dir, months, accounts=args.accounts, rows=args.rows, seed=args.seed)
+    print(f"Generated {generated['rows']} rows in {generated['files']} files for {len(months)} months "
+          f"({months[0]}..{months[-1]}, {args.accounts} accounts per Barclays file) in {time.perf_counter() - t0:.1f}s")
+
+    # API scenarios need every stage before them; stages need only the earlier stages
+    last_needed = len(STAGES) - 1 if any(n.startswith("api:") for n in selected) else \
+        max(STAGES.index(n) for n in selected)
+    results = {}
+    for name in STAGES[:last_needed + 1] + [n for n in selected if n.startswith("api:")]:
+        if name.startswith("api:"):
+            run, prepare = suite.api(name.split(":", 1)[1])
+        else:
+            run, prepare = getattr(suite, "import_" if name == "import" else name)()
+        if name in selected:
+            seconds, peak = _measure(run, args.repeat, not args.no_memory, prepare)
+            rows = None if name.startswith("api:") else suite.n_rows
+            results[name] = Result(seconds, peak, rows)
+            print(f"  {name:<22} {seconds:>8.3f}s")
+        else:
+            if prepare:
+                prepare()
+            run()
+        if name == "export":
+            suite.after_export()
+    return results
+
+
+def _config_key(args, months: list[str]) -> str:
+    return f"{len(months)}m-{args.accounts}a-{args.rows}r"
+
+
+def print_report(results: dict[str, Result], baseline: dict | None, tolerance: float) -> list[str]:
+    """Table of results against the baseline. Returns the scenarios that got slower or bigger than tolerance."""
+    regressions = []
+    print(f"\n{'scenario':<22} {'seconds':>8} {'rows/s':>10} {'peak MiB':>9} | {'base s':>8} {'x':>5} "
+          f"{'base MiB':>9} {'x':>5}")
+    for name, r in results.items():
+        rate = f"{r.rows / r.seconds:>10,.0f}" if r.rows else f"{'-':>10}"
+        peak = f"{r.peak_mib:>9.1f}" if r.peak_mib is not None else f"{'-':>9}"
+        line = f"{name:<22} {r.seconds:>8.3f} {rate} {peak} |"
+        base = (baseline or {}).get(name)
+        if base:
+            t_ratio = r.seconds / base["seconds"]
+            line += f" {base['seconds']:>8.3f} {t_ratio:>5.2f}"
+            m_ratio = None
+            if r.peak_mib is not None and base.get("peak_mib"):
+                m_ratio = r.peak_mib / base["peak_mib"]
+                line += f" {base['peak_mib']:>9.1f} {m_ratio:>5.2f}"
+            if t_ratio > 1 + tolerance or (m_ratio or 0) > 1 + tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    volume = parser.add_mutually_exclusive_group()
+    volume.add_argument("--months", type=int, default=3, help="Months of statements (default 3)")
+    volume.add_argument("--years", type=int, help="Years of statements (12 months each), e.g. 10")
+    parser.add_argument("--end-month", default="DEC2025", help="Last generated month (default DEC2025)")
+    parser.add_argument("--accounts", type=int, default=1, help="Accounts per Barclays file (default 1)")
+    parser.add_argument("--rows", type=int, default=100, help="Transactions per account and month (default 100)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", nargs="+", help="Scenarios to time: stage names, api or api:<endpoint> "
+                                                       "(default all)")
+    parser.add_argument("--repeat", type=int, default=2, help="Timed runs per scenario; the best is reported")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced run (peak memory)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Slowdown or memory growth over the baseline reported as a regression (default 0.2)")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 when there are regressions")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch data directory and print its path")
+    args = parser.parse_args()
+    if args.repeat < 1 or args.accounts < 1 or args.rows < 0:
+        parser.error("--repeat and --accounts must be at least 1, --rows at least 0")
+    n_months = args.years * 12 if args.years else args.months
+    if n_months < 1:
+        parser.error("need at least one month")
+
+    # Everything the package writes goes under the scratch directory: set before it is imported
+    workdir = Path(tempfile.mkdtemp(prefix="pp-bench-"))
+    for var in ("DB_PATH", "BACKTEST_DB_PATH", "MODEL_PATH", "DATASET_DIR", "BACKUP_DIR"):
+        os.environ.pop(var, None)
+    os.environ["DATA_PATH"] = str(workdir)
+    os.environ["REVIEW_APP_PASSWORD"] = API_PASSWORD
+
+    from benchmarks.synthetic import month_names
+
+    months = month_names(args.end_month.upper(), n_months)
+    try:
+        results = run_suite(args, months)
+    finally:
+        if args.keep:
+            print(f"Data kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    key = _config_key(args, months)
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = print_report(results, baselines.get(key), args.tolerance)
+    if key not in baselines:
+        print(f"\nNo baseline for {key} in {args.baseline} (record one with --save-baseline)")
+    if args.save_baseline:
+        baselines[key] = {**baselines.get(key, {}),
+                          **{name: {"seconds": round(r.seconds, 4), "peak_mib": r.peak_mib and round(r.peak_mib, 2),
+                                    "rows": r.rows} for name, r in results.items()}}
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline for {key} saved to {args.baseline}")
+    if regressions:
+        print(f"\nRegressions over {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
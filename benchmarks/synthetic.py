@@ -0,0 +1,178 @@
+"""Synthetic Barclays and Starling statements for the benchmarks.
+
+Memos are derived from the seeded rules so the engine does its real work: mortgage direct
+debits from every _mortgage_map_raw reference, merchants that hit the subcategory and
+override rules, rent credits, plus memos no rule matches. Files are named and laid out
+like the bank downloads load_month_files reads (BC_6045/3072/4040_MMMYYYY.csv and
+StarlingStatement_YYYY-MM.csv); output is deterministic for a seed.
+"""
+
+import csv
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from property_pipeline.config import STARLING_ACCOUNT
+from property_pipeline.rules_seed import _mortgage_map_raw, get_all_rules
+
+# Barclays file key -> the account that file holds; extra accounts are numbered after it
+BARCLAYS_ACCOUNTS = {
+    "6045": "20-74-09 60458872",
+    "3072": "20-53-97 30728691",
+    "4040": "20-74-09 40406538",
+}
+
+# Share of each account-month's rows by kind (mortgages are one per reference on top)
+ROW_MIX = {"merchant": 0.55, "override": 0.1, "rent": 0.15, "noise": 0.2}
+
+BARCLAYS_SUBCATEGORIES = {
+    "mortgage": ["Direct Debit"],
+    "merchant": ["Card Purchase", "Contactless Card Purchase"],
+    "override": ["Direct Debit", "Standing Order", "Card Purchase"],
+    "rent": ["Counter Credit", "Funds Transfer", "Standing Order"],
+    "noise": ["Card Purchase", "Funds Transfer", "Bill Payment", "Direct Debit"],
+}
+STARLING_TYPES = {
+    "mortgage": ("DIRECT DEBIT", "BILLS_AND_SERVICES"),
+    "merchant": ("CARD", "SHOPPING"),
+    "override": ("FASTER PAYMENT", "BILLS_AND_SERVICES"),
+    "rent": ("FASTER PAYMENT", "REVENUE"),
+    "noise": ("FASTER PAYMENT", "REPAIRS_AND_MAINTENANCE"),
+}
+NOISE_WORDS = ["ACME", "NORTHGATE", "RIVERSIDE", "HOLDINGS", "SUPPLIES", "TRADING", "SERVICES", "LTD", "UK", "GROUP"]
+
+
+def _alternatives(pattern: str) -> list[str]:
+    """Split a regex on its top-level | (alternations inside groups stay together)."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(pattern):
+        if ch == "\\":
+            continue
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == "|" and depth == 0 and (i == 0 or pattern[i - 1] != "\\"):
+            parts.append(pattern[start:i])
+            start = i + 1
+    parts.append(pattern[start:])
+    return parts
+
+
+def rule_examples(pattern: str) -> list[str]:
+    """Literal texts the rule pattern matches (re.match, as the engine does), one per simple alternative."""
+    examples = []
+    for alt in _alternatives(pattern):
+        text = alt.strip("^$")
+        for token, literal in ((r"\s*", "      "), (r"\s+", " "), ("[ ]?", " "), ("[-]?", "-"), (".*", " "),
+                               (r"\.", "."), (r"\&", "&"), (r"\-", "-"), (r"\/", "/")):
+            text = text.replace(token, literal)
+        text = text.strip()
+        if not text or text.startswith("__") or re.search(r"[\\\[\](){}?+*|^$]", text):
+            continue
+        if re.match(pattern, text, re.IGNORECASE):
+            examples.append(text)
+    return examples
+
+
+def memo_catalogue() -> dict[str, list[str]]:
+    """Example memos by kind: mortgage (_mortgage_map_raw), merchant (subcategory rules), override, rent."""
+    rules = get_all_rules()
+    by_phase = lambda phase: sorted({e for r in rules if r["phase"] == phase for e in rule_examples(r["pattern"])})
+    mortgage = [examples[0] for pattern, _ in _mortgage_map_raw if (examples := rule_examples(pattern))]
+    rent = ["BEALS ESTATE AGENT", "RENT", *(e for e in by_phase("category") if "RENT" in e.upper())]
+    return {
+        "mortgage": mortgage,
+        "merchant": by_phase("subcategory"),
+        "override": by_phase("override"),
+        "rent": list(dict.fromkeys(rent)),
+    }
+
+
+def month_names(end_month: str, n_months: int) -> list[str]:
+    """n_months month strings (MMMYYYY) ending at end_month, oldest first."""
+    end = pd.to_datetime("01" + end_month, format="%d%b%Y")
+    return [(end - pd.DateOffset(months=i)).strftime("%b%Y").upper() for i in reversed(range(n_months))]
+
+
+def _month_rows(rng: np.random.Generator, catalogue: dict, month_start: pd.Timestamp, rows: int,
+                mortgages: list[str]) -> list[tuple[pd.Timestamp, str, float, str]]:
+    """(date, kind, amount, memo) for one account-month, sorted by date."""
+    days = month_start.days_in_month
+    out = []
+    for memo in mortgages:
+        # Same day and amount every month for a reference, as real mortgage payments
+        seed = zlib.crc32(memo.encode())
+        out.append((month_start + pd.Timedelta(days=seed % 28), "mortgage", -(300 + seed % 90000 / 100), memo))
+    kinds = rng.choice(list(ROW_MIX), size=rows, p=list(ROW_MIX.values()))
+    for kind in kinds:
+        date = month_start + pd.Timedelta(days=int(rng.integers(0, days)))
+        if kind == "noise":
+            memo = " ".join(rng.choice(NOISE_WORDS, 2)) + f" REF{int(rng.integers(10000, 99999))}"
+            amount = round(float(rng.normal(-40, 120)), 2)
+        elif kind == "rent":
+            memo = str(rng.choice(catalogue[kind]))
+            amount = round(float(rng.uniform(450, 1600)), 2)
+        else:
+            memo = str(rng.choice(catalogue[kind]))
+            amount = -round(float(rng.gamma(2.0, 25.0)) + 1, 2)
+        out.append((date, kind, amount, memo))
+    out.sort(key=lambda r: r[0])
+    return out
+
+
+def _barclays_account(key: str, i: int) -> str:
+    return BARCLAYS_ACCOUNTS[key] if i == 0 else f"20-00-{key[:2]} 9{key}{i:04d}"
+
+
+def generate_bank_files(
+    out_dir: Path,
+    months: list[str],
+    accounts: int = 1,
+    rows: int = 100,
+    seed: int = 0,
+) -> dict:
+    """Write each month's three Barclays files (accounts accounts each) and Starling file. Returns counts.
+
+    rows is transactions per account and month, besides the mortgage payments: every
+    mortgage reference is paid once a month from the first 3072 account.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    catalogue = memo_catalogue()
+    n_rows = n_files = 0
+    for month in months:
+        month_start = pd.to_datetime("01" + month, format="%d%b%Y")
+        for key in BARCLAYS_ACCOUNTS:
+            path = out_dir / f"BC_{key}_{month}.csv"
+            with open(path, "w", newline="") as f:
+                w = csv.writer(f)
+                w.writerow(["Number", "Date", "Account", "Amount", "Subcategory", "Memo"])
+                for i in range(accounts):
+                    mortgages = catalogue["mortgage"] if key == "3072" and i == 0 else []
+                    for date, kind, amount, memo in _month_rows(rng, catalogue, month_start, rows, mortgages):
+                        number = f"\t{int(rng.integers(400000, 499999))}" if kind == "mortgage" else "\t0"
+                        subcat = str(rng.choice(BARCLAYS_SUBCATEGORIES[kind]))
+                        w.writerow([number, date.strftime("%d/%m/%Y"), _barclays_account(key, i), amount, subcat,
+                                    f"{memo:<22}\t{kind[:3].upper()} {int(rng.integers(100, 999))}"])
+                        n_rows += 1
+            n_files += 1
+
+        path = out_dir / f"StarlingStatement_{month_start.strftime('%Y-%m')}.csv"
+        balance = 50000.0
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["Date", "Counter Party", "Reference", "Type", "Amount (GBP)", "Balance (GBP)",
+                        "Spending Category", "Notes"])
+            for date, kind, amount, memo in _month_rows(rng, catalogue, month_start, rows, []):
+                balance += amount
+                txn_type, spending = STARLING_TYPES[kind]
+                w.writerow([date.strftime("%d/%m/%Y"), memo, "M Tucker SC", txn_type, f"{amount:.2f}",
+                            f"{balance:.2f}", spending, ""])
+                n_rows += 1
+        n_files += 1
+    return {"months": len(months), "files": n_files, "rows": n_rows, "starling_account": STARLING_ACCOUNT}
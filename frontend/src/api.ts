@@ -120,7 +120,45 @@ export function reviewSubmit(month: string) {
 }
 
 export function finalizeMonth(month: string) {
-  return api<{ ok: boolean; path?: string }>(`/finalize?month=${encodeURIComponent(month)}`, { method: 'POST' })
+  return api<{ ok: boolean; job_id: string; status: JobStatus }>(`/finalize?month=${encodeURIComponent(month)}`, { method: 'POST' })
+}
+
+export type JobKind = 'run_month' | 'finalize_month' | 'grade_rules' | 'train_ml'
+export type JobStatus = 'queued' | 'running' | 'succeeded' | 'failed'
+
+export interface Job {
+  job_id: string
+  kind: JobKind
+  params: Record<string, unknown>
+  status: JobStatus
+  progress: number
+  message: string | null
+  result: Record<string, unknown> | null
+  error: string | null
+  created_at: string
+  started_at: string | null
+  finished_at: string | null
+}
+
+export function submitJob(kind: JobKind, params?: { month?: string; use_ml?: boolean }) {
+  return api<Job>('/jobs', { method: 'POST', body: JSON.stringify({ kind, ...params }) })
+}
+
+export function getJob(jobId: string) {
+  return api<Job>(`/jobs/${encodeURIComponent(jobId)}`)
+}
+
+/** Follow a job over Server-Sent Events; returns a function that closes the stream. */
+export function watchJob(jobId: string, onUpdate: (job: Job) => void) {
+  const sp = new URLSearchParams({ access_token: getToken() ?? '' })
+  const es = new EventSource(`${API_BASE}/jobs/${encodeURIComponent(jobId)}/events?${sp}`)
+  es.addEventListener('job', (e) => {
+    const job = JSON.parse((e as MessageEvent).data) as Job
+    onUpdate(job)
+    if (job.status === 'succeeded' || job.status === 'failed') es.close()
+  })
+  es.onerror = () => es.close()
+  return () => es.close()
 }
 
 export interface ReportSummary {
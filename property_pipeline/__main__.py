@@ -37,6 +37,15 @@ def main():
     p_bt.add_argument("--months", nargs="*", help="Specific months to test (default: all)")
     p_bt.add_argument("--bank-dir", help="Bank download directory override")
     p_bt.add_argument("--checked-dir", help="Checked directory override")
+    p_bt.add_argument("--no-save", action="store_true", help="Do not record the run in backtests.db")
+
+    p_btr = sub.add_parser("backtest_runs", help="List saved backtest runs")
+    p_btr.add_argument("--limit", type=int, default=20, help="Newest runs to show")
+
+    p_btd = sub.add_parser("backtest_diff", help="Per-month accuracy changes between two saved backtest runs")
+    p_btd.add_argument("run_a", nargs="?", type=int, help="Earlier run id (default: the run before the latest)")
+    p_btd.add_argument("run_b", nargs="?", type=int, help="Later run id (default: the latest)")
+    p_btd.add_argument("--all", action="store_true", help="Show months whose accuracy did not change too")
 
     # seed_db
     p_seed = sub.add_parser("seed_db", help="Initialise DB and seed rules/properties")
@@ -58,6 +67,88 @@ def main():
     p_train.add_argument("--db", help="Database path override")
     p_train.add_argument("--model", help="Output path for model file")
 
+    # build_aggregates
+    p_agg = sub.add_parser("build_aggregates", help="Aggregate checked files for the reports API")
+    p_agg.add_argument("--months", nargs="*", help="Months to aggregate (default: all in checked/)")
+    p_agg.add_argument("--checked-dir", help="Checked directory override")
+    p_agg.add_argument("--db", help="Database path override")
+    p_agg.add_argument("--rebuild", action="store_true", help="Re-read files even if unchanged since last aggregated")
+
+    # prewarm_cache
+    p_cache = sub.add_parser("prewarm_cache", help="Convert checked XLSX files to the columnar read cache")
+    p_cache.add_argument("--months", nargs="*", help="Months to convert (default: all XLSX in checked/)")
+    p_cache.add_argument("--checked-dir", help="Checked directory override")
+
+    # load_tenancies
+    p_ten = sub.add_parser("load_tenancies", help="Replace the tenancies table from the tenancy sheet")
+    p_ten.add_argument("--file", help="Tenancy XLS (default: bank-download/all_tenancies.xls)")
+    p_ten.add_argument("--db", help="Database path override")
+
+    # rent_statement
+    p_rs = sub.add_parser("rent_statement", help="Rent statement per property for a month or range")
+    p_rs.add_argument("month", help="Month string, e.g. OCT2025")
+    p_rs.add_argument("--to", help="Last month of a range, e.g. DEC2025")
+    p_rs.add_argument("--paid-in-advance", nargs="*", default=[], help="Tenants to mark PaidInAdvance")
+    p_rs.add_argument("--in-arrears", nargs="*", default=[], help="Tenants to mark InArrears")
+    p_rs.add_argument("--output", help="Write to .csv or .xlsx instead of printing")
+    p_rs.add_argument("--db", help="Database path override")
+    p_rs.add_argument("--checked-dir", help="Checked directory override")
+
+    # tenancies
+    p_tq = sub.add_parser("tenancies", help="Tenant of a property on a date, or void properties in a range")
+    p_tq.add_argument("date", help="Date (YYYY-MM-DD); start of the range with --to")
+    p_tq.add_argument("--property", help="Property code: show its tenant on DATE")
+    p_tq.add_argument("--to", help="End of the range (YYYY-MM-DD) for void properties")
+    p_tq.add_argument("--db", help="Database path override")
+
+    # import_beals / reconcile_beals
+    p_ib = sub.add_parser("import_beals", help="Import Beals agent statements into the DB")
+    p_ib.add_argument("--months", nargs="*", help="Statement months, e.g. AUG2022 (default: all files in beals/)")
+    p_ib.add_argument("--beals-dir", help="Beals statements directory override")
+    p_ib.add_argument("--db", help="Database path override")
+
+    p_rb = sub.add_parser("reconcile_beals", help="Match Beals receipts in the DB to statement payouts")
+    p_rb.add_argument("date_from", help="First receipt date (YYYY-MM-DD)")
+    p_rb.add_argument("date_to", help="Last receipt date (YYYY-MM-DD)")
+    p_rb.add_argument("--no-import", action="store_true", help="Use statements already in the DB")
+    p_rb.add_argument("--beals-dir", help="Beals statements directory override")
+    p_rb.add_argument("--db", help="Database path override")
+
+    # backups
+    p_bl = sub.add_parser("backups", help="List backed-up versions of output files")
+    p_bl.add_argument("path", nargs="?", help="Output file (default: every file in the store)")
+
+    p_br = sub.add_parser("restore_backup", help="Restore a backed-up version of an output file")
+    p_br.add_argument("path", help="Output file, e.g. data/property/generated/OCT2025_codedAndCategorised.xlsx")
+    p_br.add_argument("--hash", help="Version to restore (hash or prefix, default: latest)")
+    p_br.add_argument("--to", help="Write here instead of over the file")
+
+    p_bp = sub.add_parser("prune_backups", help="Apply the backup retention policy")
+    p_bp.add_argument("--keep", type=int, help="Versions kept per file regardless of age")
+    p_bp.add_argument("--days", type=int, help="Versions younger than this are kept")
+
+    p_bi = sub.add_parser("import_bak_files", help="Move old .bak_ copies into the backup store")
+    p_bi.add_argument("dirs", nargs="*", help="Directories to search (default: DATA_PATH)")
+    p_bi.add_argument("--delete", action="store_true", help="Delete each .bak_ file once stored")
+
+    # Parquet dataset
+    p_ep = sub.add_parser("export_parquet", help="Sync the partitioned Parquet dataset from checked/")
+    p_ep.add_argument("--months", nargs="+", help="Months to sync, e.g. OCT2025 (default: every checked month)")
+    p_ep.add_argument("--rebuild", action="store_true", help="Rewrite partitions even if up to date")
+    p_ep.add_argument("--checked-dir", help="Checked directory override")
+    p_ep.add_argument("--dataset-dir", help="Dataset directory override")
+
+    # analytics
+    p_an = sub.add_parser("analytics", help="Run a named analytics query (DuckDB); no name lists them")
+    p_an.add_argument("name", nargs="?", help="Query name, e.g. net_by_property_tax_year")
+    p_an.add_argument("--start", help="First date (YYYY-MM-DD)")
+    p_an.add_argument("--end", help="Last date (YYYY-MM-DD)")
+    p_an.add_argument("--param", action="append", default=[], metavar="KEY=VALUE", help="Other query parameters")
+    p_an.add_argument("--source", choices=["labels", "checked"], default="labels",
+                      help="labels.db (default) or the checked/ history")
+    p_an.add_argument("--output", help="Write CSV/XLSX here instead of printing")
+    p_an.add_argument("--db", help="Database path override")
+
     args = parser.parse_args()
 
     if args.command == "run_month":
@@ -85,7 +176,48 @@ def main():
         from .backtest import run_backtest_all
         bd = Path(args.bank_dir) if args.bank_dir else None
         cd = Path(args.checked_dir) if args.checked_dir else None
-        run_backtest_all(bank_download_dir=bd, checked_dir=cd, months=args.months)
+        run_backtest_all(bank_download_dir=bd, checked_dir=cd, months=args.months, save=not args.no_save)
+
+    elif args.command == "backtest_runs":
+        from .backtest_store import list_runs
+        for r in list_runs(args.limit):
+            stages = "  ".join(f"{k}={v:.1f}s" for k, v in r["stage_seconds"].items())
+            print(f"{r['run_id']:>4}  {r['started_at']}  rules {r['rules_fp'][:10]}  {r['n_months']} months  "
+                  f"Cat={r['category_accuracy']:.1%}  Full={r['full_label_accuracy']:.1%}  "
+                  f"wall={r['wall_seconds']:.1f}s  {stages}")
+
+    elif args.command == "backtest_diff":
+        import pandas as pd
+        from .backtest_store import diff_runs, latest_run_ids, list_runs
+        run_a, run_b = args.run_a, args.run_b
+        if run_b is None:
+            ids = latest_run_ids(2)
+            if run_a is None and len(ids) == 2:
+                run_a, run_b = ids
+            elif run_a is not None and ids:
+                run_b = ids[-1]
+            else:
+                parser.error("need two saved backtest runs (or pass run ids)")
+        runs = {r["run_id"]: r for r in list_runs()}
+        for run_id in (run_a, run_b):
+            if run_id not in runs:
+                parser.error(f"no backtest run {run_id}")
+        a, b = runs[run_a], runs[run_b]
+        print(f"Run {run_a} ({a['started_at']}, rules {a['rules_fp'][:10]}) -> run {run_b} ({b['started_at']}, rules {b['rules_fp'][:10]})")
+        for col in ("category_accuracy", "critical_category_accuracy", "property_accuracy", "full_label_accuracy"):
+            print(f"  {col}: {a[col] or 0:.2%} -> {b[col] or 0:.2%} ({(b[col] or 0) - (a[col] or 0):+.2%})")
+        print(f"  wall: {a['wall_seconds']:.1f}s -> {b['wall_seconds']:.1f}s")
+        for stage, secs in b["stage_seconds"].items():
+            print(f"    {stage}: {a['stage_seconds'].get(stage, 0):.2f}s -> {secs:.2f}s")
+        diff = diff_runs(run_a, run_b)
+        deltas = [c for c in diff.columns if c.endswith("_delta")]
+        if not args.all:
+            diff = diff[(diff[deltas] != 0).any(axis=1)]
+        if diff.empty:
+            print("No per-month accuracy changes.")
+        else:
+            with pd.option_context("display.max_rows", None, "display.width", 200):
+                print(diff[["category_accuracy_a", "category_accuracy_b", *deltas]].to_string())
 
     elif args.command == "seed_db":
         from .pipeline import seed_db
@@ -118,6 +250,135 @@ def main():
             print(f"Training skipped: {res.get('reason', 'unknown')} (n={res.get('n', 0)})")
             sys.exit(1)
 
+    elif args.command == "build_aggregates":
+        from .aggregates import build_aggregates
+        cd = Path(args.checked_dir) if args.checked_dir else None
+        months = build_aggregates(months=args.months, checked_dir=cd, db_path=args.db, rebuild=args.rebuild)
+        print(f"Aggregates up to date for {len(months)} months.")
+
+    elif args.command == "prewarm_cache":
+        from .checked_cache import prewarm
+        cd = Path(args.checked_dir) if args.checked_dir else None
+        n = prewarm(months=args.months, checked_dir=cd)
+        print(f"Cache ready for {n} checked files.")
+
+    elif args.command == "load_tenancies":
+        from .rent_statement import load_tenancies
+        load_tenancies(path=args.file, db_path=args.db)
+
+    elif args.command == "tenancies":
+        from .db import init_db, get_db
+        from .tenancy_index import TenancyIndex
+        init_db(args.db)
+        with get_db(args.db) as conn:
+            index = TenancyIndex.from_db(conn)
+        if args.property:
+            t = index.tenant_on(args.property, args.date)
+            print(f"{args.property} on {args.date}: "
+                  + (f"{t.tenant_name} ({t.start_date} - {t.end_date or 'open'})" if t else "void"))
+        else:
+            void = index.void_properties(args.date, args.to)
+            print(f"Void {args.date} - {args.to or args.date}: {', '.join(void) or 'none'}")
+
+    elif args.command == "import_beals":
+        from .reconcile import import_statements
+        bd = Path(args.beals_dir) if args.beals_dir else None
+        counts = import_statements(months=args.months, beals_dir=bd, db_path=args.db)
+        print(f"Imported {sum(counts.values())} statement lines from {len(counts)} statements.")
+
+    elif args.command == "reconcile_beals":
+        from .reconcile import reconcile
+        bd = Path(args.beals_dir) if args.beals_dir else None
+        res = reconcile(args.date_from, args.date_to, db_path=args.db, beals_dir=bd, import_first=not args.no_import)
+        print(f"Receipts: {res['receipts']} ({res['exact']} exact, {res['subset']} combined, "
+              f"{res['unmatched_receipts']} unmatched); unmatched payout lines: {res['unmatched_lines']}; "
+              f"property codes filled: {res['coded']}")
+
+    elif args.command == "backups":
+        from .backups import list_backups
+        for b in list_backups(Path(args.path) if args.path else None):
+            print(f"{b['backed_up_at']}  {b['sha256'][:12]}  {b['size']:>10}  {b['path']}")
+
+    elif args.command == "restore_backup":
+        from .backups import restore_backup
+        dest = restore_backup(Path(args.path), sha256=args.hash, dest=Path(args.to) if args.to else None)
+        print(f"Restored to {dest}")
+
+    elif args.command == "prune_backups":
+        from .backups import BACKUP_KEEP_DAYS, BACKUP_KEEP_VERSIONS, prune_backups
+        n = prune_backups(
+            keep_versions=BACKUP_KEEP_VERSIONS if args.keep is None else args.keep,
+            keep_days=BACKUP_KEEP_DAYS if args.days is None else args.days,
+        )
+        print(f"Dropped {n} backups.")
+
+    elif args.command == "import_bak_files":
+        from .backups import import_bak_files
+        from .config import BASE_DIR
+        for d in args.dirs or [BASE_DIR]:
+            res = import_bak_files(Path(d), delete=args.delete)
+            print(f"{d}: {res['found']} .bak_ files, {res['stored']} new versions stored, "
+                  f"{res['deleted']} deleted ({res['bytes_freed'] / 2**20:.1f} MiB)")
+
+    elif args.command == "export_parquet":
+        from .dataset import sync_dataset
+        from .config import DATASET_DIR
+        dataset_dir = Path(args.dataset_dir) if args.dataset_dir else DATASET_DIR
+        written = sync_dataset(
+            args.months,
+            checked_dir=Path(args.checked_dir) if args.checked_dir else None,
+            dataset_dir=dataset_dir,
+            rebuild=args.rebuild,
+        )
+        print(f"{len(written)} partitions written to {dataset_dir}" + (f": {', '.join(written)}" if written else ""))
+
+    elif args.command == "analytics":
+        import pandas as pd
+        from .analytics import list_queries, run_query
+        if not args.name:
+            for q in list_queries():
+                params = ", ".join(k if v is None else f"{k}={v!r}" for k, v in q["params"].items())
+                print(f"{q['name']}({params})\n    {q['description']}")
+            return
+        params = dict(p.split("=", 1) for p in args.param)
+        params.update({k: v for k, v in (("start", args.start), ("end", args.end)) if v})
+        if args.source == "checked":
+            from .dataset import sync_dataset
+            sync_dataset()
+        df = run_query(args.name, params, source=args.source, db_path=args.db)
+        if args.output:
+            out = Path(args.output)
+            if out.suffix == ".xlsx":
+                df.to_excel(out, index=False)
+            else:
+                df.to_csv(out, index=False)
+            print(f"{len(df)} rows written to {out}")
+        else:
+            with pd.option_context("display.max_rows", None, "display.width", 200):
+                print(df.to_string(index=False))
+
+    elif args.command == "rent_statement":
+        import pandas as pd
+        from .rent_statement import build_rent_statement
+        cd = Path(args.checked_dir) if args.checked_dir else None
+        df = build_rent_statement(
+            args.month, args.to,
+            paid_in_advance=args.paid_in_advance,
+            in_arrears=args.in_arrears,
+            db_path=args.db,
+            checked_dir=cd,
+        )
+        if args.output:
+            out = Path(args.output)
+            if out.suffix == ".xlsx":
+                df.to_excel(out, index=False)
+            else:
+                df.to_csv(out, index=False)
+            print(f"Rent statement written to {out}")
+        else:
+            with pd.option_context("display.max_rows", None, "display.width", 200):
+                print(df.to_string(index=False))
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,163 @@
+"""Monthly aggregate totals behind the reports API.
+
+monthly_aggregates holds sum(Amount) and a row count per (month, period, account,
+property, category, subcategory). finalize_month fills a month from the DB; a trigger
+on transactions_labels moves a transaction between buckets when a finalized month is
+corrected; months only present as files in checked/ (or edited there by hand) are
+aggregated from the file the first time a report needs them.
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from .report_summary import checked_path, iter_checked_months, read_checked_file
+
+KEY_COLUMNS = ["period", "account", "property_code", "category", "subcategory"]
+
+# Aggregate columns -> checked file columns, as used by the report_summary functions
+FRAME_COLUMNS = {"account": "Account", "total": "Amount", "property_code": "Property",
+                 "category": "Cat", "subcategory": "Subcat"}
+
+
+def _file_stat(path: Path | None) -> tuple[int | None, int | None]:
+    if path is None:
+        return None, None
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def _record_source(conn: sqlite3.Connection, month: str, source: str, path: Path | None) -> None:
+    size, mtime_ns = _file_stat(path)
+    conn.execute(
+        """INSERT OR REPLACE INTO monthly_aggregate_sources (month, source, file_size, file_mtime_ns)
+           VALUES (?, ?, ?, ?)""",
+        (month, source, size, mtime_ns),
+    )
+
+
+def refresh_month_from_db(conn: sqlite3.Connection, month: str, checked_file: Path | None = None) -> int:
+    """Recompute month from canonical + latest labels (what finalize_month writes). Returns buckets written.
+
+    checked_file is the file just written to checked/, recorded so later edits to it are noticed.
+    """
+    conn.execute("DELETE FROM monthly_aggregates WHERE month = ?", (month,))
+    cur = conn.execute(
+        """INSERT INTO monthly_aggregates (month, period, account, property_code, category, subcategory, total, n)
+           SELECT c.import_batch_id, substr(c.posted_date, 1, 7), COALESCE(c.source_account, ''),
+                  COALESCE(l.property_code, ''), COALESCE(l.category, ''), COALESCE(l.subcategory, ''),
+                  SUM(c.amount), COUNT(*)
+           FROM transactions_canonical c
+           LEFT JOIN transactions_labels_latest l ON l.tx_id = c.tx_id
+           WHERE c.import_batch_id = ? AND c.is_superseded = 0
+             AND c.posted_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-*'
+           GROUP BY 1, 2, 3, 4, 5, 6""",
+        (month,),
+    )
+    _record_source(conn, month, "finalize", checked_file)
+    return cur.rowcount
+
+
+def aggregate_checked_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Group a checked-file frame (DatetimeIndex, Account/Amount/Property/Cat/Subcat) into aggregate rows."""
+    df = df[df.index.notna()]
+    out = pd.DataFrame({
+        "period": df.index.strftime("%Y-%m"),
+        "account": df["Account"].fillna("").astype(str).values,
+        "property_code": df["Property"].fillna("").astype(str).values,
+        "category": df["Cat"].fillna("").astype(str).values,
+        "subcategory": df["Subcat"].fillna("").astype(str).values,
+        "total": pd.to_numeric(df["Amount"], errors="coerce").values,
+    })
+    return out.groupby(KEY_COLUMNS, as_index=False).agg(total=("total", "sum"), n=("total", "size"))
+
+
+def refresh_month_from_file(conn: sqlite3.Connection, month: str, path: Path, df: pd.DataFrame | None = None) -> int:
+    """Replace month's aggregates with the contents of its checked file (df if already read). Returns buckets written."""
+    rows = aggregate_checked_frame(read_checked_file(path) if df is None else df)
+    conn.execute("DELETE FROM monthly_aggregates WHERE month = ?", (month,))
+    conn.executemany(
+        """INSERT INTO monthly_aggregates (month, period, account, property_code, category, subcategory, total, n)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(month, *r) for r in rows[KEY_COLUMNS + ["total", "n"]].itertuples(index=False, name=None)],
+    )
+    _record_source(conn, month, "checked_file", path)
+    return len(rows)
+
+
+def sync_months(conn: sqlite3.Connection, months: list[str], checked_dir: Path | None = None) -> list[str]:
+    """Bring aggregates for months up to date with checked/. Returns the months that have a checked file.
+
+    Only months whose file is new or whose size/mtime changed since they were aggregated are read.
+    """
+    if not months:
+        return []
+    placeholders = ",".join(["?"] * len(months))
+    recorded = {
+        row["month"]: (row["file_size"], row["file_mtime_ns"])
+        for row in conn.execute(
+            f"SELECT month, file_size, file_mtime_ns FROM monthly_aggregate_sources WHERE month IN ({placeholders})",
+            months,
+        )
+    }
+    present = {}
+    for month in months:
+        path = checked_path(month, checked_dir)
+        if path is not None:
+            present[month] = path
+    stale = [m for m, path in present.items() if recorded.get(m) != _file_stat(path)]
+    for month, df in iter_checked_months(stale, checked_dir):
+        print(f"  Aggregating {present[month].name}")
+        refresh_month_from_file(conn, month, present[month], df=df)
+    return list(present)
+
+
+def load_aggregate_frame(conn: sqlite3.Connection, months: list[str], checked_dir: Path | None = None) -> pd.DataFrame:
+    """One row per aggregate bucket for months, shaped like load_data's output.
+
+    Each bucket is dated the first of its period, so the report_summary functions
+    (monthly Grouper sums) give the same results as on the individual transactions.
+    """
+    months = sync_months(conn, months, checked_dir)
+    cols = list(FRAME_COLUMNS.values())
+    if not months:
+        return pd.DataFrame(columns=cols)
+    placeholders = ",".join(["?"] * len(months))
+    agg = pd.read_sql_query(
+        f"""SELECT period, account, property_code, category, subcategory, total
+            FROM monthly_aggregates WHERE month IN ({placeholders})""",
+        conn,
+        params=months,
+    )
+    if agg.empty:
+        return pd.DataFrame(columns=cols)
+    df = agg.rename(columns=FRAME_COLUMNS)
+    df.index = pd.DatetimeIndex(pd.to_datetime(agg["period"] + "-01", format="%Y-%m-%d"))
+    return df[cols]
+
+
+def build_aggregates(
+    months: list[str] | None = None,
+    checked_dir: Path | None = None,
+    db_path: Path | str | None = None,
+    rebuild: bool = False,
+) -> list[str]:
+    """Aggregate checked files ahead of the first report (default: every month in checked/).
+
+    rebuild re-reads every file, discarding aggregates kept current from the DB since finalize.
+    """
+    from .config import CHECKED_DIR
+    from .db import init_db, get_db
+
+    checked_dir = checked_dir or CHECKED_DIR
+    if not months:
+        suffix = "_codedAndCategorised"
+        months = sorted({p.stem[: -len(suffix)] for p in checked_dir.glob(f"*{suffix}.*")
+                         if p.suffix in (".xlsx", ".csv")})
+    init_db(db_path)
+    with get_db(db_path) as conn:
+        if rebuild:
+            placeholders = ",".join(["?"] * len(months))
+            conn.execute(f"DELETE FROM monthly_aggregate_sources WHERE month IN ({placeholders})", months)
+        return sync_months(conn, months, checked_dir)
@@ -0,0 +1,241 @@
+"""Named analytical queries (spend per year, net per property per tax year, ...) run by an embedded DuckDB.
+
+Each query is SQL over a transactions view `tx` (date, account, amount, property, cat, subcat, memo)
+with one of two sources:
+  labels   non-superseded transactions in labels.db with their latest label
+  checked  the Parquet dataset of checked/ months (dataset.py) as it stands; it is kept up to
+           date by finalize_month and export_parquet, never by a query
+labels.db is attached read-only with DuckDB's sqlite extension when it is installed
+(`INSTALL sqlite` once); otherwise the two tables the view needs are copied in over sqlite3.
+DuckDB is optional (pip install duckdb).
+"""
+
+import sqlite3
+from contextlib import closing
+from datetime import date
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .config import DATASET_DIR, DB_PATH
+
+try:
+    import duckdb
+except ImportError:  # optional: no analytics queries
+    duckdb = None
+
+SOURCES = ("labels", "checked")
+
+# Account used by the accounts summary (3.5 Annual Summary for Accounts)
+ACCOUNTS_ACCOUNT = "60-83-71 00558156"
+
+# Label-store columns the tx view reads (copied in when labels.db cannot be attached)
+_LABEL_TABLES = {
+    "transactions_canonical": ["tx_id", "posted_date", "source_account", "amount", "memo", "is_superseded"],
+    "transactions_labels": ["tx_id", "label_version", "property_code", "category", "subcategory"],
+}
+
+_TX_LABELS_SQL = """
+CREATE VIEW tx AS
+SELECT TRY_CAST(c.posted_date AS DATE) AS date, c.source_account AS account, CAST(c.amount AS DOUBLE) AS amount,
+       NULLIF(l.property_code, '') AS property, NULLIF(l.category, '') AS cat,
+       NULLIF(l.subcategory, '') AS subcat, c.memo
+FROM labels.transactions_canonical c
+LEFT JOIN (
+    SELECT * FROM labels.transactions_labels
+    QUALIFY row_number() OVER (PARTITION BY tx_id ORDER BY label_version DESC) = 1
+) l USING (tx_id)
+WHERE c.is_superseded = 0
+"""
+
+_TX_CHECKED_SQL = """
+CREATE VIEW tx AS
+SELECT CAST("Date" AS DATE) AS date, "Account" AS account, "Amount" AS amount,
+       NULLIF("Property", '') AS property, NULLIF("Cat", '') AS cat, NULLIF("Subcat", '') AS subcat, "Memo" AS memo
+FROM read_parquet('{glob}', hive_partitioning = true)
+"""
+
+# UK tax year (6 April - 5 April) as its starting calendar year
+_TAX_YEAR = "CASE WHEN month(date) > 4 OR (month(date) = 4 AND day(date) >= 6) THEN year(date) ELSE year(date) - 1 END"
+
+_RENT = "cat IN ('OurRent', 'BealsRent')"
+_EXPENSE = "cat IN ('PropertyExpense', 'ServiceCharge')"
+
+
+class AnalyticsQuery(NamedTuple):
+    description: str
+    sql: str
+    params: dict  # name -> default; None means required
+
+
+QUERIES: dict[str, AnalyticsQuery] = {
+    "spend_by_subcategory": AnalyticsQuery(
+        "Outgoings per calendar year, category and subcategory (optionally one category)",
+        """
+        SELECT year(date) AS year, cat, subcat, round(sum(amount), 2) AS total, count(*) AS n
+        FROM tx
+        WHERE date BETWEEN $start AND $end AND amount < 0 AND ($cat IS NULL OR cat = $cat)
+        GROUP BY ALL
+        ORDER BY year, total
+        """,
+        {"start": None, "end": None, "cat": ""},
+    ),
+    "category_by_month": AnalyticsQuery(
+        "Total per month and category",
+        """
+        SELECT strftime(date, '%Y-%m') AS month, cat, round(sum(amount), 2) AS total, count(*) AS n
+        FROM tx
+        WHERE date BETWEEN $start AND $end
+        GROUP BY ALL
+        ORDER BY month, cat
+        """,
+        {"start": None, "end": None},
+    ),
+    "net_by_property_tax_year": AnalyticsQuery(
+        "Rent, mortgage, expenses and net per property and tax year (6 April - 5 April)",
+        f"""
+        SELECT printf('%d/%02d', ty, (ty + 1) % 100) AS tax_year, property,
+               round(coalesce(sum(amount) FILTER ({_RENT}), 0), 2) AS rent,
+               round(coalesce(sum(amount) FILTER (cat = 'Mortgage'), 0), 2) AS mortgage,
+               round(coalesce(sum(amount) FILTER ({_EXPENSE}), 0), 2) AS expenses,
+               round(coalesce(sum(amount) FILTER ({_RENT} OR cat = 'Mortgage' OR {_EXPENSE}), 0), 2) AS net
+        FROM (SELECT *, {_TAX_YEAR} AS ty FROM tx)
+        WHERE date BETWEEN $start AND $end AND property IS NOT NULL
+        GROUP BY ty, property
+        HAVING count(*) FILTER ({_RENT} OR cat = 'Mortgage' OR {_EXPENSE}) > 0
+        ORDER BY ty, property
+        """,
+        {"start": None, "end": None},
+    ),
+    "income_vs_expenditure": AnalyticsQuery(
+        "Rent, mortgage, expenses and net per calendar year (3.5 Annual Summary)",
+        f"""
+        SELECT year(date) AS year,
+               round(coalesce(sum(amount) FILTER ({_RENT}), 0), 2) AS rent,
+               round(coalesce(sum(amount) FILTER (cat = 'Mortgage'), 0), 2) AS mortgage,
+               round(coalesce(sum(amount) FILTER ({_EXPENSE}), 0), 2) AS expenses,
+               round(coalesce(sum(amount) FILTER ({_RENT} OR cat = 'Mortgage' OR {_EXPENSE}), 0), 2) AS net
+        FROM tx
+        WHERE date BETWEEN $start AND $end
+        GROUP BY ALL
+        ORDER BY year
+        """,
+        {"start": None, "end": None},
+    ),
+    "accounts_summary": AnalyticsQuery(
+        "Totals per accounts category for the company account plus all mortgages, |total| >= 100"
+        " (3.5 Annual Summary for Accounts)",
+        """
+        SELECT CASE
+                 WHEN cat IN ('OurRent', 'BealsRent', 'Deposit') THEN 'Rent'
+                 WHEN cat = 'PersonalExpense' THEN 'Drawings'
+                 WHEN cat IN ('ServiceCharge', 'ServiceChargeRefund', 'OtherExpense') THEN 'PropertyExpense'
+                 ELSE cat
+               END AS account_cat,
+               round(sum(amount), 2) AS total
+        FROM tx
+        WHERE date BETWEEN $start AND $end AND (account = $account OR cat = 'Mortgage')
+        GROUP BY ALL
+        HAVING abs(sum(amount)) >= 100
+        ORDER BY account_cat
+        """,
+        {"start": None, "end": None, "account": ACCOUNTS_ACCOUNT},
+    ),
+}
+
+
+def _require_duckdb() -> None:
+    if duckdb is None:
+        raise RuntimeError("duckdb is required for analytics queries (pip install duckdb)")
+
+
+def _sqlite_extension_installed(con) -> bool:
+    row = con.execute(
+        "SELECT installed FROM duckdb_extensions() WHERE extension_name = 'sqlite_scanner'"
+    ).fetchone()
+    return bool(row and row[0])
+
+
+def _attach_labels(con, db_path: Path) -> None:
+    """labels.db as schema `labels`: attached if the sqlite extension is installed, else a copy of the tables used."""
+    if _sqlite_extension_installed(con):
+        path = str(db_path).replace("'", "''")
+        con.execute(f"ATTACH '{path}' AS labels (TYPE sqlite, READ_ONLY)")
+        return
+    con.execute("CREATE SCHEMA labels")
+    with closing(sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)) as src:
+        for table, columns in _LABEL_TABLES.items():
+            frame = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM {table}", src)
+            con.register("_frame", frame)
+            con.execute(f"CREATE TABLE labels.{table} AS SELECT * FROM _frame")
+            con.unregister("_frame")
+
+
+def connect(source: str = "labels", db_path: Path | str | None = None, dataset_dir: Path | None = None):
+    """In-memory DuckDB connection with the `tx` view over source ("labels" or "checked")."""
+    _require_duckdb()
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source {source!r}; expected one of {', '.join(SOURCES)}")
+    con = duckdb.connect()
+    if source == "labels":
+        db_path = Path(db_path or DB_PATH)
+        if not db_path.exists():
+            raise FileNotFoundError(f"No database at {db_path}")
+        _attach_labels(con, db_path)
+        con.execute(_TX_LABELS_SQL)
+    else:
+        dataset_dir = dataset_dir or DATASET_DIR
+        if not any(dataset_dir.glob("year=*/month=*/*.parquet")):
+            raise FileNotFoundError(f"No checked months in {dataset_dir} (run export_parquet)")
+        glob = (dataset_dir / "*" / "*" / "*.parquet").as_posix().replace("'", "''")
+        con.execute(_TX_CHECKED_SQL.format(glob=glob))
+    return con
+
+
+def _bind(name: str, params: dict) -> dict:
+    if name not in QUERIES:
+        raise ValueError(f"Unknown query {name!r}; expected one of {', '.join(QUERIES)}")
+    unknown = set(params) - set(QUERIES[name].params)
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) for {name}: {', '.join(sorted(unknown))}")
+    bound = {}
+    for key, default in QUERIES[name].params.items():
+        value = params.get(key)
+        if value in (None, ""):
+            if default is None:
+                raise ValueError(f"{name} needs parameter {key!r}")
+            value = default
+        if key in ("start", "end"):
+            value = value if isinstance(value, date) else date.fromisoformat(str(value))
+        bound[key] = value if value != "" else None
+    return bound
+
+
+def run_query(
+    name: str,
+    params: dict | None = None,
+    source: str = "labels",
+    db_path: Path | str | None = None,
+    dataset_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Run the named query from QUERIES; params are the query's parameters (start/end as YYYY-MM-DD)."""
+    bound = _bind(name, params or {})
+    with closing(connect(source, db_path=db_path, dataset_dir=dataset_dir)) as con:
+        return con.execute(QUERIES[name].sql, bound).df()
+
+
+def list_queries() -> list[dict]:
+    """Name, description and parameters (with defaults) of every query."""
+    return [{"name": name, "description": q.description, "params": dict(q.params)} for name, q in QUERIES.items()]
+
+
+def analytics_records(df: pd.DataFrame) -> list[dict]:
+    """Result rows as JSON-ready dicts (numpy scalars as Python numbers, NaN as None)."""
+    return [
+        {k: (None if v is None or (isinstance(v, float) and np.isnan(v)) else
+             v.item() if isinstance(v, np.generic) else v)
+         for k, v in row.items()}
+        for row in df.to_dict(orient="records")
+    ]
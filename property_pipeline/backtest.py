@@ -1,15 +1,22 @@
 """Backtesting framework: compare pipeline output against XLSX ground truth."""
 
+import time
+from collections import deque
 from pathlib import Path
 
 import pandas as pd
 import numpy as np
 
 from .config import BANK_DOWNLOAD_DIR, CHECKED_DIR
+from .checked_cache import read_checked_xlsx
+from .report_summary import parse_checked_dates
 from .importers import load_month_files
 from .engine import run_engine
 from .rules_seed import get_all_rules, PROPERTIES_SEED
 from .export import build_output_dataframe
+from .backtest_store import run_averages, save_run
+from .fingerprints import fingerprint
+from . import __version__
 
 
 CRITICAL_CATEGORIES = {"Mortgage", "OurRent", "BealsRent", "PropertyExpense", "ServiceCharge"}
@@ -23,9 +30,15 @@ def load_ground_truth(month_str: str, checked_dir: Path | None = None) -> pd.Dat
     csv_path = cd / f"{month_str}_codedAndCategorised.csv"
 
     if xlsx_path.exists():
-        df = pd.read_excel(xlsx_path, engine="openpyxl", index_col=0, parse_dates=True)
+        df = read_checked_xlsx(xlsx_path)
+        if not isinstance(df.index, pd.DatetimeIndex):
+            try:
+                df.index = pd.to_datetime(df.index)
+            except (ValueError, TypeError):
+                pass  # leave unparseable dates as read, like read_excel(parse_dates=True)
     elif csv_path.exists():
-        df = pd.read_csv(csv_path, index_col=0, parse_dates=True, dayfirst=True)
+        df = pd.read_csv(csv_path, index_col=0)
+        df.index = parse_checked_dates(df.index)
     else:
         return None
 
@@ -43,13 +56,22 @@ def run_backtest_month(
 ) -> dict | None:
     """Run the pipeline on a month and compare against ground truth.
 
-    Returns a metrics dict or None if ground truth is missing.
+    Returns a metrics dict (with "timings": seconds per stage) or None if ground truth is missing.
     """
     bd_dir = bank_download_dir or BANK_DOWNLOAD_DIR
+    timings = {}
+    t0 = time.perf_counter()
+
+    def lap(stage: str) -> None:
+        nonlocal t0
+        now = time.perf_counter()
+        timings[stage] = round(now - t0, 4)
+        t0 = now
 
     truth = load_ground_truth(month_str, checked_dir)
     if truth is None:
         return None
+    lap("truth")
 
     try:
         _, canonical_rows = load_month_files(bd_dir, month_str)
@@ -59,14 +81,20 @@ def run_backtest_month(
 
     if not canonical_rows:
         return None
+    lap("import")
 
     rules = get_all_rules()
     properties_set = {p["property_code"] for p in PROPERTIES_SEED}
     labels = run_engine(canonical_rows, rules, properties_set)
+    lap("engine")
 
     predicted = build_output_dataframe(canonical_rows, labels)
+    lap("export")
 
-    return compare(predicted, truth, month_str)
+    metrics = compare(predicted, truth, month_str)
+    lap("compare")
+    metrics["timings"] = timings
+    return metrics
 
 
 def compare(predicted: pd.DataFrame, truth: pd.DataFrame, month_str: str = "") -> dict:
@@ -99,79 +127,45 @@ def compare(predicted: pd.DataFrame, truth: pd.DataFrame, month_str: str = "") -
     truth["_key"] = truth["_date_str"] + "|" + truth["Account"] + "|" + truth["Amount"].round(2).astype(str) + "|" + truth["Memo"]
     predicted["_key"] = predicted["_date_str"] + "|" + predicted["Account"] + "|" + predicted["Amount"].round(2).astype(str) + "|" + predicted["Memo"]
 
-    # Match rows
-    truth_keys = truth["_key"].tolist()
-    pred_keys = predicted["_key"].tolist()
+    # Match rows: each truth row takes the first unused predicted row with the same key
+    pred_by_key: dict[str, deque[int]] = {}
+    for p_idx, p_key in enumerate(predicted["_key"]):
+        pred_by_key.setdefault(p_key, deque()).append(p_idx)
 
     matched_truth = []
     matched_pred = []
-    used_pred = set()
-
-    for t_idx, t_key in enumerate(truth_keys):
-        for p_idx, p_key in enumerate(pred_keys):
-            if p_idx not in used_pred and t_key == p_key:
-                matched_truth.append(t_idx)
-                matched_pred.append(p_idx)
-                used_pred.add(p_idx)
-                break
+    for t_idx, t_key in enumerate(truth["_key"]):
+        queue = pred_by_key.get(t_key)
+        if queue:
+            matched_truth.append(t_idx)
+            matched_pred.append(queue.popleft())
 
     n_truth = len(truth)
     n_matched = len(matched_truth)
     row_match_rate = n_matched / n_truth if n_truth > 0 else 0
 
-    # Per-column accuracy
-    cat_correct = 0
-    cat_critical_correct = 0
-    cat_critical_total = 0
-    prop_correct = 0
-    prop_total = 0
-    subcat_correct = 0
-    full_correct = 0
-    mismatched_amount = 0.0
-
-    cat_confusion = {}
-
-    for i in range(n_matched):
-        t_row = truth.iloc[matched_truth[i]]
-        p_row = predicted.iloc[matched_pred[i]]
-
-        t_cat = t_row["Cat"]
-        p_cat = p_row["Cat"]
-        t_prop = t_row["Property"]
-        p_prop = p_row["Property"]
-        t_sub = t_row["Subcat"]
-        p_sub = p_row["Subcat"]
-
-        # Category
-        cat_match = (t_cat == p_cat)
-        if cat_match:
-            cat_correct += 1
-        else:
-            mismatched_amount += abs(t_row["Amount"])
-
-        # Confusion matrix
-        key = (t_cat, p_cat)
-        cat_confusion[key] = cat_confusion.get(key, 0) + 1
-
-        # Critical categories
-        if t_cat in CRITICAL_CATEGORIES:
-            cat_critical_total += 1
-            if cat_match:
-                cat_critical_correct += 1
-
-        # Property
-        if t_cat in PROPERTY_REQUIRED_CATEGORIES:
-            prop_total += 1
-            if t_prop == p_prop:
-                prop_correct += 1
-
-        # Subcategory
-        if t_sub == p_sub:
-            subcat_correct += 1
-
-        # Full label
-        if cat_match and t_prop == p_prop and t_sub == p_sub:
-            full_correct += 1
+    # Per-column accuracy over the aligned matched rows
+    t = truth.iloc[matched_truth]
+    p = predicted.iloc[matched_pred]
+    t_cat, p_cat = t["Cat"].to_numpy(), p["Cat"].to_numpy()
+    cat_match = t_cat == p_cat
+    prop_match = t["Property"].to_numpy() == p["Property"].to_numpy()
+    subcat_match = t["Subcat"].to_numpy() == p["Subcat"].to_numpy()
+    critical = t["Cat"].isin(CRITICAL_CATEGORIES).to_numpy()
+    prop_required = t["Cat"].isin(PROPERTY_REQUIRED_CATEGORIES).to_numpy()
+
+    cat_correct = int(cat_match.sum())
+    cat_critical_total = int(critical.sum())
+    cat_critical_correct = int((cat_match & critical).sum())
+    prop_total = int(prop_required.sum())
+    prop_correct = int((prop_match & prop_required).sum())
+    subcat_correct = int(subcat_match.sum())
+    full_correct = int((cat_match & prop_match & subcat_match).sum())
+    mismatched_amount = float(np.abs(t["Amount"].to_numpy()[~cat_match]).sum())
+
+    # Confusion matrix: (truth Cat, predicted Cat) -> count, in order of first occurrence
+    pairs = pd.DataFrame({"t": t_cat, "p": p_cat})
+    cat_confusion = {k: int(v) for k, v in pairs.groupby(["t", "p"], sort=False).size().items()}
 
     metrics = {
         "month": month_str,
@@ -195,13 +189,18 @@ def run_backtest_all(
     bank_download_dir: Path | None = None,
     checked_dir: Path | None = None,
     months: list[str] | None = None,
+    save: bool = True,
+    db_path: Path | str | None = None,
 ) -> list[dict]:
     """Run backtest over all available months with ground truth.
 
-    If months is None, discovers months from checked/ folder.
+    If months is None, discovers months from checked/ folder. With save, the run is stored
+    in backtests.db (see backtest_store.py) and its id set as "run_id" on each result.
     """
     cd = checked_dir or CHECKED_DIR
     bd = bank_download_dir or BANK_DOWNLOAD_DIR
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+    t_start = time.perf_counter()
 
     if months is None:
         months = []
@@ -222,14 +221,21 @@ def run_backtest_all(
             print(f"  Skipped (no ground truth or bank files)")
 
     if results:
-        avg_cat = np.mean([r["category_accuracy"] for r in results])
-        avg_crit = np.mean([r["critical_category_accuracy"] for r in results if r["critical_category_accuracy"] > 0])
-        avg_prop = np.mean([r["property_accuracy"] for r in results if r["property_accuracy"] > 0])
-        avg_full = np.mean([r["full_label_accuracy"] for r in results])
+        avg = run_averages(results)
         print(f"\nOverall averages across {len(results)} months:")
-        print(f"  Category: {avg_cat:.1%}")
-        print(f"  Critical Category: {avg_crit:.1%}")
-        print(f"  Property: {avg_prop:.1%}")
-        print(f"  Full Label: {avg_full:.1%}")
+        print(f"  Category: {avg['category_accuracy']:.1%}")
+        print(f"  Critical Category: {avg['critical_category_accuracy'] or 0:.1%}")
+        print(f"  Property: {avg['property_accuracy'] or 0:.1%}")
+        print(f"  Full Label: {avg['full_label_accuracy']:.1%}")
+
+        if save:
+            # Rules-only: backtest does not apply the ML model, so no model version is recorded
+            run_id = save_run(
+                results, started_at, time.perf_counter() - t_start,
+                rules_fp=fingerprint(get_all_rules()), pipeline_version=__version__, db_path=db_path,
+            )
+            for r in results:
+                r["run_id"] = run_id
+            print(f"Saved as backtest run {run_id}")
 
     return results
@@ -0,0 +1,175 @@
+"""Backtest history: every run_backtest_all run saved to backtests.db, for diffs and trends.
+
+A run records when it ran, the rule-set fingerprint, the model version (NULL for rules-only
+runs), the average metrics printed at the end of the run and the seconds spent per stage
+(truth, import, engine, export, compare, summed over months) plus wall time. Per month it
+keeps the compare() metrics, stage seconds and the category confusion matrix.
+
+backtests.db is separate from labels.db, so backtest still never opens the label store.
+"""
+
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from .config import BACKTEST_DB_PATH
+
+# compare() metrics stored per month and averaged per run
+METRIC_COLUMNS = [
+    "row_match_rate", "category_accuracy", "critical_category_accuracy", "property_accuracy",
+    "subcategory_accuracy", "full_label_accuracy",
+]
+COUNT_COLUMNS = ["truth_rows", "predicted_rows", "matched_rows", "financial_impact_mismatched"]
+STAGES = ["truth", "import", "engine", "export", "compare"]
+
+_SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS backtest_runs (
+    run_id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at       TEXT NOT NULL,
+    rules_fp         TEXT NOT NULL,
+    model_version    TEXT,
+    pipeline_version TEXT,
+    n_months         INTEGER NOT NULL,
+    {", ".join(f"{c} REAL" for c in METRIC_COLUMNS)},
+    wall_seconds     REAL NOT NULL,
+    stage_seconds    TEXT NOT NULL      -- JSON: stage -> seconds summed over months
+);
+
+CREATE TABLE IF NOT EXISTS backtest_month_results (
+    run_id        INTEGER NOT NULL REFERENCES backtest_runs(run_id),
+    month         TEXT NOT NULL,
+    {", ".join(f"{c} REAL" for c in METRIC_COLUMNS)},
+    truth_rows INTEGER, predicted_rows INTEGER, matched_rows INTEGER, financial_impact_mismatched REAL,
+    stage_seconds TEXT NOT NULL,
+    PRIMARY KEY (run_id, month)
+);
+
+CREATE TABLE IF NOT EXISTS backtest_confusion (
+    run_id        INTEGER NOT NULL REFERENCES backtest_runs(run_id),
+    month         TEXT NOT NULL,
+    truth_cat     TEXT NOT NULL,
+    predicted_cat TEXT NOT NULL,
+    n             INTEGER NOT NULL,
+    PRIMARY KEY (run_id, month, truth_cat, predicted_cat)
+);
+"""
+
+
+def _connect(db_path: Path | str | None = None) -> sqlite3.Connection:
+    path = Path(db_path or BACKTEST_DB_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_SCHEMA_SQL)
+    return conn
+
+
+def run_averages(results: list[dict]) -> dict:
+    """Average of each metric over months (critical category and property over months that have any)."""
+    out = {}
+    for col in METRIC_COLUMNS:
+        values = [r[col] for r in results]
+        if col in ("critical_category_accuracy", "property_accuracy"):
+            values = [v for v in values if v > 0]
+        out[col] = round(sum(values) / len(values), 4) if values else None
+    return out
+
+
+def save_run(
+    results: list[dict],
+    started_at: str,
+    wall_seconds: float,
+    rules_fp: str,
+    model_version: str | None = None,
+    pipeline_version: str | None = None,
+    db_path: Path | str | None = None,
+) -> int:
+    """Store a run's per-month results (run_backtest_month dicts). Returns the run id."""
+    stage_totals = {s: round(sum(r.get("timings", {}).get(s, 0.0) for r in results), 3) for s in STAGES}
+    averages = run_averages(results)
+    with closing(_connect(db_path)) as conn, conn:
+        cur = conn.execute(
+            f"""INSERT INTO backtest_runs (started_at, rules_fp, model_version, pipeline_version, n_months,
+                   {", ".join(METRIC_COLUMNS)}, wall_seconds, stage_seconds)
+               VALUES (?, ?, ?, ?, ?, {", ".join("?" * len(METRIC_COLUMNS))}, ?, ?)""",
+            (started_at, rules_fp, model_version, pipeline_version, len(results),
+             *(averages[c] for c in METRIC_COLUMNS), round(wall_seconds, 3), json.dumps(stage_totals)),
+        )
+        run_id = cur.lastrowid
+        columns = METRIC_COLUMNS + COUNT_COLUMNS
+        conn.executemany(
+            f"""INSERT INTO backtest_month_results (run_id, month, {", ".join(columns)}, stage_seconds)
+               VALUES (?, ?, {", ".join("?" * len(columns))}, ?)""",
+            [(run_id, r["month"], *(r[c] for c in columns), json.dumps(r.get("timings", {}))) for r in results],
+        )
+        conn.executemany(
+            "INSERT INTO backtest_confusion (run_id, month, truth_cat, predicted_cat, n) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, r["month"], t, p, n) for r in results for (t, p), n in r["confusion_matrix"].items()],
+        )
+    return run_id
+
+
+def _run_dict(row: sqlite3.Row) -> dict:
+    run = dict(row)
+    run["stage_seconds"] = json.loads(run["stage_seconds"])
+    return run
+
+
+def list_runs(limit: int | None = None, db_path: Path | str | None = None) -> list[dict]:
+    """Runs, newest first (at most limit)."""
+    with closing(_connect(db_path)) as conn:
+        rows = conn.execute(
+            "SELECT * FROM backtest_runs ORDER BY run_id DESC LIMIT ?", (-1 if limit is None else limit,)
+        ).fetchall()
+    return [_run_dict(r) for r in rows]
+
+
+def latest_run_ids(n: int = 2, db_path: Path | str | None = None) -> list[int]:
+    """The newest n run ids, oldest first."""
+    return sorted(r["run_id"] for r in list_runs(n, db_path))
+
+
+def month_results(run_id: int, db_path: Path | str | None = None) -> pd.DataFrame:
+    """Per-month metrics of a run, indexed by month."""
+    with closing(_connect(db_path)) as conn:
+        if conn.execute("SELECT 1 FROM backtest_runs WHERE run_id = ?", (run_id,)).fetchone() is None:
+            raise KeyError(f"No backtest run {run_id}")
+        df = pd.read_sql_query(
+            f"SELECT month, {', '.join(METRIC_COLUMNS + COUNT_COLUMNS)} FROM backtest_month_results WHERE run_id = ?",
+            conn, params=(run_id,),
+        )
+    return df.set_index("month")
+
+
+def confusion(run_id: int, db_path: Path | str | None = None) -> pd.DataFrame:
+    """Confusion counts of a run summed over months: truth_cat, predicted_cat, n (most frequent first)."""
+    with closing(_connect(db_path)) as conn:
+        return pd.read_sql_query(
+            """SELECT truth_cat, predicted_cat, SUM(n) AS n FROM backtest_confusion WHERE run_id = ?
+               GROUP BY truth_cat, predicted_cat ORDER BY n DESC""",
+            conn, params=(run_id,),
+        )
+
+
+def diff_runs(run_a: int, run_b: int, db_path: Path | str | None = None) -> pd.DataFrame:
+    """Metric changes from run_a to run_b for months in both runs, worst category_accuracy change first.
+
+    Columns are <metric>_a, <metric>_b and <metric>_delta for each accuracy metric.
+    """
+    a = month_results(run_a, db_path)[METRIC_COLUMNS]
+    b = month_results(run_b, db_path)[METRIC_COLUMNS]
+    common = a.index.intersection(b.index)
+    a, b = a.loc[common], b.loc[common]
+    out = pd.concat(
+        {f"{c}_{suffix}": frame[c] for c in METRIC_COLUMNS for suffix, frame in (("a", a), ("b", b), ("delta", b - a))},
+        axis=1,
+    )
+    return out.sort_values("category_accuracy_delta", kind="stable")
+
+
+def trend(limit: int = 50, db_path: Path | str | None = None) -> list[dict]:
+    """Accuracy and timings of the newest runs, oldest first (for charts)."""
+    return list(reversed(list_runs(limit, db_path)))
@@ -0,0 +1,218 @@
+"""Content-addressed backup store for output files (replaces the file.xlsx.bak_YYYYmmdd-HHMMSS copies).
+
+Before an output is overwritten, its current content is hashed and stored once, gzip-compressed,
+as backups/objects/<aa>/<hash>.gz; backups/manifest.db records (path, backed_up_at, hash).
+A file whose content matches its latest backup is not stored again, so reruns that
+produce the same output cost one read. XLSX files are hashed over their zip members
+without docProps/core.xml (openpyxl stamps the save time there), so an identical
+workbook written again has the same hash.
+
+Retention: per path, the newest BACKUP_KEEP_VERSIONS backups are kept plus any younger than
+BACKUP_KEEP_DAYS; objects no manifest row refers to are deleted.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import time
+import zipfile
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .config import BACKUP_DIR, BASE_DIR
+
+BACKUP_KEEP_VERSIONS = int(os.environ.get("BACKUP_KEEP_VERSIONS", "20"))
+BACKUP_KEEP_DAYS = int(os.environ.get("BACKUP_KEEP_DAYS", "90"))
+
+# Zip members that change on every save without the content changing
+_VOLATILE_MEMBERS = {"docProps/core.xml"}
+_BAK_SUFFIX = re.compile(r"^(?P<name>.+)\.bak_(?P<ts>\d{8}-\d{6})$")
+
+_MANIFEST_SQL = """
+CREATE TABLE IF NOT EXISTS backups (
+    backup_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    path         TEXT NOT NULL,     -- relative to DATA_PATH when inside it
+    backed_up_at TEXT NOT NULL,
+    sha256       TEXT NOT NULL,
+    size         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_backups_path ON backups(path, backed_up_at);
+CREATE INDEX IF NOT EXISTS idx_backups_sha ON backups(sha256);
+"""
+
+
+def _connect(store_dir: Path) -> sqlite3.Connection:
+    store_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(store_dir / "manifest.db"), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(_MANIFEST_SQL)
+    return conn
+
+
+def _key(path: Path) -> str:
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(BASE_DIR.resolve()).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def _object_path(store_dir: Path, digest: str) -> Path:
+    return store_dir / "objects" / digest[:2] / f"{digest}.gz"
+
+
+def content_hash(path: Path) -> str:
+    """SHA-256 of the file; for XLSX, of its zip members (name and bytes) except the save-time stamp."""
+    h = hashlib.sha256()
+    if path.suffix.lower() == ".xlsx" and zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for name in sorted(zf.namelist()):
+                if name in _VOLATILE_MEMBERS:
+                    continue
+                h.update(name.encode() + b"\0")
+                h.update(zf.read(name))
+        return h.hexdigest()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _store_object(store_dir: Path, digest: str, source: Path) -> None:
+    target = _object_path(store_dir, digest)
+    if target.exists():
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with open(source, "rb") as src, gzip.open(tmp, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(tmp, target)
+
+
+def _prune(conn: sqlite3.Connection, store_dir: Path, paths: list[str], keep_versions: int, keep_days: int) -> int:
+    """Drop manifest rows outside the retention policy for paths, then unreferenced objects. Returns rows dropped."""
+    cutoff = (datetime.now() - timedelta(days=keep_days)).strftime("%Y-%m-%dT%H:%M:%S")
+    dropped: list[tuple[int, str]] = []
+    for key in paths:
+        rows = conn.execute(
+            "SELECT backup_id, backed_up_at, sha256 FROM backups WHERE path = ? ORDER BY backed_up_at DESC, backup_id DESC",
+            (key,),
+        ).fetchall()
+        dropped += [(r["backup_id"], r["sha256"]) for r in rows[keep_versions:] if r["backed_up_at"] < cutoff]
+    if not dropped:
+        return 0
+    conn.executemany("DELETE FROM backups WHERE backup_id = ?", [(i,) for i, _ in dropped])
+    for digest in {d for _, d in dropped}:
+        if conn.execute("SELECT 1 FROM backups WHERE sha256 = ? LIMIT 1", (digest,)).fetchone() is None:
+            _object_path(store_dir, digest).unlink(missing_ok=True)
+    return len(dropped)
+
+
+def backup_file(path: Path, store_dir: Path | None = None, backed_up_at: str | None = None) -> str | None:
+    """Back up path's current content before it is overwritten. Returns its hash, or None if there is no file.
+
+    Nothing is stored when the content matches the path's latest backup; the retention
+    policy is applied to the path afterwards.
+    """
+    path = Path(path)
+    if not path.is_file():
+        return None
+    store_dir = Path(store_dir) if store_dir else BACKUP_DIR
+    digest = content_hash(path)
+    key = _key(path)
+    with closing(_connect(store_dir)) as conn, conn:
+        latest = conn.execute(
+            "SELECT sha256 FROM backups WHERE path = ? ORDER BY backed_up_at DESC, backup_id DESC LIMIT 1", (key,)
+        ).fetchone()
+        if latest is not None and latest["sha256"] == digest:
+            return digest
+        _store_object(store_dir, digest, path)
+        conn.execute(
+            "INSERT INTO backups (path, backed_up_at, sha256, size) VALUES (?, ?, ?, ?)",
+            (key, backed_up_at or time.strftime("%Y-%m-%dT%H:%M:%S"), digest, path.stat().st_size),
+        )
+        _prune(conn, store_dir, [key], BACKUP_KEEP_VERSIONS, BACKUP_KEEP_DAYS)
+    return digest
+
+
+def list_backups(path: Path | None = None, store_dir: Path | None = None) -> list[dict]:
+    """Backups (path, backed_up_at, sha256, size), newest first; all paths when path is None."""
+    store_dir = Path(store_dir) if store_dir else BACKUP_DIR
+    with closing(_connect(store_dir)) as conn:
+        if path is None:
+            cur = conn.execute("SELECT path, backed_up_at, sha256, size FROM backups ORDER BY path, backed_up_at DESC")
+        else:
+            cur = conn.execute(
+                "SELECT path, backed_up_at, sha256, size FROM backups WHERE path = ? ORDER BY backed_up_at DESC",
+                (_key(Path(path)),),
+            )
+        return [dict(row) for row in cur]
+
+
+def restore_backup(
+    path: Path,
+    sha256: str | None = None,
+    dest: Path | None = None,
+    store_dir: Path | None = None,
+) -> Path:
+    """Write a backup of path (default: the latest; sha256 may be a prefix) to dest (default: path itself).
+
+    Restoring over path backs up its current content first.
+    """
+    store_dir = Path(store_dir) if store_dir else BACKUP_DIR
+    versions = [b for b in list_backups(path, store_dir) if sha256 is None or b["sha256"].startswith(sha256)]
+    if not versions:
+        raise FileNotFoundError(f"No backup of {path}" + (f" matching {sha256}" if sha256 else ""))
+    dest = Path(dest) if dest else Path(path)
+    if dest.resolve() == Path(path).resolve():
+        backup_file(dest, store_dir)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(_object_path(store_dir, versions[0]["sha256"]), "rb") as src, open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    return dest
+
+
+def prune_backups(
+    keep_versions: int = BACKUP_KEEP_VERSIONS,
+    keep_days: int = BACKUP_KEEP_DAYS,
+    store_dir: Path | None = None,
+) -> int:
+    """Apply the retention policy to every path in the store. Returns the number of backups dropped."""
+    store_dir = Path(store_dir) if store_dir else BACKUP_DIR
+    with closing(_connect(store_dir)) as conn, conn:
+        paths = [row[0] for row in conn.execute("SELECT DISTINCT path FROM backups")]
+        return _prune(conn, store_dir, paths, keep_versions, keep_days)
+
+
+def import_bak_files(root: Path, store_dir: Path | None = None, delete: bool = False) -> dict:
+    """Move old file.bak_YYYYmmdd-HHMMSS copies under root into the store (oldest first, dated by their suffix).
+
+    With delete, each .bak_ file is removed once stored. Returns counts.
+    """
+    store_dir = Path(store_dir) if store_dir else BACKUP_DIR
+    found = []
+    for bak in Path(root).rglob("*.bak_*"):
+        m = _BAK_SUFFIX.match(bak.name)
+        if m and bak.is_file():
+            ts = datetime.strptime(m["ts"], "%Y%m%d-%H%M%S").strftime("%Y-%m-%dT%H:%M:%S")
+            found.append((ts, bak, bak.with_name(m["name"])))
+    stored = bytes_freed = 0
+    for ts, bak, original in sorted(found):
+        digest = content_hash(bak)
+        with closing(_connect(store_dir)) as conn, conn:
+            if conn.execute("SELECT 1 FROM backups WHERE path = ? AND sha256 = ? LIMIT 1",
+                            (_key(original), digest)).fetchone() is None:
+                _store_object(store_dir, digest, bak)
+                conn.execute(
+                    "INSERT INTO backups (path, backed_up_at, sha256, size) VALUES (?, ?, ?, ?)",
+                    (_key(original), ts, digest, bak.stat().st_size),
+                )
+                stored += 1
+        if delete:
+            bytes_freed += bak.stat().st_size
+            bak.unlink()
+    return {"found": len(found), "stored": stored, "deleted": len(found) if delete else 0, "bytes_freed": bytes_freed}
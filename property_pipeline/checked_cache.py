@@ -0,0 +1,149 @@
+"""Columnar sidecar cache for checked/ spreadsheets.
+
+openpyxl is by far the slowest step when reading checked/MMMYYYY_codedAndCategorised.xlsx.
+The first read of each workbook also writes checked/.cache/<name>.feather (uncompressed
+Arrow IPC, so later reads memory-map it). The cache records the source's size, mtime and
+SHA-1: a changed mtime with identical content is re-stamped, changed content is re-read.
+Columns mixing text and numbers are split into a string and a float column, so the cache
+is plain Arrow that any reader can load.
+Without pyarrow, or with CHECKED_CACHE=0, files are read directly.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from .config import CHECKED_DIR
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # optional: fall back to reading the workbook every time
+    pa = None
+    feather = None
+
+CHECKED_CACHE_ENABLED = os.environ.get("CHECKED_CACHE", "1") != "0"
+
+CACHE_DIRNAME = ".cache"
+_META_KEY = b"property_pipeline.checked_cache"
+# Bump when the cached layout changes: caches from another version are rebuilt
+CACHE_VERSION = 2
+
+
+def _read_source(path: Path) -> pd.DataFrame:
+    return pd.read_excel(path, index_col=0, engine="openpyxl")
+
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path_for(path: Path) -> Path:
+    return path.parent / CACHE_DIRNAME / f"{path.name}.feather"
+
+
+def _number_column(col: str) -> str:
+    return f"__{col}_number"
+
+
+def _to_table(df: pd.DataFrame, meta: dict):
+    """Arrow table for df. Object columns Arrow can't type (text mixed with numbers) become a
+    string column plus a float column holding the numeric cells; meta["split"] lists them."""
+    df = df.copy()
+    split = []
+    for col in list(df.columns):
+        if df[col].dtype == object:
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                is_number = df[col].map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool))
+                df[_number_column(col)] = df[col].where(is_number).astype("float64")
+                df[col] = df[col].where(~is_number & df[col].notna()).map(str, na_action="ignore").astype("string")
+                split.append(col)
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    meta = dict(meta, version=CACHE_VERSION, split=split)
+    return table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: json.dumps(meta).encode()})
+
+
+def _from_table(table) -> pd.DataFrame:
+    meta = _table_meta(table)
+    df = table.to_pandas()
+    for col in meta.get("split", []):
+        # Back to one object column with NaN for blanks, as read_excel gives it
+        numbers = df.pop(_number_column(col)).astype(object)
+        df[col] = df[col].astype(object).where(df[col].notna(), numbers)
+    return df
+
+
+def _table_meta(table_or_schema) -> dict:
+    schema = getattr(table_or_schema, "schema", table_or_schema)
+    raw = (schema.metadata or {}).get(_META_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def _write_cache(cache_path: Path, table) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, cache_path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def read_checked_xlsx(path: Path) -> pd.DataFrame:
+    """pd.read_excel(path, index_col=0) for a checked workbook, served from the sidecar cache when valid."""
+    path = Path(path)
+    if pa is None or not CHECKED_CACHE_ENABLED:
+        return _read_source(path)
+
+    st = path.stat()
+    cache_path = cache_path_for(path)
+    sha1 = None
+    if cache_path.exists():
+        try:
+            table = feather.read_table(cache_path, memory_map=True)
+            meta = _table_meta(table)
+            current = meta.get("version") == CACHE_VERSION
+            if current and meta.get("size") == st.st_size and meta.get("mtime_ns") == st.st_mtime_ns:
+                return _from_table(table)
+            sha1 = _sha1(path)
+            if current and meta.get("sha1") == sha1:
+                # Same bytes, new mtime (copied or touched): re-stamp so the next read skips hashing
+                meta.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+                table = table.replace_schema_metadata({**table.schema.metadata, _META_KEY: json.dumps(meta).encode()})
+                _write_cache(cache_path, table)
+                return _from_table(table)
+        except (OSError, pa.ArrowException, ValueError):
+            pass  # unreadable or stale cache: rebuild below
+
+    df = _read_source(path)
+    meta = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1 or _sha1(path)}
+    try:
+        _write_cache(cache_path, _to_table(df, meta))
+    except (OSError, pa.ArrowException) as e:
+        print(f"  Could not cache {path.name}: {e}")
+    return df
+
+
+def prewarm(months: list[str] | None = None, checked_dir: Path | None = None) -> int:
+    """Build or refresh the cache for checked workbooks (default: all). Returns the number of files read."""
+    if pa is None:
+        raise RuntimeError("pyarrow is required for the checked/ cache (pip install pyarrow)")
+    checked_dir = checked_dir or CHECKED_DIR
+    if months:
+        paths = [checked_dir / f"{m}_codedAndCategorised.xlsx" for m in months]
+        paths = [p for p in paths if p.exists()]
+    else:
+        paths = sorted(checked_dir.glob("*_codedAndCategorised.xlsx"))
+    for p in paths:
+        print(f"  {p.name}")
+        read_checked_xlsx(p)
+    return len(paths)
@@ -9,8 +9,18 @@ BANK_DOWNLOAD_DIR = BASE_DIR / "bank-download"
 GENERATED_DIR = BASE_DIR / "generated"
 CHECKED_DIR = BASE_DIR / "checked"
 REVIEW_DIR = BASE_DIR / "review"
+BEALS_DIR = BASE_DIR / "beals"
+# Partitioned Parquet copy of every checked month, dataset/year=YYYY/month=MM/ (see dataset.py)
+DATASET_DIR = Path(os.environ.get("DATASET_DIR", str(BASE_DIR / "dataset")))
+# Content-addressed store for previous versions of output files (see backups.py)
+BACKUP_DIR = Path(os.environ.get("BACKUP_DIR", str(BASE_DIR / "backups")))
+
+# Tenancy export (Sheet 1, no header) read by load_tenancies
+TENANCIES_FILE = BANK_DOWNLOAD_DIR / "all_tenancies.xls"
 
 DB_PATH = Path(os.environ.get("DB_PATH", str(BASE_DIR / "labels.db")))
+# Saved backtest runs (see backtest_store.py); kept apart from the label store
+BACKTEST_DB_PATH = Path(os.environ.get("BACKTEST_DB_PATH", str(BASE_DIR / "backtests.db")))
 MODEL_PATH = Path(os.environ.get("MODEL_PATH", str(BASE_DIR / "ml_model.joblib")))
 
 RSA_CAPITAL_DATE = "2022-08-01"
@@ -0,0 +1,137 @@
+"""Partitioned Parquet dataset of the checked history (dataset/year=YYYY/month=MM/part-0.parquet).
+
+Each checked/MMMYYYY_codedAndCategorised file becomes one typed partition (export.write_parquet);
+the partition keys are the file's month, so a range read returns the same rows as
+report_summary.load_data. Partitions carry the fingerprint of the checked file they were
+built from (fingerprints.py) and sync_dataset rebuilds only the ones whose file changed.
+Reads go through pyarrow.dataset, so the month range prunes partitions and category /
+property filters are pushed down to the Parquet row groups.
+"""
+
+import re
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from .config import CHECKED_DIR, DATASET_DIR
+from .export import EXPORT_VERSION, pq, write_parquet
+from .fingerprints import fingerprint, is_current, record
+from .report_summary import OUTPUT_COLUMNS, checked_path, iter_checked_months, months_in_range
+
+try:
+    import pyarrow.compute as pc
+    import pyarrow.dataset as pads
+except ImportError:  # optional, as for write_parquet
+    pc = None
+    pads = None
+
+PART_NAME = "part-0.parquet"
+_MONTH_FILE = re.compile(r"^([A-Z]{3}\d{4})_codedAndCategorised\.(xlsx|csv)$")
+
+
+def _require_pyarrow() -> None:
+    if pq is None or pads is None:
+        raise RuntimeError("pyarrow is required for the Parquet dataset (pip install pyarrow)")
+
+
+def _month_key(month_str: str) -> tuple[int, int]:
+    d = pd.to_datetime("01" + month_str, format="%d%b%Y")
+    return d.year, d.month
+
+
+def partition_path(month_str: str, dataset_dir: Path | None = None) -> Path:
+    year, month = _month_key(month_str)
+    return (dataset_dir or DATASET_DIR) / f"year={year}" / f"month={month}" / PART_NAME
+
+
+def dataset_fingerprint(dataset_dir: Path | None = None) -> str:
+    """Cheap signature of the partitions (path, size, mtime), for caches of results read from the dataset."""
+    dataset_dir = dataset_dir or DATASET_DIR
+    entries = []
+    for part in sorted(dataset_dir.glob(f"year=*/month=*/{PART_NAME}")):
+        st = part.stat()
+        entries.append((part.relative_to(dataset_dir).as_posix(), st.st_size, st.st_mtime_ns))
+    return fingerprint(entries)
+
+
+def _source_fingerprint(path: Path) -> str:
+    st = path.stat()
+    return fingerprint(EXPORT_VERSION, path.name, st.st_size, st.st_mtime_ns)
+
+
+def checked_months(checked_dir: Path | None = None) -> list[str]:
+    """Months with a checked file, oldest first."""
+    names = {m.group(1) for p in (checked_dir or CHECKED_DIR).iterdir() if (m := _MONTH_FILE.match(p.name))}
+    return sorted(names, key=_month_key)
+
+
+def sync_dataset(
+    months: list[str] | None = None,
+    checked_dir: Path | None = None,
+    dataset_dir: Path | None = None,
+    rebuild: bool = False,
+) -> list[str]:
+    """Bring partitions for months (default: every checked month) up to date. Returns the months written.
+
+    A partition whose checked file is gone is removed.
+    """
+    _require_pyarrow()
+    checked_dir = checked_dir or CHECKED_DIR
+    dataset_dir = dataset_dir or DATASET_DIR
+    months = months if months is not None else checked_months(checked_dir)
+
+    stale: dict[str, str] = {}
+    for month in months:
+        source = checked_path(month, checked_dir)
+        part = partition_path(month, dataset_dir)
+        if source is None:
+            if part.parent.exists():
+                shutil.rmtree(part.parent)
+            continue
+        fp = _source_fingerprint(source)
+        if rebuild or not is_current(part, fp):
+            stale[month] = fp
+
+    written = []
+    for month, df in iter_checked_months(list(stale), checked_dir):
+        part = partition_path(month, dataset_dir)
+        write_parquet(df, part)
+        record([(part, stale[month])])
+        written.append(month)
+    return written
+
+
+def read_dataset(
+    start: str,
+    end: str,
+    columns: list[str] | None = None,
+    categories: list[str] | None = None,
+    properties: list[str] | None = None,
+    dataset_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Rows of the checked months covering start..end (YYYY-MM-DD), with a DatetimeIndex like load_data.
+
+    columns defaults to OUTPUT_COLUMNS; categories / properties keep only those Cat / Property values.
+    """
+    _require_pyarrow()
+    columns = columns or OUTPUT_COLUMNS
+    dataset_dir = dataset_dir or DATASET_DIR
+    if not dataset_dir.exists():
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name="Date"))
+    months = months_in_range(start, end)
+    (y0, m0), (y1, m1) = _month_key(months[0]), _month_key(months[-1])
+    ym = pc.field("year") * 100 + pc.field("month")
+    expr = (ym >= y0 * 100 + m0) & (ym <= y1 * 100 + m1)
+    if categories:
+        expr &= pc.field("Cat").isin(categories)
+    if properties:
+        expr &= pc.field("Property").isin(properties)
+
+    ds = pads.dataset(dataset_dir, format="parquet", partitioning="hive")
+    table = ds.to_table(columns=["Date", "year", "month", *columns], filter=expr)
+    # Fragments come back in path order (month=10 before month=2); rows keep their order within one
+    df = table.to_pandas()
+    df = df.iloc[(df.pop("year") * 100 + df.pop("month")).argsort(kind="stable")]
+    df.index = pd.DatetimeIndex(df.pop("Date"), name="Date")
+    return df[columns]
@@ -102,6 +102,8 @@ CREATE TABLE IF NOT EXISTS tenancies (
     start_date    TEXT NOT NULL,
     end_date      TEXT,
     monthly_rent  REAL,
+    rent_freq     TEXT,
+    agent_name    TEXT,
     FOREIGN KEY (property_code) REFERENCES properties(property_code)
 );
 
@@ -121,17 +123,206 @@ CREATE TABLE IF NOT EXISTS custom_list_entries (
     PRIMARY KEY (list_type, value)
 );
 
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    params_json TEXT NOT NULL DEFAULT '{}',
+    status      TEXT NOT NULL DEFAULT 'queued',
+    progress    REAL NOT NULL DEFAULT 0,
+    message     TEXT,
+    result_json TEXT,
+    error       TEXT,
+    created_at  TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S','now')),
+    started_at  TEXT,
+    finished_at TEXT
+);
+
+-- Per-month report totals (see aggregates.py). month is the checked file / import batch,
+-- period the calendar month of the transactions in it (YYYY-MM).
+CREATE TABLE IF NOT EXISTS monthly_aggregates (
+    month         TEXT NOT NULL,
+    period        TEXT NOT NULL,
+    account       TEXT NOT NULL DEFAULT '',
+    property_code TEXT NOT NULL DEFAULT '',
+    category      TEXT NOT NULL DEFAULT '',
+    subcategory   TEXT NOT NULL DEFAULT '',
+    total         REAL NOT NULL DEFAULT 0,
+    n             INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, period, account, property_code, category, subcategory)
+);
+
+-- Where each month's aggregates came from: 'finalize' (DB labels, kept current by
+-- corrections) or 'checked_file' (read from checked/; file_size/file_mtime_ns detect edits).
+CREATE TABLE IF NOT EXISTS monthly_aggregate_sources (
+    month         TEXT PRIMARY KEY,
+    source        TEXT NOT NULL,
+    file_size     INTEGER,
+    file_mtime_ns INTEGER,
+    updated_at    TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S','now'))
+);
+
+-- Expected rent/mortgage payments run_month could not match (see expected_payments.py)
+CREATE TABLE IF NOT EXISTS payment_exceptions (
+    month           TEXT NOT NULL,
+    property_code   TEXT NOT NULL,
+    kind            TEXT NOT NULL,     -- 'rent' | 'mortgage'
+    due_date        TEXT NOT NULL,
+    expected_amount REAL NOT NULL,
+    actual_amount   REAL NOT NULL DEFAULT 0,
+    tx_ids          TEXT NOT NULL DEFAULT '',
+    issue           TEXT NOT NULL,     -- 'missing' | 'underpaid' | 'amount_changed'
+    note            TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_payment_exceptions_month ON payment_exceptions(month);
+
+-- Both sides of a transfer between our accounts, paired by run_month (see transfers.py)
+CREATE TABLE IF NOT EXISTS transfer_pairs (
+    out_tx_id  TEXT PRIMARY KEY,
+    in_tx_id   TEXT NOT NULL UNIQUE,
+    amount     REAL NOT NULL,
+    days_apart INTEGER NOT NULL,
+    matched_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S','now')),
+    FOREIGN KEY (out_tx_id) REFERENCES transactions_canonical(tx_id),
+    FOREIGN KEY (in_tx_id) REFERENCES transactions_canonical(tx_id)
+);
+
+-- Beals agent statement lines (beals/Beals_MMMYYYY.csv) and the bank receipts their payouts matched (see reconcile.py)
+CREATE TABLE IF NOT EXISTS beals_statement_lines (
+    line_id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    statement_month TEXT NOT NULL,
+    property_code   TEXT,
+    activity_id     TEXT,
+    created_at      TEXT NOT NULL,
+    description     TEXT,
+    document_type   TEXT,
+    document_number TEXT,
+    debit           REAL NOT NULL DEFAULT 0,
+    credit          REAL NOT NULL DEFAULT 0,
+    line_type       TEXT        -- RT rent, MF fee, PM payout to us, EX other
+);
+CREATE INDEX IF NOT EXISTS idx_beals_lines_month ON beals_statement_lines(statement_month);
+CREATE INDEX IF NOT EXISTS idx_beals_lines_payout ON beals_statement_lines(line_type, created_at);
+
+CREATE TABLE IF NOT EXISTS beals_matches (
+    line_id    INTEGER PRIMARY KEY,
+    tx_id      TEXT NOT NULL,
+    method     TEXT NOT NULL,     -- 'exact' | 'subset'
+    matched_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S','now')),
+    FOREIGN KEY (line_id) REFERENCES beals_statement_lines(line_id),
+    FOREIGN KEY (tx_id) REFERENCES transactions_canonical(tx_id)
+);
+CREATE INDEX IF NOT EXISTS idx_beals_matches_tx ON beals_matches(tx_id);
+
+-- Single-row counter bumped by triggers whenever data the API serves changes.
+-- epoch distinguishes a recreated database whose revision restarted at 0.
+CREATE TABLE IF NOT EXISTS data_revision (
+    id       INTEGER PRIMARY KEY CHECK (id = 1),
+    revision INTEGER NOT NULL DEFAULT 0,
+    epoch    TEXT NOT NULL
+);
+INSERT OR IGNORE INTO data_revision (id, revision, epoch) VALUES (1, 0, lower(hex(randomblob(8))));
+
 CREATE INDEX IF NOT EXISTS idx_canonical_batch ON transactions_canonical(import_batch_id);
 CREATE INDEX IF NOT EXISTS idx_canonical_date ON transactions_canonical(posted_date);
 CREATE INDEX IF NOT EXISTS idx_labels_txid ON transactions_labels(tx_id);
 CREATE INDEX IF NOT EXISTS idx_rules_phase ON rules(phase, order_index);
+CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at);
+CREATE INDEX IF NOT EXISTS idx_tenancies_property ON tenancies(property_code, start_date);
+
+-- Latest label version per tx_id. Correlated form so filters on tx_id use the primary key.
+CREATE VIEW IF NOT EXISTS transactions_labels_latest AS
+SELECT l.* FROM transactions_labels l
+WHERE l.label_version = (
+    SELECT MAX(l2.label_version) FROM transactions_labels l2 WHERE l2.tx_id = l.tx_id
+);
+
+-- Full-text index over the searchable canonical columns. rowid mirrors
+-- transactions_canonical.rowid so the triggers can keep it in sync cheaply.
+CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+    tx_id UNINDEXED,
+    memo,
+    counterparty,
+    reference,
+    match_text,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions_canonical BEGIN
+    INSERT INTO transactions_fts (rowid, tx_id, memo, counterparty, reference, match_text)
+    VALUES (new.rowid, new.tx_id, new.memo, new.counterparty, new.reference, new.match_text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions_canonical BEGIN
+    DELETE FROM transactions_fts WHERE rowid = old.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS transactions_fts_au
+AFTER UPDATE OF tx_id, memo, counterparty, reference, match_text ON transactions_canonical BEGIN
+    DELETE FROM transactions_fts WHERE rowid = old.rowid;
+    INSERT INTO transactions_fts (rowid, tx_id, memo, counterparty, reference, match_text)
+    VALUES (new.rowid, new.tx_id, new.memo, new.counterparty, new.reference, new.match_text);
+END;
+"""
+
+# A new latest label on a finalized month moves its transaction from the previous
+# label's aggregate bucket to the new one (a first label only adds). Dropped and
+# recreated so databases keep up with changes to its body.
+SCHEMA_SQL += """
+DROP TRIGGER IF EXISTS monthly_aggregates_label_ai;
+CREATE TRIGGER IF NOT EXISTS monthly_aggregates_label_ai AFTER INSERT ON transactions_labels
+WHEN NOT EXISTS (
+        SELECT 1 FROM transactions_labels WHERE tx_id = new.tx_id AND label_version > new.label_version)
+    AND EXISTS (
+        SELECT 1 FROM transactions_canonical c
+        JOIN monthly_aggregate_sources s ON s.month = c.import_batch_id AND s.source = 'finalize'
+        WHERE c.tx_id = new.tx_id AND c.is_superseded = 0)
+BEGIN
+    UPDATE monthly_aggregates
+    SET total = total - (SELECT amount FROM transactions_canonical WHERE tx_id = new.tx_id), n = n - 1
+    WHERE EXISTS (SELECT 1 FROM transactions_labels WHERE tx_id = new.tx_id AND label_version < new.label_version)
+      AND (month, period, account, property_code, category, subcategory) = (
+        SELECT c.import_batch_id, substr(c.posted_date, 1, 7), COALESCE(c.source_account, ''),
+               COALESCE(p.property_code, ''), COALESCE(p.category, ''), COALESCE(p.subcategory, '')
+        FROM transactions_canonical c
+        LEFT JOIN transactions_labels p ON p.tx_id = c.tx_id AND p.label_version = (
+            SELECT MAX(label_version) FROM transactions_labels
+            WHERE tx_id = new.tx_id AND label_version < new.label_version)
+        WHERE c.tx_id = new.tx_id);
+    INSERT INTO monthly_aggregates (month, period, account, property_code, category, subcategory, total, n)
+    SELECT c.import_batch_id, substr(c.posted_date, 1, 7), COALESCE(c.source_account, ''),
+           COALESCE(new.property_code, ''), COALESCE(new.category, ''), COALESCE(new.subcategory, ''),
+           c.amount, 1
+    FROM transactions_canonical c WHERE c.tx_id = new.tx_id
+    ON CONFLICT (month, period, account, property_code, category, subcategory)
+    DO UPDATE SET total = total + excluded.total, n = n + 1;
+    DELETE FROM monthly_aggregates
+    WHERE n <= 0 AND month = (SELECT import_batch_id FROM transactions_canonical WHERE tx_id = new.tx_id);
+END;
 """
 
+# Tables whose writes change API responses (see get_data_revision)
+REVISION_TABLES = ("transactions_canonical", "transactions_labels", "custom_list_entries", "properties", "tenancies")
+
+SCHEMA_SQL += "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS {table}_rev_{op.lower()} AFTER {op} ON {table} BEGIN
+    UPDATE data_revision SET revision = revision + 1 WHERE id = 1;
+END;
+"""
+    for table in REVISION_TABLES
+    for op in ("INSERT", "UPDATE", "DELETE")
+)
 
-def get_connection(db_path: Path | str | None = None) -> sqlite3.Connection:
-    """Open a SQLite connection with WAL mode enabled."""
+
+def get_connection(db_path: Path | str | None = None, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a SQLite connection with WAL mode enabled.
+
+    Pass check_same_thread=False only when one caller hands the connection between
+    threads sequentially (e.g. a streamed response iterated on the threadpool).
+    """
     path = str(db_path or DB_PATH)
-    conn = sqlite3.connect(path)
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread)
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA foreign_keys=ON")
     conn.row_factory = sqlite3.Row
@@ -152,7 +343,58 @@ def get_db(db_path: Path | str | None = None):
         conn.close()
 
 
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    cur = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,))
+    return cur.fetchone() is not None
+
+
+# Columns added to existing tables after their first release: table -> {column: declaration}
+ADDED_COLUMNS = {
+    "tenancies": {"rent_freq": "TEXT", "agent_name": "TEXT"},
+}
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    """ALTER older databases whose tables predate ADDED_COLUMNS (CREATE IF NOT EXISTS leaves them as-is)."""
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, decl in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def rebuild_search_index(conn: sqlite3.Connection) -> int:
+    """Repopulate transactions_fts from transactions_canonical. Returns rows indexed."""
+    conn.execute("DELETE FROM transactions_fts")
+    cur = conn.execute(
+        """INSERT INTO transactions_fts (rowid, tx_id, memo, counterparty, reference, match_text)
+           SELECT rowid, tx_id, memo, counterparty, reference, match_text
+           FROM transactions_canonical"""
+    )
+    return cur.rowcount
+
+
+def get_data_revision(conn: sqlite3.Connection) -> str:
+    """Opaque token that changes whenever labels, transactions, lists or checked/ outputs change."""
+    row = conn.execute("SELECT revision, epoch FROM data_revision WHERE id = 1").fetchone()
+    return f"{row['epoch']}-{row['revision']}" if row else "0"
+
+
+def bump_data_revision(conn: sqlite3.Connection) -> None:
+    """Mark data as changed for writes the triggers can't see (e.g. files in checked/)."""
+    conn.execute("UPDATE data_revision SET revision = revision + 1 WHERE id = 1")
+
+
 def init_db(db_path: Path | str | None = None) -> None:
-    """Create all tables if they don't exist."""
+    """Create all tables if they don't exist.
+
+    On a database created before the search index existed, the index is
+    back-filled from transactions_canonical once.
+    """
     with get_db(db_path) as conn:
+        had_fts = _table_exists(conn, "transactions_fts")
+        if _table_exists(conn, "tenancies"):
+            _add_missing_columns(conn)
         conn.executescript(SCHEMA_SQL)
+        if not had_fts:
+            rebuild_search_index(conn)
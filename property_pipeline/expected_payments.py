@@ -0,0 +1,211 @@
+"""Expected rent and mortgage payments for a month, checked against the labelled transactions.
+
+The schedule has one rent line per let property (tenancies.monthly_rent, due on the
+tenancy's start day of month) and one line per mortgage payment seen for the property in
+the previous month (same day and amount). Lines are joined to the month's OurRent /
+BealsRent / Mortgage rows on property_code and filtered by date window and amount
+tolerance; what is left over becomes a payment exception on the review queue.
+"""
+
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .tenancy_index import TenancyIndex
+
+# Rent day drifts as tenants change and the schedule is monthly: any rent in the month counts
+RENT_WINDOW_DAYS = 31
+MORTGAGE_WINDOW_DAYS = 5
+# A payment matches when within max(AMOUNT_TOLERANCE_ABS, AMOUNT_TOLERANCE * expected) of the expected amount
+AMOUNT_TOLERANCE = 0.02
+AMOUNT_TOLERANCE_ABS = 1.0
+
+PAYMENT_KINDS = {"OurRent": "rent", "BealsRent": "rent", "Mortgage": "mortgage"}
+
+SCHEDULE_COLUMNS = ["property_code", "kind", "due_date", "expected_amount", "check_amount", "note"]
+EXCEPTION_COLUMNS = ["property_code", "kind", "due_date", "expected_amount", "actual_amount", "tx_ids", "issue", "note"]
+
+
+def _month_bounds(month_str: str) -> tuple[pd.Timestamp, pd.Timestamp]:
+    start = pd.to_datetime("01" + month_str, format="%d%b%Y")
+    return start, start + pd.offsets.MonthEnd(0)
+
+
+def _shift_day(month_start: pd.Timestamp, day: pd.Series) -> pd.Series:
+    """Same day of month in month_start's month, clipped to its last day."""
+    return month_start + pd.to_timedelta(np.minimum(day, month_start.days_in_month) - 1, unit="D")
+
+
+def _tolerance(expected: pd.Series) -> pd.Series:
+    return np.maximum(AMOUNT_TOLERANCE_ABS, AMOUNT_TOLERANCE * expected.abs())
+
+
+def _rent_schedule(index: TenancyIndex, month_start: pd.Timestamp, month_end: pd.Timestamp) -> pd.DataFrame:
+    rows = []
+    for code in index.property_codes:
+        t = index.active_in(code, month_start, month_end)
+        if t is not None and t.monthly_rent:
+            rows.append((code, t.start_date, float(t.monthly_rent), t.agent_name is None, t.tenant_name))
+    df = pd.DataFrame(rows, columns=["property_code", "start_date", "expected_amount", "check_amount", "note"])
+    df["due_date"] = _shift_day(month_start, pd.to_datetime(df["start_date"]).dt.day)
+    # Rent collected by an agent arrives net of fees, so only its presence is checked
+    return df.assign(kind="rent")[SCHEDULE_COLUMNS]
+
+
+def _previous_mortgages(conn: sqlite3.Connection, month_start: pd.Timestamp, checked_dir: Path | None) -> pd.DataFrame:
+    """Mortgage rows (property_code, date, amount, memo) of the month before month_start: DB first, else its checked file."""
+    prev_start = month_start - pd.DateOffset(months=1)
+    df = pd.read_sql_query(
+        """SELECT l.property_code, c.posted_date AS date, c.amount, c.memo
+           FROM transactions_canonical c
+           JOIN transactions_labels_latest l ON l.tx_id = c.tx_id
+           WHERE c.is_superseded = 0 AND l.category = 'Mortgage'
+             AND COALESCE(l.property_code, '') != ''
+             AND c.posted_date >= ? AND c.posted_date < ?""",
+        conn,
+        params=(prev_start.strftime("%Y-%m-%d"), month_start.strftime("%Y-%m-%d")),
+    )
+    if df.empty:
+        from .report_summary import checked_path, read_checked_file
+
+        path = checked_path(prev_start.strftime("%b%Y").upper(), checked_dir)
+        if path is None:
+            return df
+        f = read_checked_file(path)
+        f = f[(f["Cat"] == "Mortgage") & f["Property"].fillna("").astype(str).ne("") & f.index.notna()]
+        df = pd.DataFrame({
+            "property_code": f["Property"].astype(str).values,
+            "date": f.index.strftime("%Y-%m-%d"),
+            "amount": pd.to_numeric(f["Amount"], errors="coerce").values,
+            "memo": f["Memo"].fillna("").astype(str).values,
+        }).dropna(subset=["amount"])
+    return df
+
+
+def build_schedule(
+    conn: sqlite3.Connection,
+    month_str: str,
+    index: TenancyIndex | None = None,
+    checked_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Expected payments for month_str (SCHEDULE_COLUMNS): rent from tenancies, mortgages from the previous month."""
+    month_start, month_end = _month_bounds(month_str)
+    index = index if index is not None else TenancyIndex.from_db(conn)
+    rent = _rent_schedule(index, month_start, month_end)
+
+    prev = _previous_mortgages(conn, month_start, checked_dir)
+    mortgage = pd.DataFrame({
+        "property_code": prev["property_code"],
+        "kind": "mortgage",
+        "due_date": _shift_day(month_start, pd.to_datetime(prev["date"]).dt.day),
+        "expected_amount": prev["amount"].astype(float),
+        "check_amount": True,
+        "note": prev["memo"],
+    })
+    schedule = pd.concat([rent, mortgage], ignore_index=True)
+    schedule["due_date"] = pd.to_datetime(schedule["due_date"])
+    schedule["check_amount"] = schedule["check_amount"].astype(bool)
+    return schedule.sort_values(["property_code", "kind", "due_date"], ignore_index=True)
+
+
+def actual_payments(transactions: list[dict], labels: list[dict]) -> pd.DataFrame:
+    """The month's rent and mortgage rows with a property code: tx_id, property_code, kind, date, amount."""
+    tx = pd.DataFrame(transactions, columns=["tx_id", "posted_date", "amount", "is_superseded"])
+    lab = pd.DataFrame(labels, columns=["tx_id", "property_code", "category"])
+    df = tx[tx["is_superseded"] == 0].merge(lab, on="tx_id")
+    df["kind"] = df["category"].map(PAYMENT_KINDS)
+    df["date"] = pd.to_datetime(df["posted_date"], format="%Y-%m-%d", errors="coerce")
+    df = df[df["kind"].notna() & df["property_code"].fillna("").ne("") & df["date"].notna()]
+    return df[["tx_id", "property_code", "kind", "date", "amount"]].reset_index(drop=True)
+
+
+def _candidates(schedule: pd.DataFrame, actual: pd.DataFrame, window_days: int) -> pd.DataFrame:
+    pairs = schedule.reset_index(names="line").merge(actual, on=["property_code", "kind"])
+    pairs["days"] = (pairs["date"] - pairs["due_date"]).dt.days.abs()
+    return pairs[pairs["days"] <= window_days]
+
+
+def _match_rent(schedule: pd.DataFrame, actual: pd.DataFrame) -> pd.DataFrame:
+    """Rent may arrive in several payments: compare the sum received in the window with the rent."""
+    pairs = _candidates(schedule, actual, RENT_WINDOW_DAYS)
+    by_line = pairs.groupby("line").agg(actual_amount=("amount", "sum"), tx_ids=("tx_id", ",".join))
+    out = schedule.join(by_line)
+    out["actual_amount"] = out["actual_amount"].fillna(0.0)
+    short = out["check_amount"] & (out["actual_amount"] < out["expected_amount"] - _tolerance(out["expected_amount"]))
+    out["issue"] = np.select([out["actual_amount"] <= 0, short], ["missing", "underpaid"], "")
+    return out
+
+
+def _match_mortgages(schedule: pd.DataFrame, actual: pd.DataFrame) -> pd.DataFrame:
+    """One payment per schedule line: nearest date with the right amount, else any unused payment in the window."""
+    pairs = _candidates(schedule, actual, MORTGAGE_WINDOW_DAYS)
+    pairs["amount_ok"] = (pairs["amount"] - pairs["expected_amount"]).abs() <= _tolerance(pairs["expected_amount"])
+    pairs = pairs.sort_values(["amount_ok", "days"], ascending=[False, True])
+    matched: dict[int, tuple] = {}
+    used: set[str] = set()
+    for line, tx_id, amount, ok in pairs[["line", "tx_id", "amount", "amount_ok"]].itertuples(index=False):
+        if line in matched or tx_id in used:
+            continue
+        matched[line] = (amount, tx_id, "" if ok else "amount_changed")
+        used.add(tx_id)
+    out = schedule.copy()
+    found = pd.DataFrame.from_dict(matched, orient="index", columns=["actual_amount", "tx_ids", "issue"])
+    out = out.join(found)
+    out["actual_amount"] = out["actual_amount"].fillna(0.0)
+    out["issue"] = out["issue"].fillna("missing")
+    return out
+
+
+def match_schedule(schedule: pd.DataFrame, actual: pd.DataFrame) -> pd.DataFrame:
+    """Schedule lines that were not paid as expected (EXCEPTION_COLUMNS); issue is missing, underpaid or amount_changed."""
+    parts = [
+        _match_rent(schedule[schedule["kind"] == "rent"], actual[actual["kind"] == "rent"]),
+        _match_mortgages(schedule[schedule["kind"] == "mortgage"], actual[actual["kind"] == "mortgage"]),
+    ]
+    out = pd.concat(parts, ignore_index=True)
+    out = out[out["issue"] != ""].assign(tx_ids=lambda d: d["tx_ids"].fillna(""))
+    return out.sort_values(["property_code", "kind", "due_date"], ignore_index=True)[EXCEPTION_COLUMNS]
+
+
+def store_exceptions(conn: sqlite3.Connection, month_str: str, exceptions: pd.DataFrame) -> None:
+    conn.execute("DELETE FROM payment_exceptions WHERE month = ?", (month_str,))
+    conn.executemany(
+        """INSERT INTO payment_exceptions
+           (month, property_code, kind, due_date, expected_amount, actual_amount, tx_ids, issue, note)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [
+            (month_str, r.property_code, r.kind, r.due_date.strftime("%Y-%m-%d"), float(r.expected_amount),
+             float(r.actual_amount), r.tx_ids, r.issue, r.note)
+            for r in exceptions.itertuples(index=False)
+        ],
+    )
+
+
+def load_exceptions(conn: sqlite3.Connection, month_str: str) -> pd.DataFrame:
+    """Payment exceptions stored for month_str by run_month."""
+    return pd.read_sql_query(
+        f"SELECT {', '.join(EXCEPTION_COLUMNS)} FROM payment_exceptions WHERE month = ? ORDER BY property_code, kind, due_date",
+        conn,
+        params=(month_str,),
+    )
+
+
+def check_expected_payments(
+    conn: sqlite3.Connection,
+    month_str: str,
+    transactions: list[dict],
+    labels: list[dict],
+    index: TenancyIndex | None = None,
+    checked_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Pipeline stage: match the month's schedule, store the exceptions, send short or changed payments to review."""
+    schedule = build_schedule(conn, month_str, index, checked_dir)
+    exceptions = match_schedule(schedule, actual_payments(transactions, labels))
+    flagged = {tx for ids in exceptions["tx_ids"] for tx in ids.split(",") if tx}
+    for lab in labels:
+        if lab["tx_id"] in flagged:
+            lab["needs_review"] = 1
+    store_exceptions(conn, month_str, exceptions)
+    return exceptions
@@ -1,88 +1,198 @@
 """Export functions to produce XLSX/CSV files compatible with 3.0 MonthlySummary."""
 
+from itertools import zip_longest
 from pathlib import Path
+from typing import Iterator
 
 import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: no Parquet outputs
+    pa = None
+    pq = None
 
-def build_output_dataframe(transactions: list[dict], labels: list[dict]) -> pd.DataFrame:
-    """Join canonical transactions with labels into the output schema.
+HEADER_FONT = Font(bold=True)
 
-    Output columns (matching 3.0 MonthlySummary expectations):
-        Date (index), Account, Amount, Subcategory, Memo, Property, Description, Cat, Subcat
-    """
-    tx_df = pd.DataFrame(transactions)
-    lab_df = pd.DataFrame(labels)
+# Draft columns stored as text in Parquet (Amount is float64, the Date index a timestamp)
+PARQUET_TEXT_COLUMNS = ["Account", "Subcategory", "Memo", "Property", "Description", "Cat", "Subcat"]
 
-    tx_df = tx_df[tx_df["is_superseded"] == 0].copy()
+# Part of every output's input fingerprint: bump when what a writer produces changes
+EXPORT_VERSION = "2"
 
-    merged = tx_df.merge(lab_df, on="tx_id", how="left")
 
-    # posted_date should be YYYY-MM-DD; coerce and handle bad/mixed data
-    date_ser = merged["posted_date"].astype(str)
-    merged["Date"] = pd.to_datetime(date_ser, format="%Y-%m-%d", errors="coerce")
-    bad = merged["Date"].isna() & (date_ser != "").values
+def _parse_dates(posted: pd.Series) -> pd.Series:
+    """posted_date should be YYYY-MM-DD; anything else is tried day-first, and NaT if that fails too."""
+    date_ser = posted.astype(str)
+    dates = pd.to_datetime(date_ser, format="%Y-%m-%d", errors="coerce")
+    bad = dates.isna() & (date_ser != "").values
     if bad.any():
-        merged.loc[bad, "Date"] = pd.to_datetime(date_ser[bad], dayfirst=True, errors="coerce")
-    # Drop rows where date could not be parsed (e.g. wrong column data)
-    merged = merged.dropna(subset=["Date"])
-    merged["Account"] = merged["source_account"]
-    merged["Amount"] = merged["amount"]
-    merged["Subcategory"] = merged["effective_subcategory"]
-    merged["Memo"] = merged["memo"]
-    merged["Property"] = merged["property_code"].fillna("")
-    desc_y = merged.get("description_y")
-    desc_x = merged.get("description_x")
-    if desc_y is not None:
-        merged["Description"] = desc_y.fillna("").astype(str)
-    elif desc_x is not None:
-        merged["Description"] = desc_x.fillna("").astype(str)
-    else:
-        merged["Description"] = ""
-    merged["Cat"] = merged["category"].fillna("")
-    merged["Subcat"] = merged["subcategory"].fillna("")
-
-    merged.set_index("Date", inplace=True)
-    merged.sort_index(inplace=True)
-
-    output_cols = ["Account", "Amount", "Subcategory", "Memo", "Property", "Description", "Cat", "Subcat"]
-    result = merged[output_cols].copy()
-
-    return result
+        dates[bad] = pd.to_datetime(date_ser[bad], dayfirst=True, errors="coerce")
+    return dates
+
+
+class ExportContext:
+    """A run's canonical transactions merged with their labels once, for every writer.
+
+    merged holds the non-superseded transactions left-joined with labels (tx_id), indexed
+    by the parsed posted_date ("Date"; NaT where it could not be parsed) and sorted by it.
+    """
+
+    def __init__(self, transactions: list[dict], labels: list[dict]):
+        tx_df = pd.DataFrame(transactions)
+        lab_df = pd.DataFrame(labels)
+        tx_df = tx_df[tx_df["is_superseded"] == 0]
+        merged = tx_df.merge(lab_df, on="tx_id", how="left")
+        merged.index = pd.DatetimeIndex(_parse_dates(merged["posted_date"]), name="Date")
+        self.merged = merged.sort_index(kind="stable")
+
+    def draft(self) -> pd.DataFrame:
+        """The merged rows in the output schema (matching 3.0 MonthlySummary expectations):
+            Date (index), Account, Amount, Subcategory, Memo, Property, Description, Cat, Subcat
+        Rows without a parseable date (e.g. wrong column data) are dropped.
+        """
+        merged = self.merged[self.merged.index.notna()]
+        if "description_y" in merged.columns:
+            description = merged["description_y"].fillna("").astype(str)
+        elif "description_x" in merged.columns:
+            description = merged["description_x"].fillna("").astype(str)
+        else:
+            description = ""
+        return pd.DataFrame({
+            "Account": merged["source_account"],
+            "Amount": merged["amount"],
+            "Subcategory": merged["effective_subcategory"],
+            "Memo": merged["memo"],
+            "Property": merged["property_code"].fillna(""),
+            "Description": description,
+            "Cat": merged["category"].fillna(""),
+            "Subcat": merged["subcategory"].fillna(""),
+        }, index=merged.index)
+
+
+def build_output_dataframe(transactions: list[dict], labels: list[dict]) -> pd.DataFrame:
+    """Join canonical transactions with labels into the output schema (see ExportContext.draft)."""
+    return ExportContext(transactions, labels).draft()
 
 
 # Number of rows in Lists sheet; blank rows allow users to add new property codes/categories/subcategories
 VALIDATION_LIST_ROWS = 250
+LIST_COLUMNS = {"property": "A", "category": "B", "subcategory": "C"}
 
+# Rows converted to cell values at a time while streaming a sheet
+ROW_CHUNK = 5000
+# Width of a datetime cell as Excel shows it (yyyy-mm-dd h:mm:ss)
+DATETIME_WIDTH = 19
 
-def _set_column_widths(
-    ws,
+
+def _column_widths(
+    frame: pd.DataFrame,
     skip_col_letters: set[str] | None = None,
     width_scale: dict[str, float] | None = None,
-) -> None:
-    """Set each column width to the max character length in that column.
-    skip_col_letters: do not set width for these columns (e.g. tx_id).
+) -> dict[str, int]:
+    """Column letter -> width: the longest value (or header) in each column, computed per column from the frame.
+    skip_col_letters: leave these columns at the default width (e.g. tx_id).
     width_scale: optional dict col_letter -> scale (e.g. {'E': 0.5} for 50% width for Memo).
     """
     skip_col_letters = skip_col_letters or set()
     width_scale = width_scale or {}
-    for col_idx in range(1, ws.max_column + 1):
+    widths = {}
+    for col_idx, col in enumerate(frame.columns, 1):
         col_letter = get_column_letter(col_idx)
         if col_letter in skip_col_letters:
             continue
-        max_len = 0
-        for row in range(1, ws.max_row + 1):
-            cell = ws.cell(row=row, column=col_idx)
-            val = cell.value
-            if val is not None:
-                max_len = max(max_len, len(str(val)))
-        if max_len > 0:
-            w = max_len
-            if col_letter in width_scale:
-                w = max(1, round(w * width_scale[col_letter]))
-            ws.column_dimensions[col_letter].width = min(w, 255)
+        values = frame[col].dropna()
+        if values.empty:
+            max_len = 0
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            max_len = DATETIME_WIDTH
+        else:
+            max_len = int(values.astype(str).str.len().max())
+        w = max(max_len, len(str(col)))
+        if col_letter in width_scale:
+            w = max(1, round(w * width_scale[col_letter]))
+        widths[col_letter] = min(w, 255)
+    return widths
+
+
+def _cell_rows(frame: pd.DataFrame) -> Iterator[tuple]:
+    """Rows of frame as tuples of plain Python values, NaN/NaT as None (blank cell), ROW_CHUNK rows at a time."""
+    for start in range(0, len(frame), ROW_CHUNK):
+        chunk = frame.iloc[start:start + ROW_CHUNK]
+        yield from chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def _write_sheet(
+    wb: Workbook,
+    title: str,
+    frame: pd.DataFrame,
+    skip_col_letters: set[str] | None = None,
+    width_scale: dict[str, float] | None = None,
+    validations: dict[str, str] | None = None,
+) -> None:
+    """Stream frame (header row, then one row per record) into a new sheet of a write-only workbook.
+
+    Column widths, the auto-filter and validations are set before the rows, as write-only
+    sheets require. validations: data column name -> Lists column letter (dropdown source).
+    """
+    ws = wb.create_sheet(title)
+    for col_letter, width in _column_widths(frame, skip_col_letters, width_scale).items():
+        ws.column_dimensions[col_letter].width = width
+    max_row = len(frame) + 1
+    if len(frame.columns):
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(frame.columns))}{max_row}"
+
+    range_end = VALIDATION_LIST_ROWS + 1
+    for col, list_col in (validations or {}).items():
+        if col not in frame.columns:
+            continue
+        col_letter = get_column_letter(frame.columns.get_loc(col) + 1)
+        dv = DataValidation(
+            type="list",
+            formula1=f"Lists!${list_col}$2:${list_col}${range_end}",
+            allow_blank=True,
+        )
+        dv.add(f"{col_letter}2:{col_letter}{max(max_row, 2)}")
+        ws.data_validations.append(dv)
+
+    header = []
+    for col in frame.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = HEADER_FONT
+        header.append(cell)
+    ws.append(header)
+    for row in _cell_rows(frame):
+        ws.append(row)
+
+
+def _write_lists_sheet(
+    wb: Workbook,
+    property_codes: list[str] | None,
+    categories: list[str] | None,
+    subcategories: list[str] | None,
+) -> None:
+    """Lists sheet (Property, Category, Subcategory) that the dropdowns read from."""
+    ws = wb.create_sheet("Lists")
+    ws.append(["Property", "Category", "Subcategory"])
+    columns = [(values or [])[:VALIDATION_LIST_ROWS] for values in (property_codes, categories, subcategories)]
+    for row in zip_longest(*columns):
+        ws.append(row)
+
+
+def _save(wb: Workbook, output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        wb.save(output_path)
+    except PermissionError as e:
+        raise PermissionError(
+            f"Cannot write to {output_path}. Close the file if it is open in Excel or another program, then try again."
+        ) from e
 
 
 def write_xlsx(
@@ -92,73 +202,24 @@ def write_xlsx(
     categories: list[str] | None = None,
     subcategories: list[str] | None = None,
 ) -> None:
-    """Write the dataframe to XLSX.
+    """Write the dataframe to XLSX (Data sheet, index as the first column).
 
     If property_codes, categories, or subcategories are provided, adds a 'Lists' sheet
     and sets Excel data validation (dropdowns) on the Data sheet for Property, Cat, and Subcat.
     The Lists sheet has room for extra rows so users can add new values that then appear in the dropdowns.
+    Rows are streamed (openpyxl write-only mode), so memory does not grow with cell objects.
     """
-    output_path.parent.mkdir(parents=True, exist_ok=True)
     use_validation = property_codes is not None or categories is not None or subcategories is not None
-
-    if not use_validation:
-        with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-            df.to_excel(writer, sheet_name="Data", index=True)
-            ws_data = writer.sheets["Data"]
-            _set_column_widths(ws_data, width_scale={"E": 0.5})
-            _set_auto_filter(ws_data)
-        return
-
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name="Data", index=True)
-        wb = writer.book
-        ws_data = wb["Data"]
-        # Insert Lists after Data so Data remains the first sheet
-        ws_lists = wb.create_sheet("Lists", 1)
-        ws_lists["A1"] = "Property"
-        ws_lists["B1"] = "Category"
-        ws_lists["C1"] = "Subcategory"
-        for i in range(min(len(property_codes or []), VALIDATION_LIST_ROWS)):
-            ws_lists.cell(row=i + 2, column=1, value=(property_codes or [])[i])
-        for i in range(min(len(categories or []), VALIDATION_LIST_ROWS)):
-            ws_lists.cell(row=i + 2, column=2, value=(categories or [])[i])
-        for i in range(min(len(subcategories or []), VALIDATION_LIST_ROWS)):
-            ws_lists.cell(row=i + 2, column=3, value=(subcategories or [])[i])
-
-        ws_data = wb["Data"]
-        max_row = max(ws_data.max_row or 2, 2)
-        range_end = VALIDATION_LIST_ROWS + 1
-        dv_prop = DataValidation(
-            type="list",
-            formula1=f"Lists!$A$2:$A${range_end}",
-            allow_blank=True,
-        )
-        dv_cat = DataValidation(
-            type="list",
-            formula1=f"Lists!$B$2:$B${range_end}",
-            allow_blank=True,
-        )
-        dv_sub = DataValidation(
-            type="list",
-            formula1=f"Lists!$C$2:$C${range_end}",
-            allow_blank=True,
-        )
-        dv_prop.add(f"F2:F{max_row}")
-        dv_cat.add(f"H2:H{max_row}")
-        dv_sub.add(f"I2:I{max_row}")
-        ws_data.add_data_validation(dv_prop)
-        ws_data.add_data_validation(dv_cat)
-        ws_data.add_data_validation(dv_sub)
-        _set_column_widths(ws_data, width_scale={"E": 0.5})  # Memo at 50%
-        _set_auto_filter(ws_data)
-
-
-def _set_auto_filter(ws) -> None:
-    """Turn on Excel auto-filter for the used range (all column headers)."""
-    if ws.max_row < 1 or ws.max_column < 1:
-        return
-    last_col = get_column_letter(ws.max_column)
-    ws.auto_filter.ref = f"A1:{last_col}{ws.max_row}"
+    wb = Workbook(write_only=True)
+    validations = None
+    if use_validation:
+        validations = {"Property": LIST_COLUMNS["property"], "Cat": LIST_COLUMNS["category"],
+                       "Subcat": LIST_COLUMNS["subcategory"]}
+    _write_sheet(wb, "Data", df.reset_index(), width_scale={"E": 0.5}, validations=validations)  # Memo at 50%
+    if use_validation:
+        # Lists after Data so Data remains the first sheet
+        _write_lists_sheet(wb, property_codes, categories, subcategories)
+    _save(wb, output_path)
 
 
 def write_csv(df: pd.DataFrame, output_path: Path) -> None:
@@ -167,34 +228,49 @@ def write_csv(df: pd.DataFrame, output_path: Path) -> None:
     df.to_csv(output_path)
 
 
+def to_arrow_table(df: pd.DataFrame):
+    """Draft/checked frame (Date index, output columns) as a typed Arrow table: Date timestamp, Amount float64, text as strings."""
+    dates = pd.to_datetime(df.index, errors="coerce")
+    columns = {
+        "Date": pa.array(dates.values.astype("datetime64[us]"), type=pa.timestamp("us"), mask=dates.isna()),
+        "Amount": pa.array(pd.to_numeric(df["Amount"], errors="coerce").astype(float), type=pa.float64(), from_pandas=True),
+    }
+    for col in PARQUET_TEXT_COLUMNS:
+        values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        text = values.astype(object).where(values.notna(), None)
+        columns[col] = pa.array([None if v is None else str(v) for v in text], type=pa.string())
+    return pa.table(columns)
+
+
+def write_parquet(df: pd.DataFrame, output_path: Path) -> None:
+    """Write the dataframe to a typed Parquet file (see to_arrow_table). Requires pyarrow."""
+    if pq is None:
+        raise RuntimeError("pyarrow is required for Parquet output (pip install pyarrow)")
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(to_arrow_table(df), output_path, compression="zstd")
+
+
 def write_review_queue(
-    transactions: list[dict],
-    labels: list[dict],
+    export: ExportContext,
     output_path: Path,
     property_codes: list[str] | None = None,
     categories: list[str] | None = None,
     subcategories: list[str] | None = None,
+    exceptions: pd.DataFrame | None = None,
 ) -> int:
     """Write review queue XLSX with only needs_review=1 rows.
 
     If property_codes, categories, or subcategories are provided, adds a 'Lists' sheet
     and dropdown validation on property_code, category, subcategory.
+    exceptions (expected rent/mortgage payments not found) go on an 'Exceptions' sheet.
     Returns the count of review items.
     """
-    tx_df = pd.DataFrame(transactions)
-    lab_df = pd.DataFrame(labels)
-    tx_df = tx_df[tx_df["is_superseded"] == 0].copy()
+    review = export.merged[export.merged["needs_review"] == 1]
+    has_exceptions = exceptions is not None and not exceptions.empty
 
-    merged = tx_df.merge(lab_df, on="tx_id", how="left")
-    review = merged[merged["needs_review"] == 1].copy()
-
-    if review.empty:
+    if review.empty and not has_exceptions:
         return 0
 
-    review["Date"] = pd.to_datetime(review["posted_date"])
-    review.set_index("Date", inplace=True)
-    review.sort_index(inplace=True)
-
     cols = [
         "tx_id", "source_bank", "source_account", "amount",
         "counterparty", "reference", "memo", "type",
@@ -205,7 +281,6 @@ def write_review_queue(
     existing = [c for c in cols if c in review.columns]
     out = review[existing]
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
     use_validation = property_codes is not None or categories is not None or subcategories is not None
 
     skip_tx_id = set()
@@ -215,114 +290,36 @@ def write_review_queue(
     if "memo" in existing:
         memo_scale[get_column_letter(2 + existing.index("memo"))] = 0.5
 
-    try:
-        writer_ctx = pd.ExcelWriter(output_path, engine="openpyxl")
-    except PermissionError as e:
-        raise PermissionError(
-            f"Cannot write to {output_path}. Close the file if it is open in Excel or another program, then try again."
-        ) from e
-
-    with writer_ctx as writer:
-        out.to_excel(writer, sheet_name="Review", index=True)
-        wb = writer.book
-        ws = wb["Review"]
-        _set_column_widths(ws, skip_col_letters=skip_tx_id, width_scale=memo_scale)
-        _set_auto_filter(ws)
-
-        if use_validation:
-            # Insert Lists after Review so Review remains the first sheet
-            ws_lists = wb.create_sheet("Lists", 1)
-            ws_lists["A1"] = "Property"
-            ws_lists["B1"] = "Category"
-            ws_lists["C1"] = "Subcategory"
-            for i in range(min(len(property_codes or []), VALIDATION_LIST_ROWS)):
-                ws_lists.cell(row=i + 2, column=1, value=(property_codes or [])[i])
-            for i in range(min(len(categories or []), VALIDATION_LIST_ROWS)):
-                ws_lists.cell(row=i + 2, column=2, value=(categories or [])[i])
-            for i in range(min(len(subcategories or []), VALIDATION_LIST_ROWS)):
-                ws_lists.cell(row=i + 2, column=3, value=(subcategories or [])[i])
-
-            ws = wb["Review"]
-            max_row = max(ws.max_row or 2, 2)
-            range_end = VALIDATION_LIST_ROWS + 1
-            try:
-                i_prop = existing.index("property_code")
-                i_cat = existing.index("category")
-                i_sub = existing.index("subcategory")
-            except ValueError:
-                i_prop = i_cat = i_sub = None
-            if i_prop is not None:
-                col_prop = get_column_letter(2 + i_prop)
-                dv_prop = DataValidation(
-                    type="list",
-                    formula1=f"Lists!$A$2:$A${range_end}",
-                    allow_blank=True,
-                )
-                dv_prop.add(f"{col_prop}2:{col_prop}{max_row}")
-                ws.add_data_validation(dv_prop)
-            if i_cat is not None:
-                col_cat = get_column_letter(2 + i_cat)
-                dv_cat = DataValidation(
-                    type="list",
-                    formula1=f"Lists!$B$2:$B${range_end}",
-                    allow_blank=True,
-                )
-                dv_cat.add(f"{col_cat}2:{col_cat}{max_row}")
-                ws.add_data_validation(dv_cat)
-            if i_sub is not None:
-                col_sub = get_column_letter(2 + i_sub)
-                dv_sub = DataValidation(
-                    type="list",
-                    formula1=f"Lists!$C$2:$C${range_end}",
-                    allow_blank=True,
-                )
-                dv_sub.add(f"{col_sub}2:{col_sub}{max_row}")
-                ws.add_data_validation(dv_sub)
+    wb = Workbook(write_only=True)
+    validations = None
+    if use_validation:
+        validations = {"property_code": LIST_COLUMNS["property"], "category": LIST_COLUMNS["category"],
+                       "subcategory": LIST_COLUMNS["subcategory"]}
+    _write_sheet(wb, "Review", out.reset_index(), skip_col_letters=skip_tx_id, width_scale=memo_scale,
+                 validations=validations)
+    if use_validation:
+        # Lists after Review so Review remains the first sheet
+        _write_lists_sheet(wb, property_codes, categories, subcategories)
+    if has_exceptions:
+        _write_sheet(wb, "Exceptions", exceptions)
+    _save(wb, output_path)
 
     return len(out)
 
 
-def write_diagnostic_ddcheck(
-    transactions: list[dict],
-    labels: list[dict],
-    output_path: Path,
-) -> None:
+def write_diagnostic_ddcheck(export: ExportContext, output_path: Path) -> None:
     """Write DDCheck equivalent: all direct debits and Beals for mortgage/property checking."""
-    import re
-
-    tx_df = pd.DataFrame(transactions)
-    lab_df = pd.DataFrame(labels)
-    tx_df = tx_df[tx_df["is_superseded"] == 0].copy()
-    merged = tx_df.merge(lab_df, on="tx_id", how="left")
-
+    merged = export.merged
     mask_dd = merged["effective_subcategory"].fillna("").str.contains(
         r"DIRECT[ ]?DEBIT|Direct Debit", case=False, regex=True
     )
     mask_beals = merged["memo"].fillna("").str.match(r"^BEALS.*$", case=False)
-    dd = merged[mask_dd | mask_beals].copy()
-
-    dd["Date"] = pd.to_datetime(dd["posted_date"])
-    dd.set_index("Date", inplace=True)
-    dd.sort_index(inplace=True)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    dd.to_csv(output_path)
+    merged[mask_dd | mask_beals].to_csv(output_path)
 
 
-def write_diagnostic_catcheck(
-    transactions: list[dict],
-    labels: list[dict],
-    output_path: Path,
-) -> None:
+def write_diagnostic_catcheck(export: ExportContext, output_path: Path) -> None:
     """Write CatCheck equivalent: all categorised transactions."""
-    tx_df = pd.DataFrame(transactions)
-    lab_df = pd.DataFrame(labels)
-    tx_df = tx_df[tx_df["is_superseded"] == 0].copy()
-    merged = tx_df.merge(lab_df, on="tx_id", how="left")
-
-    merged["Date"] = pd.to_datetime(merged["posted_date"])
-    merged.set_index("Date", inplace=True)
-    merged.sort_index(inplace=True)
-
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    merged.to_csv(output_path)
+    export.merged.to_csv(output_path)
@@ -0,0 +1,61 @@
+"""Input fingerprints for output files, so outputs whose inputs did not change are not rewritten.
+
+Every directory the pipeline writes into keeps a .fingerprints.json next to the outputs:
+file name -> {fingerprint, size, mtime_ns}. A writer is skipped when the fingerprint of
+its inputs matches and the file is still as it was written (same size and mtime), so a
+file edited or replaced by hand is always rewritten.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+SIDECAR_NAME = ".fingerprints.json"
+
+
+def fingerprint(*parts) -> str:
+    """SHA-256 over JSON-serialisable parts (dict keys sorted; other values by str())."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, default=str, separators=(",", ":")).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _read_sidecar(directory: Path) -> dict:
+    try:
+        return json.loads((directory / SIDECAR_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def is_current(path: Path, fp: str) -> bool:
+    """True if path was last written for inputs with fingerprint fp and has not been touched since."""
+    entry = _read_sidecar(path.parent).get(path.name)
+    if not entry or entry.get("fingerprint") != fp:
+        return False
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    return entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns
+
+
+def record(paths_fps: list[tuple[Path, str]]) -> None:
+    """Store the fingerprint of each freshly written (path, fingerprint); paths that were not written are dropped."""
+    by_dir: dict[Path, list[tuple[Path, str]]] = {}
+    for path, fp in paths_fps:
+        by_dir.setdefault(path.parent, []).append((path, fp))
+    for directory, items in by_dir.items():
+        entries = _read_sidecar(directory)
+        for path, fp in items:
+            try:
+                st = path.stat()
+            except OSError:
+                entries.pop(path.name, None)
+                continue
+            entries[path.name] = {"fingerprint": fp, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        tmp = directory / f"{SIDECAR_NAME}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(entries, indent=1, sort_keys=True))
+        os.replace(tmp, directory / SIDECAR_NAME)
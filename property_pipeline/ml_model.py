@@ -1,6 +1,8 @@
 """
 Optional ML model: suggests category, subcategory, property_code from transaction features.
 Trained on historical labels in the DB; regex keeps precedence at inference.
+Models trained with tenancies loaded also use the property whose tenant on the posted
+date is named in the transaction text (see tenancy_index.TenancyIndex.tenant_property).
 """
 
 from pathlib import Path
@@ -13,12 +15,13 @@ import joblib
 
 from .config import DB_PATH, MODEL_PATH
 from .db import get_db
+from .tenancy_index import TenancyIndex
 
 
-def _get_training_data(conn: sqlite3.Connection):
+def _get_training_data(conn: sqlite3.Connection, tenancy_index: TenancyIndex | None = None):
     """Return (list of tx feature dicts, list of (category, subcategory, property_code))."""
     cur = conn.execute("""
-        SELECT c.tx_id, c.match_text, c.amount, c.effective_subcategory, c.source_bank
+        SELECT c.tx_id, c.match_text, c.amount, c.effective_subcategory, c.source_bank, c.posted_date
         FROM transactions_canonical c
         INNER JOIN (
             SELECT tx_id, MAX(label_version) AS mv FROM transactions_labels GROUP BY tx_id
@@ -44,17 +47,27 @@ def _get_training_data(conn: sqlite3.Connection):
         cat, subcat, prop = labels_by_tx[r["tx_id"]]
         if not cat or not subcat:
             continue
-        X_dicts.append({
-            "match_text": (r["match_text"] or "").strip() or "(none)",
-            "amount": float(r["amount"] or 0),
-            "effective_subcategory": (r["effective_subcategory"] or "").strip() or "__none__",
-            "source_bank": (r["source_bank"] or "").strip() or "__none__",
-        })
+        X_dicts.append(_feature_dict(r, tenancy_index))
         y_triples.append((cat, subcat, prop))
 
     return X_dicts, y_triples
 
 
+def _feature_dict(tx: dict, tenancy_index: TenancyIndex | None = None) -> dict:
+    d = {
+        "match_text": (tx.get("match_text") or tx.get("memo") or "").strip() or "(none)",
+        "amount": float(tx.get("amount") or 0),
+        "effective_subcategory": (tx.get("effective_subcategory") or "").strip() or "__none__",
+        "source_bank": (tx.get("source_bank") or "").strip() or "__none__",
+    }
+    if tenancy_index is not None:
+        prop = None
+        if tx.get("posted_date"):
+            prop = tenancy_index.tenant_property(d["match_text"], tx["posted_date"])
+        d["tenant_property"] = prop or "__none__"
+    return d
+
+
 def _encode_with_unknown(encoder, values):
     """Encode list of values; use -1 for unseen labels."""
     out = []
@@ -67,8 +80,10 @@ def _encode_with_unknown(encoder, values):
     return np.array(out).reshape(-1, 1)
 
 
-def _build_feature_matrix(X_dicts, vec_text, scaler_amount, enc_subcat, enc_bank, fit=False):
-    """Build numeric feature matrix from list of feature dicts. If fit=True, fit transformers."""
+def _build_feature_matrix(X_dicts, vec_text, scaler_amount, enc_subcat, enc_bank, fit=False, enc_tenant=None):
+    """Build numeric feature matrix from list of feature dicts. If fit=True, fit transformers.
+    enc_tenant adds the tenant_property column (models trained without tenancies leave it out).
+    """
     texts = [d["match_text"] for d in X_dicts]
     amounts = np.array([d["amount"] for d in X_dicts]).reshape(-1, 1)
     subcats = [d["effective_subcategory"] for d in X_dicts]
@@ -86,8 +101,15 @@ def _build_feature_matrix(X_dicts, vec_text, scaler_amount, enc_subcat, enc_bank
     subcat_enc = _encode_with_unknown(enc_subcat, subcats)
     bank_enc = _encode_with_unknown(enc_bank, banks)
 
+    columns = [X_text, amounts_scaled, subcat_enc, bank_enc]
+    if enc_tenant is not None:
+        tenants = [d["tenant_property"] for d in X_dicts]
+        if fit:
+            enc_tenant.fit(tenants)
+        columns.append(_encode_with_unknown(enc_tenant, tenants))
+
     from scipy.sparse import hstack
-    return hstack([X_text, amounts_scaled, subcat_enc, bank_enc])
+    return hstack(columns)
 
 
 def train(db_path: Path | str | None = None, model_path: Path | str | None = None) -> dict:
@@ -98,7 +120,10 @@ def train(db_path: Path | str | None = None, model_path: Path | str | None = Non
     path.parent.mkdir(parents=True, exist_ok=True)
 
     with get_db(db) as conn:
-        X_dicts, y_triples = _get_training_data(conn)
+        tenancy_index = TenancyIndex.from_db(conn)
+        if not len(tenancy_index):
+            tenancy_index = None
+        X_dicts, y_triples = _get_training_data(conn, tenancy_index)
     if len(X_dicts) < 20:
         return {"ok": False, "reason": "need_at_least_20_labeled", "n": len(X_dicts)}
 
@@ -106,12 +131,13 @@ def train(db_path: Path | str | None = None, model_path: Path | str | None = Non
     scaler_amount = StandardScaler()
     enc_subcat = LabelEncoder()
     enc_bank = LabelEncoder()
+    enc_tenant = LabelEncoder() if tenancy_index is not None else None
 
     y_cat = [y[0] for y in y_triples]
     y_sub = [y[1] for y in y_triples]
     y_prop = [y[2] for y in y_triples]
 
-    X = _build_feature_matrix(X_dicts, vec_text, scaler_amount, enc_subcat, enc_bank, fit=True)
+    X = _build_feature_matrix(X_dicts, vec_text, scaler_amount, enc_subcat, enc_bank, fit=True, enc_tenant=enc_tenant)
 
     clf_cat = RandomForestClassifier(n_estimators=100, max_depth=12, random_state=42, n_jobs=-1)
     clf_sub = RandomForestClassifier(n_estimators=100, max_depth=12, random_state=43, n_jobs=-1)
@@ -126,6 +152,7 @@ def train(db_path: Path | str | None = None, model_path: Path | str | None = Non
         "scaler_amount": scaler_amount,
         "enc_subcat": enc_subcat,
         "enc_bank": enc_bank,
+        "enc_tenant": enc_tenant,
         "clf_category": clf_cat,
         "clf_subcategory": clf_sub,
         "clf_property": clf_prop,
@@ -143,16 +170,17 @@ def load_model(model_path: Path | str | None = None):
     return joblib.load(path)
 
 
-def predict_one(tx: dict, model: dict) -> tuple[str | None, str | None, str | None, float]:
+def predict_one(
+    tx: dict, model: dict, tenancy_index: TenancyIndex | None = None
+) -> tuple[str | None, str | None, str | None, float]:
     """Predict (category, subcategory, property_code, confidence) for one transaction dict.
-    tx should have match_text, amount, effective_subcategory, source_bank (or compatible keys).
+    tx should have match_text, amount, effective_subcategory, source_bank (or compatible keys),
+    and posted_date when the model uses tenancies (pass tenancy_index to match tenant names).
     """
-    d = {
-        "match_text": (tx.get("match_text") or tx.get("memo") or "").strip() or "(none)",
-        "amount": float(tx.get("amount") or 0),
-        "effective_subcategory": (tx.get("effective_subcategory") or "").strip() or "__none__",
-        "source_bank": (tx.get("source_bank") or "").strip() or "__none__",
-    }
+    enc_tenant = model.get("enc_tenant")
+    if enc_tenant is not None and tenancy_index is None:
+        tenancy_index = TenancyIndex([])
+    d = _feature_dict(tx, tenancy_index if enc_tenant is not None else None)
     X = _build_feature_matrix(
         [d],
         model["vec_text"],
@@ -160,6 +188,7 @@ def predict_one(tx: dict, model: dict) -> tuple[str | None, str | None, str | No
         model["enc_subcat"],
         model["enc_bank"],
         fit=False,
+        enc_tenant=enc_tenant,
     )
 
     p_cat = model["clf_category"].predict_proba(X)[0]
@@ -1,31 +1,63 @@
 """Main pipeline orchestrator: combines import, rule engine, and export."""
 
 import json
+import os
 import sqlite3
 import shutil
-import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Callable
 
 from .config import (
     BANK_DOWNLOAD_DIR, GENERATED_DIR, CHECKED_DIR, REVIEW_DIR, DB_PATH,
 )
-from .db import init_db, get_db
+from .db import init_db, get_db, bump_data_revision
+from .aggregates import refresh_month_from_db
 from .importers import load_month_files
 from .engine import run_engine
+from .tenancy_index import TenancyIndex, flag_rent_on_void
+from .expected_payments import check_expected_payments
+from .transfers import match_transfers
+from .reconcile import reconcile_month
+from .backups import backup_file
+from .fingerprints import fingerprint, is_current, record as record_fingerprints
 from .export import (
-    build_output_dataframe, write_xlsx, write_csv,
+    EXPORT_VERSION, ExportContext, build_output_dataframe, write_xlsx, write_csv, write_parquet, pa,
     write_review_queue, write_diagnostic_ddcheck, write_diagnostic_catcheck,
 )
+from .dataset import sync_dataset
 from .rules_seed import get_all_rules, get_categories_and_subcategories, PROPERTIES_SEED
 
+# Output files written concurrently by the export stage of run_month / finalize_month; months with
+# at least EXPORT_PROCESS_MIN_ROWS rows are written from worker processes (start-up costs more than it saves below that)
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", str(min(5, os.cpu_count() or 1))))
+EXPORT_PROCESS_MIN_ROWS = int(os.environ.get("EXPORT_PROCESS_MIN_ROWS", "5000"))
 
-def _backup_if_exists(filepath: Path) -> None:
-    """If file exists, copy it to a timestamped backup (e.g. file.xlsx.bak_20250218-143022)."""
-    if not filepath.exists():
-        return
-    timestr = time.strftime("%Y%m%d-%H%M%S")
-    backup_path = Path(str(filepath) + f".bak_{timestr}")
-    shutil.copy2(filepath, backup_path)
+
+def _write_outputs(writers: list[tuple[Path, Callable[[Path], object], str]], rows: int = 0) -> list[Path]:
+    """Back up, then run each write(path) concurrently; the writers must not share files.
+
+    Each writer is (path, write, fingerprint of its inputs); one whose file is current for
+    that fingerprint (see fingerprints.py) is skipped. Threads by default; from
+    EXPORT_PROCESS_MIN_ROWS rows a process pool is used instead, so the XLSX writers
+    (pure Python, GIL-bound) really run in parallel, and write must then be picklable
+    (a module-level function or functools.partial of one). Returns the paths written; the
+    first failure is re-raised once all writers have finished.
+    """
+    todo = [(path, write, fp) for path, write, fp in writers if not is_current(path, fp)]
+    if not todo:
+        return []
+    for path, _, _ in todo:
+        backup_file(path)
+    workers = max(1, min(EXPORT_WORKERS, len(todo)))
+    pool_cls = ProcessPoolExecutor if rows >= EXPORT_PROCESS_MIN_ROWS and workers > 1 else ThreadPoolExecutor
+    with pool_cls(max_workers=workers) as pool:
+        futures = [pool.submit(write, path) for path, write, _ in todo]
+    for f in futures:
+        f.result()
+    record_fingerprints([(path, fp) for path, _, fp in todo])
+    return [path for path, _, _ in todo]
 
 
 def seed_db(db_path: Path | str | None = None) -> None:
@@ -139,8 +171,21 @@ def _load_latest_labels_for_tx_ids(conn: sqlite3.Connection, tx_ids: list[str])
 
 def _clear_month(conn: sqlite3.Connection, month_str: str) -> None:
     """Remove all stored data for this import_batch_id so re-import replaces it.
-    Order: labels (FK to canonical), then canonical, then raw.
+    Order: labels, transfer pairs and Beals matches (FK to canonical), then canonical, then raw.
+    A finalized month's aggregates go too: the month is a draft again, and reports read its
+    checked file until it is finalized again.
     """
+    conn.execute("DELETE FROM monthly_aggregates WHERE month = ?", (month_str,))
+    conn.execute("DELETE FROM monthly_aggregate_sources WHERE month = ?", (month_str,))
+    conn.execute(
+        "DELETE FROM beals_matches WHERE tx_id IN (SELECT tx_id FROM transactions_canonical WHERE import_batch_id = ?)",
+        (month_str,),
+    )
+    conn.execute(
+        "DELETE FROM transfer_pairs WHERE out_tx_id IN (SELECT tx_id FROM transactions_canonical WHERE import_batch_id = ?)"
+        " OR in_tx_id IN (SELECT tx_id FROM transactions_canonical WHERE import_batch_id = ?)",
+        (month_str, month_str),
+    )
     conn.execute(
         "DELETE FROM transactions_labels WHERE tx_id IN "
         "(SELECT tx_id FROM transactions_canonical WHERE import_batch_id = ?)",
@@ -230,6 +275,7 @@ def run_month(
     output_dir: Path | str | None = None,
     use_ml: bool = False,
     model_path: Path | str | None = None,
+    progress: Callable[[float, str], None] | None = None,
 ) -> dict:
     """Run the full pipeline for a single month.
 
@@ -240,6 +286,7 @@ def run_month(
         output_dir: override for output folder (generated/)
         use_ml: if True, load ML model and override catch_all / low-confidence labels when ML is confident
         model_path: path to saved ML model (default from config)
+        progress: optional callback(fraction, message) called after each stage (used by API jobs)
 
     Returns:
         Summary dict with counts.
@@ -248,11 +295,16 @@ def run_month(
     db = db_path or DB_PATH
     gen_dir = Path(output_dir) if output_dir else GENERATED_DIR
 
+    def report(fraction: float, message: str) -> None:
+        print(message)
+        if progress is not None:
+            progress(fraction, message)
+
     seed_db(db)
 
     # 1. Import bank CSVs
     raw_rows, canonical_rows = load_month_files(bd_dir, month_str)
-    print(f"Loaded {len(canonical_rows)} transactions for {month_str}")
+    report(0.1, f"Loaded {len(canonical_rows)} transactions for {month_str}")
 
     with get_db(db) as conn:
         # 1b. Clear existing data for this month so re-import replaces it (no duplicate/skip)
@@ -260,16 +312,18 @@ def run_month(
         # 2. Store in DB
         n_raw = _store_raw_rows(conn, raw_rows)
         n_canon = _store_canonical_rows(conn, canonical_rows)
-        print(f"Stored {n_raw} raw rows, {n_canon} canonical rows (new)")
 
-        # 3. Load rules, properties, and rule_performance (for measured confidence)
+        # 3. Load rules, properties, rule_performance (for measured confidence) and tenancies
         rules = _load_rules_from_db(conn)
         properties_set = _load_properties_set(conn)
         rule_performance = _load_rule_performance(conn)
+        tenancy_index = TenancyIndex.from_db(conn)
+    # Reported after commit so a progress callback writing to the DB is not blocked
+    report(0.2, f"Stored {n_raw} raw rows, {n_canon} canonical rows (new)")
 
     # 4. Run engine (with rule_performance for base confidence when available)
     labels = run_engine(canonical_rows, rules, properties_set, rule_performance=rule_performance)
-    print(f"Engine produced {len(labels)} labels")
+    report(0.4, f"Engine produced {len(labels)} labels")
 
     # 4b. Optional ML: override catch_all or low-confidence labels when ML confidence is high
     if use_ml:
@@ -282,7 +336,7 @@ def run_month(
             for tx, lab in zip(canonical_rows, labels):
                 if lab.get("rule_strength") != "catch_all" and (lab.get("confidence") or 0) >= ML_APPLY_WHEN_RULE_CONFIDENCE_BELOW:
                     continue
-                cat, subcat, prop, conf = predict_one(tx, model)
+                cat, subcat, prop, conf = predict_one(tx, model, tenancy_index)
                 if conf >= ML_CONFIDENCE_THRESHOLD:
                     lab["category"] = cat
                     lab["subcategory"] = subcat
@@ -290,62 +344,83 @@ def run_month(
                     lab["confidence"] = conf
                     lab["source"] = "model"
                     overrides += 1
-            print(f"ML overrides applied: {overrides}")
+            report(0.5, f"ML overrides applied: {overrides}")
         else:
             print("ML enabled but no model found; run train_ml first.")
 
+    # 4c. Rent coded to a property that was void around the payment date goes to review
+    n_void = flag_rent_on_void(canonical_rows, labels, tenancy_index)
+    if n_void:
+        print(f"Rent on void properties flagged for review: {n_void}")
+
     with get_db(db) as conn:
+        # 4d. Pair transfers between our accounts and label both sides alike
+        transfers = match_transfers(conn, month_str, canonical_rows, labels)
+        # Beals receipts take the property of the statement lines they pay
+        beals = reconcile_month(conn, month_str, canonical_rows, labels)
+        # 4e. Expected rent and mortgages (tenancies, last month's mortgages) not paid as expected
+        exceptions = check_expected_payments(conn, month_str, canonical_rows, labels, tenancy_index)
         # 5. Store labels
         n_labels = _store_labels(conn, labels)
-        print(f"Stored {n_labels} labels")
+    print(f"Transfers paired: {transfers['pairs']} ({transfers['relabelled']} relabelled, "
+          f"{transfers['one_sided']} one-sided and {transfers['unpaired']} unpaired sent to review)")
+    if beals["receipts"]:
+        print(f"Beals receipts matched to statements: {beals['matched']}/{beals['receipts']} ({beals['coded']} property codes filled)")
+    if not exceptions.empty:
+        print(f"Payment exceptions: {', '.join(f'{n} {issue}' for issue, n in exceptions['issue'].value_counts().items())}")
+    report(0.55, f"Stored {n_labels} labels")
 
     # 6. Export (backup existing files before overwriting)
     gen_dir.mkdir(parents=True, exist_ok=True)
 
-    output_df = build_output_dataframe(canonical_rows, labels)
+    # One merge of canonical rows and labels for the draft, review queue and diagnostics
+    export = ExportContext(canonical_rows, labels)
+    output_df = export.draft()
 
     categories, subcategories = get_categories_and_subcategories()
     property_codes_list = sorted(properties_set) if properties_set else []
 
     draft_xlsx = gen_dir / f"{month_str}_codedAndCategorised.xlsx"
     draft_csv = gen_dir / f"{month_str}_codedAndCategorised.csv"
-    _backup_if_exists(draft_xlsx)
-    _backup_if_exists(draft_csv)
-    write_xlsx(
-        output_df, draft_xlsx,
-        property_codes=property_codes_list,
-        categories=categories,
-        subcategories=subcategories,
-    )
-    write_csv(output_df, draft_csv)
-    print(f"Draft written: {draft_xlsx}")
-
-    # Review queue
+    draft_parquet = gen_dir / f"{month_str}_codedAndCategorised.parquet"
     review_dir = REVIEW_DIR
     review_dir.mkdir(parents=True, exist_ok=True)
     review_path = review_dir / f"review_queue_{month_str}.xlsx"
-    _backup_if_exists(review_path)
-    n_review = write_review_queue(
-        canonical_rows, labels, review_path,
-        property_codes=property_codes_list,
-        categories=categories,
-        subcategories=subcategories,
-    )
-    print(f"Review queue: {n_review} items -> {review_path}")
-
-    # Diagnostics
     dd_path = gen_dir / f"DDCheck_{month_str}.csv"
     cat_path = gen_dir / f"CatCheck_{month_str}.csv"
-    _backup_if_exists(dd_path)
-    _backup_if_exists(cat_path)
-    write_diagnostic_ddcheck(canonical_rows, labels, dd_path)
-    write_diagnostic_catcheck(canonical_rows, labels, cat_path)
-    print(f"Diagnostics: {dd_path}, {cat_path}")
+
+    # Outputs are rewritten only when their inputs changed: the month's import, the rule set,
+    # the labels and the exporter version (plus the dropdown lists and exceptions they show)
+    lists = dict(property_codes=property_codes_list, categories=categories, subcategories=subcategories)
+    inputs = (EXPORT_VERSION, fingerprint(canonical_rows), fingerprint(rules), fingerprint(labels))
+    exceptions_fp = fingerprint(exceptions.to_dict(orient="records"))
+    n_review = int((export.merged["needs_review"] == 1).sum())
+
+    # Draft, review queue and diagnostics are independent files: write them concurrently
+    writers = [
+        (draft_xlsx, partial(write_xlsx, output_df, **lists), fingerprint("draft", *inputs, lists)),
+        (draft_csv, partial(write_csv, output_df), fingerprint("draft_csv", *inputs)),
+        (review_path, partial(write_review_queue, export, **lists, exceptions=exceptions),
+         fingerprint("review", *inputs, lists, exceptions_fp)),
+        (dd_path, partial(write_diagnostic_ddcheck, export), fingerprint("ddcheck", *inputs)),
+        (cat_path, partial(write_diagnostic_catcheck, export), fingerprint("catcheck", *inputs)),
+    ]
+    if pa is not None:
+        writers.append((draft_parquet, partial(write_parquet, output_df), fingerprint("draft_parquet", *inputs)))
+    written = _write_outputs(writers, rows=len(output_df))
+
+    def status(*paths: Path) -> str:
+        return "written" if any(p in written for p in paths) else "unchanged"
+
+    report(0.75, f"Draft {status(draft_xlsx, draft_csv, draft_parquet)}: {draft_xlsx}")
+    report(0.9, f"Review queue ({status(review_path)}): {n_review} items, {len(exceptions)} payment exceptions -> {review_path}")
+    report(1.0, f"Diagnostics ({status(dd_path, cat_path)}): {dd_path}, {cat_path}")
 
     return {
         "month": month_str,
         "total_transactions": len(canonical_rows),
         "needs_review": n_review,
+        "payment_exceptions": len(exceptions),
         "draft_xlsx": str(draft_xlsx),
         "review_queue": str(review_path),
     }
@@ -393,28 +468,28 @@ def finalize_month(
 
     dest_xlsx = checked_dir / f"{month_str}_codedAndCategorised.xlsx"
     dest_csv = checked_dir / f"{month_str}_codedAndCategorised.csv"
-    _backup_if_exists(dest_xlsx)
-    _backup_if_exists(dest_csv)
-    write_xlsx(
-        output_df, dest_xlsx,
-        property_codes=property_codes_list,
-        categories=categories,
-        subcategories=subcategories,
-    )
-    write_csv(output_df, dest_csv)
-
-    # Update draft in generated/ so it matches what we finalized
+    lists = dict(property_codes=property_codes_list, categories=categories, subcategories=subcategories)
+    inputs = (EXPORT_VERSION, fingerprint(canonical_rows), fingerprint(ordered_labels))
+    xlsx_fp = fingerprint("final", *inputs, lists)
+    csv_fp = fingerprint("final_csv", *inputs)
+    written = _write_outputs([
+        (dest_xlsx, partial(write_xlsx, output_df, **lists), xlsx_fp),
+        (dest_csv, partial(write_csv, output_df), csv_fp),
+    ], rows=len(output_df))
+    if written:
+        with get_db(db) as conn:
+            refresh_month_from_db(conn, month_str, checked_file=dest_xlsx)
+            bump_data_revision(conn)  # checked/ feeds the reports API
+    if pa is not None:
+        sync_dataset([month_str], checked_dir)
+
+    # Update draft in generated/ so it matches what we finalized: same content, so copy the files
     draft_xlsx = gen_dir / f"{month_str}_codedAndCategorised.xlsx"
     draft_csv = gen_dir / f"{month_str}_codedAndCategorised.csv"
-    _backup_if_exists(draft_xlsx)
-    _backup_if_exists(draft_csv)
-    write_xlsx(
-        output_df, draft_xlsx,
-        property_codes=property_codes_list,
-        categories=categories,
-        subcategories=subcategories,
-    )
-    write_csv(output_df, draft_csv)
+    _write_outputs([
+        (draft_xlsx, partial(shutil.copyfile, dest_xlsx), xlsx_fp),
+        (draft_csv, partial(shutil.copyfile, dest_csv), csv_fp),
+    ])
 
     return dest_xlsx
 
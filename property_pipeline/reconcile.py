@@ -0,0 +1,335 @@
+"""Reconcile Beals agent statements with the bank (the 5.0 Beals Reconciler notebook, in the package).
+
+Statements (beals/Beals_MMMYYYY.csv) are imported into beals_statement_lines. Each
+"Amount payable to" line is money Beals pays us for one property; it should arrive as a
+BealsRent receipt within LOOKFORWARD_DAYS of the line's date. Lines are bucketed by
+amount in pence, so a receipt is first matched to a same-amount line in its window;
+receipts left over are matched to a combination of lines paid together (subset sum
+over the unmatched lines in the window). Matches are stored in beals_matches, and a
+receipt whose lines are all for one property gets that property code.
+"""
+
+import re
+import sqlite3
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from .config import BEALS_DIR
+from .db import init_db, get_db
+
+LOOKFORWARD_DAYS = 5
+# Subset-sum fallback limits: lines considered per receipt, and lines in one batched payment
+SUBSET_MAX_CANDIDATES = 40
+SUBSET_MAX_LINES = 6
+
+PAYOUT_PREFIX = "Amount payable to"
+
+# Statement ID / description -> property code, for statements that don't use our codes (from the notebook)
+BEALS_PROPERTY_PATTERNS = [
+    (r"Flat 1[,]? 321", "F1321LON"),
+    (r"Flat 1[,]? 169", "F1169FAW"),
+    (r"Flat 1[,]? 171", "F1171FAW"),
+    (r"Flat 2[,]? 171", "F2171FAW"),
+    (r"196a", "196AKIN"),
+    (r"Shop[,]? 196", "SHOP196KIN"),
+    (r"Flat 3[,]? 163", "F3163FRA"),
+    (r"Flat 6[,]? 8\b", "F68ALH"),
+    (r"Flat 7[,]? 8\b", "F78ALH"),
+    (r"Flat 5[,]? 12[-]?14", "F51214ALH"),
+    (r"Flat 7[,]? 12[-]?14", "F71214ALH"),
+    (r"Flat 10[,]? 12[-]?14", "F101214ALH"),
+    (r"Flat 14[,]? 12[-]?14", "F141214ALH"),
+    (r"Flat 16[,]? 12[-]?14", "F161214ALH"),
+    (r"Flat 6[,]? 16[-]?18", "F61618ALH"),
+    (r"Flat 11[,]? 16[-]?18", "F111618ALH"),
+    (r"Flat 12[,]? 16[-]?18", "F121618ALH"),
+    (r"Flat 16[,]? 16[-]?18", "F161618ALH"),
+]
+_PROPERTY_RES = [(re.compile(p, re.IGNORECASE), code) for p, code in BEALS_PROPERTY_PATTERNS]
+
+_LINE_TYPES = [("Rent for period", "RT"), ("Management Fee", "MF"), (PAYOUT_PREFIX, "PM")]
+
+
+def _property_for(text: str, known_codes: set[str]) -> str | None:
+    text = str(text or "").strip()
+    if text in known_codes:
+        return text
+    for pattern, code in _PROPERTY_RES:
+        if pattern.search(text):
+            return code
+    return None
+
+
+def _line_type(description: str) -> str:
+    for prefix, kind in _LINE_TYPES:
+        if str(description).startswith(prefix):
+            return kind
+    return "EX"
+
+
+def read_beals_statement(path: Path, known_codes: set[str] | None = None) -> pd.DataFrame:
+    """One row per statement line: property_code, activity_id, created_at, description,
+    document_type, document_number, debit, credit, line_type (RT rent, MF fee, PM payout, EX other).
+
+    Reads both the agent's export (Transaction Type, dd/mm/yyyy dates) and the notebook's
+    processed files (index column, ID and ID Check columns, ISO dates).
+    """
+    known_codes = known_codes or set()
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df = df.drop(columns=[c for c in df.columns if c.startswith("Unnamed")])
+    if "Transaction Type" in df.columns:
+        df = df.rename(columns={"Transaction Type": "ID"})
+    created = pd.to_datetime(df["Date Created"], format="ISO8601", errors="coerce").fillna(
+        pd.to_datetime(df["Date Created"], format="%d/%m/%Y %H:%M", errors="coerce"))
+    description = df["Item Description"].fillna("").astype(str)
+    prop = [_property_for(i, known_codes) or _property_for(d, known_codes) for i, d in zip(df["ID"], description)]
+    if "ID Check" in df.columns:
+        line_type = df["ID Check"].where(df["ID Check"].notna(), description.map(_line_type))
+    else:
+        line_type = description.map(_line_type)
+    out = pd.DataFrame({
+        "property_code": prop,
+        "activity_id": df["Activity I D"].astype("string"),
+        "created_at": created.dt.strftime("%Y-%m-%dT%H:%M:%S"),
+        "description": description,
+        "document_type": df["Document Type"],
+        "document_number": df["Document Number"].astype("string"),
+        "debit": pd.to_numeric(df["Debit Amount"], errors="coerce").fillna(0.0),
+        "credit": pd.to_numeric(df["Credit Amount"], errors="coerce").fillna(0.0),
+        "line_type": line_type,
+    })
+    return out[created.notna()].reset_index(drop=True)
+
+
+def import_statements(
+    months: list[str] | None = None,
+    beals_dir: Path | None = None,
+    db_path: Path | str | None = None,
+) -> dict[str, int]:
+    """Replace statement lines for each month with beals/Beals_MMMYYYY.csv (default: every file). Returns lines per month."""
+    beals_dir = Path(beals_dir) if beals_dir else BEALS_DIR
+    if months:
+        paths = {m: beals_dir / f"Beals_{m}.csv" for m in months}
+        paths = {m: p for m, p in paths.items() if p.exists()}
+    else:
+        paths = {p.stem[len("Beals_"):]: p for p in sorted(beals_dir.glob("Beals_*.csv"))}
+    init_db(db_path)
+    counts = {}
+    with get_db(db_path) as conn:
+        known = {row["property_code"] for row in conn.execute("SELECT property_code FROM properties")}
+        for month, path in paths.items():
+            lines = read_beals_statement(path, known)
+            conn.execute(
+                "DELETE FROM beals_matches WHERE line_id IN (SELECT line_id FROM beals_statement_lines WHERE statement_month = ?)",
+                (month,),
+            )
+            conn.execute("DELETE FROM beals_statement_lines WHERE statement_month = ?", (month,))
+            conn.executemany(
+                """INSERT INTO beals_statement_lines
+                   (statement_month, property_code, activity_id, created_at, description,
+                    document_type, document_number, debit, credit, line_type)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [(month, *(None if pd.isna(v) else v for v in row))
+                 for row in lines.itertuples(index=False, name=None)],
+            )
+            counts[month] = len(lines)
+            print(f"  {path.name}: {len(lines)} lines")
+    return counts
+
+
+def _ordinal(value) -> int:
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _subset_sum(target: int, amounts: list[int], max_items: int, preferred: list[bool] | None = None) -> list[int] | None:
+    """Indices into amounts (pence) of at most max_items values summing to target, or None.
+
+    Fewest items first, then the most preferred ones (lines for the receipt's property). The
+    best combination to every total reached is kept, so a longer one found first never hides
+    a shorter one.
+    """
+    preferred = preferred or [False] * len(amounts)
+    # total -> (items, -preferred items, indices), best over the amounts seen so far
+    best: dict[int, tuple[int, int, list[int]]] = {0: (0, 0, [])}
+    for i, a in enumerate(amounts):
+        for total, (n, not_preferred, picked) in list(best.items()):
+            new = total + a
+            if new > target or n >= max_items:
+                continue
+            key = (n + 1, not_preferred - preferred[i])
+            if new not in best or key < best[new][:2]:
+                best[new] = (*key, picked + [i])
+    return best[target][2] if target > 0 and target in best else None
+
+
+def match_receipts(receipts: list[dict], lines: list[dict], lookforward: int = LOOKFORWARD_DAYS) -> list[tuple[str, list[int], str]]:
+    """Match receipts (tx_id, posted_date, amount, property_code) to payout lines (line_id, created_at, debit, property_code).
+
+    Returns (tx_id, line_ids, method) with method 'exact' or 'subset'. A line is used once;
+    a receipt matches lines dated up to lookforward days before it.
+    """
+    by_amount: dict[int, list[tuple[int, dict]]] = defaultdict(list)
+    for ln in lines:
+        by_amount[round(ln["debit"] * 100)].append((_ordinal(ln["created_at"]), ln))
+    for bucket in by_amount.values():
+        bucket.sort(key=lambda x: x[0])
+
+    used: set[int] = set()
+    matches = []
+    leftover = []
+    for r in sorted(receipts, key=lambda r: str(r["posted_date"])):
+        day = _ordinal(r["posted_date"])
+        bucket = by_amount.get(round(r["amount"] * 100), [])
+        days = [d for d, _ in bucket]
+        window = bucket[bisect_left(days, day - lookforward):bisect_right(days, day)]
+        # Same property first (when the bank rules already found one), then the latest line before the receipt
+        candidates = sorted(
+            (ln for _, ln in window if ln["line_id"] not in used),
+            key=lambda ln: (ln["property_code"] != r.get("property_code"), -_ordinal(ln["created_at"])),
+        )
+        if candidates:
+            used.add(candidates[0]["line_id"])
+            matches.append((r["tx_id"], [candidates[0]["line_id"]], "exact"))
+        else:
+            leftover.append(r)
+
+    if leftover:
+        ordered = sorted(lines, key=lambda ln: ln["created_at"])
+        line_days = [_ordinal(ln["created_at"]) for ln in ordered]
+        for r in leftover:
+            day = _ordinal(r["posted_date"])
+            window = [ln for ln in ordered[bisect_left(line_days, day - lookforward):bisect_right(line_days, day)]
+                      if ln["line_id"] not in used and ln["debit"] > 0][:SUBSET_MAX_CANDIDATES]
+            prop = r.get("property_code")
+            picked = _subset_sum(round(r["amount"] * 100), [round(ln["debit"] * 100) for ln in window], SUBSET_MAX_LINES,
+                                 preferred=[prop is not None and ln["property_code"] == prop for ln in window])
+            if picked:
+                ids = [window[i]["line_id"] for i in picked]
+                used.update(ids)
+                matches.append((r["tx_id"], ids, "subset"))
+    return matches
+
+
+def _payout_lines(conn: sqlite3.Connection, first: str, last: str) -> list[dict]:
+    """Unmatched payout lines dated from LOOKFORWARD_DAYS before first to last."""
+    start = (date.fromisoformat(first) - timedelta(days=LOOKFORWARD_DAYS)).isoformat()
+    cur = conn.execute(
+        """SELECT line_id, created_at, debit, property_code FROM beals_statement_lines
+           WHERE line_type = 'PM' AND debit > 0 AND created_at >= ? AND created_at < date(?, '+1 day')
+             AND line_id NOT IN (SELECT line_id FROM beals_matches)""",
+        (start, last),
+    )
+    return [dict(row) for row in cur]
+
+
+def _store_matches(conn: sqlite3.Connection, matches: list[tuple[str, list[int], str]]) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO beals_matches (line_id, tx_id, method) VALUES (?, ?, ?)",
+        [(line_id, tx_id, method) for tx_id, ids, method in matches for line_id in ids],
+    )
+
+
+def _matched_properties(conn: sqlite3.Connection, matches: list[tuple[str, list[int], str]]) -> dict[str, str]:
+    """tx_id -> property code, for receipts whose matched lines are all for one property."""
+    out = {}
+    for tx_id, ids, _ in matches:
+        placeholders = ",".join("?" * len(ids))
+        props = {row[0] for row in conn.execute(
+            f"SELECT property_code FROM beals_statement_lines WHERE line_id IN ({placeholders})", ids)}
+        if len(props) == 1 and None not in props:
+            out[tx_id] = props.pop()
+    return out
+
+
+def _is_receipt(category: str | None, memo: str | None, amount: float | None) -> bool:
+    return (amount or 0) > 0 and (category == "BealsRent" or str(memo or "").upper().startswith("BEALS"))
+
+
+def reconcile_month(conn: sqlite3.Connection, month_str: str, transactions: list[dict], labels: list[dict]) -> dict:
+    """Pipeline stage: match this month's Beals receipts to imported statement lines and fill in their property codes."""
+    labels_by_tx = {lab["tx_id"]: lab for lab in labels}
+    receipts = []
+    for tx in transactions:
+        lab = labels_by_tx.get(tx["tx_id"], {})
+        if not tx.get("is_superseded") and tx.get("posted_date") and _is_receipt(lab.get("category"), tx.get("memo"), tx.get("amount")):
+            receipts.append({**tx, "property_code": lab.get("property_code") or None})
+    if not receipts:
+        return {"receipts": 0, "matched": 0, "coded": 0}
+    dates = sorted(str(r["posted_date"])[:10] for r in receipts)
+    matches = match_receipts(receipts, _payout_lines(conn, dates[0], dates[-1]))
+    _store_matches(conn, matches)
+    coded = 0
+    for tx_id, prop in _matched_properties(conn, matches).items():
+        lab = labels_by_tx[tx_id]
+        if not lab.get("property_code"):
+            lab["property_code"] = prop
+            coded += 1
+    return {"receipts": len(receipts), "matched": len(matches), "coded": coded}
+
+
+def reconcile(
+    date_from: str,
+    date_to: str,
+    db_path: Path | str | None = None,
+    beals_dir: Path | None = None,
+    import_first: bool = True,
+) -> dict:
+    """Reconcile stored bank receipts dated date_from..date_to (YYYY-MM-DD) with the statements.
+
+    Receipts already matched are skipped; receipts without a property code that match lines
+    for a single property get a new label version with it (source 'reconcile').
+    """
+    if import_first:
+        start, end = pd.Timestamp(date_from), pd.Timestamp(date_to)
+        months = [d.strftime("%b%Y").upper() for d in pd.date_range(start - pd.DateOffset(months=1), end, freq="MS")]
+        import_statements(months, beals_dir, db_path)
+    init_db(db_path)
+    with get_db(db_path) as conn:
+        cur = conn.execute(
+            """SELECT c.tx_id, c.posted_date, c.amount, c.memo, l.category, l.property_code
+               FROM transactions_canonical c
+               LEFT JOIN transactions_labels_latest l ON l.tx_id = c.tx_id
+               WHERE c.is_superseded = 0 AND c.amount > 0 AND c.posted_date BETWEEN ? AND ?
+                 AND c.tx_id NOT IN (SELECT tx_id FROM beals_matches)""",
+            (date_from, date_to),
+        )
+        receipts = [dict(row) for row in cur if _is_receipt(row["category"], row["memo"], row["amount"])]
+        for r in receipts:
+            r["property_code"] = r["property_code"] or None
+        matches = match_receipts(receipts, _payout_lines(conn, date_from, date_to))
+        _store_matches(conn, matches)
+
+        coded = 0
+        by_tx = {r["tx_id"]: r for r in receipts}
+        for tx_id, prop in _matched_properties(conn, matches).items():
+            if by_tx[tx_id]["property_code"]:
+                continue
+            cur = conn.execute(
+                """INSERT INTO transactions_labels
+                   (tx_id, label_version, property_code, category, subcategory, source, confidence,
+                    rule_id, rule_strength, needs_review, reviewed, pipeline_version)
+                   SELECT tx_id, label_version + 1, ?, COALESCE(category, 'BealsRent'), subcategory, 'reconcile', 1.0,
+                          rule_id, rule_strength, needs_review, reviewed, pipeline_version
+                   FROM transactions_labels_latest WHERE tx_id = ?""",
+                (prop, tx_id),
+            )
+            coded += cur.rowcount
+        unmatched_lines = conn.execute(
+            """SELECT COUNT(*) FROM beals_statement_lines
+               WHERE line_type = 'PM' AND debit > 0 AND created_at >= ? AND created_at < date(?, '+1 day')
+                 AND line_id NOT IN (SELECT line_id FROM beals_matches)""",
+            (date_from, date_to),
+        ).fetchone()[0]
+    exact = sum(1 for m in matches if m[2] == "exact")
+    return {
+        "receipts": len(receipts),
+        "exact": exact,
+        "subset": len(matches) - exact,
+        "unmatched_receipts": len(receipts) - len(matches),
+        "unmatched_lines": unmatched_lines,
+        "coded": coded,
+    }
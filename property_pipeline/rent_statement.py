@@ -0,0 +1,217 @@
+"""Rent statement per property and month (the 4.0 RentStatement notebooks, in the package).
+
+Tenancies are imported from the agent's tenancy sheet into the tenancies table. Received,
+Bills and Mortgage come from monthly_aggregates in one grouped query, the active tenancy for
+every property and month from the tenancy interval index, and Net/Status are computed column-wise.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .config import TENANCIES_FILE
+from .db import init_db, get_db
+from .tenancy_index import TenancyIndex
+
+TENANCY_SHEET_COLUMNS = [
+    "PROPERTY_ID", "PROPERTY_NAME", "TENANCY_ID", "TENANT", "START_DATE", "END_DATE",
+    "RENT_AMOUNT", "RENT_FREQ", "AGENT_NAME", "FEE_AMOUNT", "FEE_TYPE", "VAT",
+]
+
+# Tenancy sheet ids that differ from properties.property_id (as in mt_rent_statement.property_id_map)
+TENANCY_PROPERTY_IDS = {"196AKIN": 44}
+
+# Blocks and company costs: amounts are listed but no payment status is given
+NO_STATUS_PROPERTIES = {"321LON", "169FAW", "171FAW", "163FRA", "RSA"}
+NO_TENANCY_PROPERTIES = {"RSA"}
+
+RECEIVED_CATEGORIES = ("OurRent", "BealsRent")
+UNDERPAYMENT_THRESHOLD = 300.0
+
+STATEMENT_COLUMNS = ["Month", "Property", "Address", "Tenant", "Agent", "Received", "Bills", "Mortgage", "Net", "Status"]
+
+
+def _monthly_rent(amount: float, freq: str | None) -> float | None:
+    if pd.isna(amount):
+        return None
+    if isinstance(freq, str) and freq.strip().lower() == "four weekly":
+        return round(float(amount) * 13 / 12, 2)
+    return float(amount)
+
+
+def read_tenancy_sheet(path: Path) -> pd.DataFrame:
+    """Read the tenancy export (Sheet 1, no header row), one row per tenancy; rows without a tenant or start date are dropped."""
+    df = pd.read_excel(path, header=None, sheet_name="Sheet 1", names=TENANCY_SHEET_COLUMNS)
+    df["START_DATE"] = pd.to_datetime(df["START_DATE"], errors="coerce")
+    df["END_DATE"] = pd.to_datetime(df["END_DATE"], errors="coerce")
+    return df.dropna(subset=["PROPERTY_ID", "TENANT", "START_DATE"])
+
+
+def load_tenancies(path: Path | str | None = None, db_path: Path | str | None = None) -> dict:
+    """Replace the tenancies table with the tenancy sheet (default TENANCIES_FILE). Returns counts."""
+    path = Path(path) if path else TENANCIES_FILE
+    df = read_tenancy_sheet(path)
+    init_db(db_path)
+    with get_db(db_path) as conn:
+        codes_by_id: dict[int, list[str]] = {}
+        for row in conn.execute("SELECT property_code, property_id FROM properties"):
+            pid = TENANCY_PROPERTY_IDS.get(row["property_code"], row["property_id"])
+            if pid is not None:
+                codes_by_id.setdefault(int(pid), []).append(row["property_code"])
+
+        rows = []
+        skipped = 0
+        for t in df.itertuples(index=False):
+            codes = codes_by_id.get(int(t.PROPERTY_ID))
+            if not codes:
+                skipped += 1
+                continue
+            end = t.END_DATE.strftime("%Y-%m-%d") if pd.notna(t.END_DATE) else None
+            agent = t.AGENT_NAME if isinstance(t.AGENT_NAME, str) else None
+            freq = t.RENT_FREQ if isinstance(t.RENT_FREQ, str) else None
+            for code in codes:
+                rows.append((code, str(t.TENANT).strip(), t.START_DATE.strftime("%Y-%m-%d"), end,
+                             _monthly_rent(t.RENT_AMOUNT, freq), freq, agent))
+        conn.execute("DELETE FROM tenancies")
+        conn.executemany(
+            """INSERT INTO tenancies
+               (property_code, tenant_name, start_date, end_date, monthly_rent, rent_freq, agent_name)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            rows,
+        )
+    print(f"  Loaded {len(rows)} tenancies from {path.name} ({skipped} rows for properties not in the DB)")
+    return {"loaded": len(rows), "skipped": skipped}
+
+
+def _month_periods(months: list[str]) -> pd.DataFrame:
+    start = pd.to_datetime(["01" + m for m in months], format="%d%b%Y")
+    return pd.DataFrame({
+        "Month": months,
+        "period": start.strftime("%Y-%m"),
+        "period_start": start,
+        "period_end": start + pd.offsets.MonthEnd(0),
+    })
+
+
+def active_tenancies(index: TenancyIndex, periods: pd.DataFrame, property_codes: list[str]) -> pd.DataFrame:
+    """Latest-starting tenancy overlapping each (property_code, Month); one row per pair that has one."""
+    rows = []
+    for month, p_start, p_end in periods[["Month", "period_start", "period_end"]].itertuples(index=False):
+        for code in property_codes:
+            t = index.active_in(code, p_start, p_end)
+            if t is not None:
+                rows.append((code, month, t.tenant_name, t.start_date, t.end_date, t.agent_name))
+    df = pd.DataFrame(rows, columns=["property_code", "Month", "tenant_name", "start_date", "end_date", "agent_name"])
+    df["start_date"] = pd.to_datetime(df["start_date"])
+    df["end_date"] = pd.to_datetime(df["end_date"])
+    return df
+
+
+def _tenant_label(name: pd.Series, start: pd.Series, end: pd.Series) -> pd.Series:
+    dates = start.dt.strftime("%d/%m/%Y").where(end.isna(), start.dt.strftime("%d/%m/%Y") + "-" + end.dt.strftime("%d/%m/%Y"))
+    # With no tenancies on record name is all-NaN object, which pandas' str dtype will not add to
+    name = name.astype(dates.dtype)
+    return (name + " (" + dates + ")").where(name.notna(), "")
+
+
+def build_rent_statement(
+    month_from: str,
+    month_to: str | None = None,
+    paid_in_advance: list[str] | None = None,
+    in_arrears: list[str] | None = None,
+    db_path: Path | str | None = None,
+    checked_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Rent statement rows (STATEMENT_COLUMNS) for each month in month_from..month_to.
+
+    Each month lists every property, then a Service Charges row and a Totals row.
+    paid_in_advance / in_arrears are tenant labels as shown in the Tenant column
+    ("Name (dd/mm/yyyy)") or plain tenant names; they override the payment status.
+    """
+    from .aggregates import sync_months
+    from .report_summary import _month_str_to_range, months_in_range
+
+    start, _ = _month_str_to_range(month_from)
+    _, end = _month_str_to_range(month_to or month_from)
+    periods = _month_periods(months_in_range(start, end))
+    months = list(periods["Month"])
+
+    with get_db(db_path) as conn:
+        sync_months(conn, months, checked_dir)
+        properties = pd.read_sql_query(
+            "SELECT property_code, address FROM properties ORDER BY rowid", conn
+        )
+        index = TenancyIndex.from_db(conn)
+        placeholders = ",".join(["?"] * len(months))
+        amounts = pd.read_sql_query(
+            f"""SELECT month AS Month, period, property_code,
+                       SUM(CASE WHEN category IN ({",".join("?" * len(RECEIVED_CATEGORIES))}) THEN total ELSE 0 END) AS Received,
+                       SUM(CASE WHEN category = 'PropertyExpense' THEN total ELSE 0 END) AS Bills,
+                       SUM(CASE WHEN category = 'Mortgage' THEN total ELSE 0 END) AS Mortgage,
+                       SUM(CASE WHEN category = 'ServiceCharge' THEN total ELSE 0 END) AS ServiceCharge
+                FROM monthly_aggregates
+                WHERE month IN ({placeholders})
+                GROUP BY month, period, property_code""",
+            conn,
+            params=[*RECEIVED_CATEGORIES, *months],
+        )
+    # A month's statement covers transactions dated in that month from that month's file
+    amounts = amounts.merge(periods[["Month", "period"]], on=["Month", "period"])
+
+    grid = periods[["Month", "period_start", "period_end"]].merge(properties, how="cross")
+    grid = grid.merge(amounts.drop(columns=["period", "ServiceCharge"]), on=["Month", "property_code"], how="left")
+    for col in ("Received", "Bills", "Mortgage"):
+        grid[col] = grid[col].fillna(0.0)
+    grid["Net"] = grid["Received"] + grid["Bills"] + grid["Mortgage"]
+
+    codes = [c for c in properties["property_code"] if c not in NO_TENANCY_PROPERTIES]
+    grid = grid.merge(active_tenancies(index, periods, codes), on=["property_code", "Month"], how="left")
+    grid["Tenant"] = _tenant_label(grid["tenant_name"], grid["start_date"], grid["end_date"])
+    grid["Agent"] = grid["agent_name"].fillna("")
+
+    overrides_pia = set(paid_in_advance or [])
+    overrides_arr = set(in_arrears or [])
+    received = grid["Received"]
+    status = np.select(
+        [
+            grid["Tenant"].isin(overrides_pia) | grid["tenant_name"].isin(overrides_pia),
+            grid["Tenant"].isin(overrides_arr) | grid["tenant_name"].isin(overrides_arr),
+            received == 0,
+            received <= UNDERPAYMENT_THRESHOLD,
+        ],
+        ["PaidInAdvance", "InArrears", "NotPaid", "Underpayment"],
+        "Paid",
+    )
+    has_tenancy = grid["start_date"].notna()
+    new = has_tenancy & (grid["start_date"] >= grid["period_start"])
+    ending = has_tenancy & ~new & grid["end_date"].between(grid["period_start"], grid["period_end"])
+    status = np.where(~has_tenancy, "Empty", np.where(new, "New", np.where(ending, "Ending", status)))
+    grid["Status"] = np.where(grid["property_code"].isin(NO_STATUS_PROPERTIES), "", status)
+    grid = grid.rename(columns={"property_code": "Property", "address": "Address"})
+
+    service = amounts.groupby("Month", as_index=False)["ServiceCharge"].sum()
+    service = periods[["Month"]].merge(service, on="Month", how="left").fillna({"ServiceCharge": 0.0})
+    service_rows = pd.DataFrame({
+        "Month": service["Month"], "Property": "Service Charges", "Received": 0.0,
+        "Bills": service["ServiceCharge"], "Mortgage": 0.0, "Net": service["ServiceCharge"],
+    })
+    body = pd.concat([grid[STATEMENT_COLUMNS], service_rows], ignore_index=True)
+    totals = body.groupby("Month", as_index=False, sort=False)[["Received", "Bills", "Mortgage", "Net"]].sum()
+    totals["Property"] = "Totals"
+
+    out = pd.concat([body, totals], ignore_index=True)
+    out["_order"] = np.arange(len(out))
+    out["_month"] = out["Month"].map({m: i for i, m in enumerate(months)})
+    out = out.sort_values(["_month", "_order"]).drop(columns=["_order", "_month"])
+    out[["Address", "Tenant", "Agent", "Status"]] = out[["Address", "Tenant", "Agent", "Status"]].fillna("")
+    out[["Received", "Bills", "Mortgage", "Net"]] = out[["Received", "Bills", "Mortgage", "Net"]].round(2)
+    return out[STATEMENT_COLUMNS].reset_index(drop=True)
+
+
+def rent_statement_records(df: pd.DataFrame) -> list[dict]:
+    """Statement rows as JSON-ready dicts."""
+    return [
+        {k: (float(v) if isinstance(v, (int, float, np.floating)) else v) for k, v in row.items()}
+        for row in df.to_dict(orient="records")
+    ]
@@ -1,12 +1,22 @@
 """Report aggregations matching 3.0 MonthlySummary notebook. Used by the API to return JSON."""
 import datetime
+import hashlib
 import os
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
+import numpy as np
 import pandas as pd
 from dateutil.rrule import rrule, MONTHLY
 
 from .config import CHECKED_DIR
+from .checked_cache import read_checked_xlsx
+
+# Checked files read concurrently by load_data
+LOAD_WORKERS = int(os.environ.get("LOAD_WORKERS", str(min(8, os.cpu_count() or 1))))
 
 
 def _month_str_to_range(month_str: str) -> tuple[str, str]:
@@ -20,122 +30,217 @@ def _month_str_to_range(month_str: str) -> tuple[str, str]:
     return start, end
 
 
-def load_data(start: str, end: str, checked_dir: Path | None = None) -> pd.DataFrame:
-    """Load checked files for date range. start/end as YYYY-MM-DD.
-    Returns DataFrame with DatetimeIndex and columns Account, Amount, Subcategory, Memo, Property, Description, Cat, Subcat.
-    """
+def checked_dir_fingerprint(checked_dir: Path | None = None) -> str:
+    """Cheap signature of the checked files (name, size, mtime) so caches notice edits made outside the pipeline."""
     checked_dir = checked_dir or CHECKED_DIR
+    h = hashlib.sha1()
+    try:
+        entries = sorted(os.scandir(checked_dir), key=lambda e: e.name)
+    except FileNotFoundError:
+        return "missing"
+    for e in entries:
+        if "_codedAndCategorised." in e.name and e.is_file():
+            st = e.stat()
+            h.update(f"{e.name}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+OUTPUT_COLUMNS = ["Account", "Amount", "Subcategory", "Memo", "Property", "Description", "Cat", "Subcat"]
+
+
+def checked_path(month_str: str, checked_dir: Path | None = None) -> Path | None:
+    """The checked file load_data reads for month_str (XLSX preferred over CSV), or None."""
+    base = (checked_dir or CHECKED_DIR) / f"{month_str}_codedAndCategorised"
+    for suffix in (".xlsx", ".csv"):
+        path = base.with_suffix(suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def parse_checked_dates(index: pd.Index) -> pd.DatetimeIndex:
+    """Dates as written by the pipeline (YYYY-MM-DD) or older day-first ones (dd/mm/yyyy), NaT otherwise.
+
+    dayfirst=True alone misreads the ISO dates (2017-01-03 as 2017-03-01, days past 12 as NaT).
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        return index
+    text = pd.Series(index, dtype="string")
+    dates = pd.to_datetime(text, format="ISO8601", errors="coerce")
+    rest = dates.isna() & text.notna()
+    if rest.any():
+        dates[rest] = pd.to_datetime(text[rest], dayfirst=True, errors="coerce")
+    return pd.DatetimeIndex(dates, name=index.name)
+
+
+def read_checked_file(path: Path) -> pd.DataFrame:
+    """Read one checked XLSX/CSV into the OUTPUT_COLUMNS frame with a DatetimeIndex."""
+    if path.suffix == ".xlsx":
+        df_temp = read_checked_xlsx(path)
+    else:
+        df_temp = pd.read_csv(path, index_col=0)
+    df_temp.index = parse_checked_dates(df_temp.index)
+    df_temp = df_temp.dropna(how="all", subset=df_temp.columns)
+    for c in OUTPUT_COLUMNS:
+        if c not in df_temp.columns:
+            df_temp[c] = ""
+    return df_temp[OUTPUT_COLUMNS]
+
+
+def months_in_range(start: str, end: str) -> list[str]:
+    """Month strings (OCT2025, ...) covering start..end (YYYY-MM-DD)."""
     start_date = datetime.datetime.strptime(start, "%Y-%m-%d")
     end_date = datetime.datetime.strptime(end, "%Y-%m-%d")
-    dates = list(rrule(MONTHLY, dtstart=start_date, until=end_date))
-
-    df_all = pd.DataFrame(columns=["Account", "Amount", "Subcategory", "Memo", "Property", "Description", "Cat", "Subcat"])
-
-    for date in dates:
-        date_str = date.strftime("%b").upper() + date.strftime("%Y")
-        base = checked_dir / f"{date_str}_codedAndCategorised"
-        xls_path = base.with_suffix(".xlsx")
-        csv_path = base.with_suffix(".csv")
-        if xls_path.exists():
-            df_temp = pd.read_excel(xls_path, index_col=0, engine="openpyxl")
-        elif csv_path.exists():
-            df_temp = pd.read_csv(csv_path, index_col=0, parse_dates=True, dayfirst=True)
-        else:
-            continue
-        df_temp.index = pd.to_datetime(df_temp.index, dayfirst=True, errors="coerce")
-        df_temp = df_temp.dropna(how="all", subset=df_temp.columns)
-        needed = ["Account", "Amount", "Subcategory", "Memo", "Property", "Description", "Cat", "Subcat"]
-        for c in needed:
-            if c not in df_temp.columns:
-                df_temp[c] = ""
-        df_all = pd.concat([df_all, df_temp[needed]])
-    if df_all.empty:
-        return df_all
-    return df_all[["Account", "Amount", "Subcategory", "Memo", "Property", "Description", "Cat", "Subcat"]]
-
-
-def sum_of(df: pd.DataFrame, cat: str) -> pd.Series:
-    g = pd.Grouper(freq="ME")
-    return df.loc[df["Cat"] == cat, "Amount"].groupby(g).sum()
-
-
-def sum_of_subcat(df: pd.DataFrame, subcat: str) -> pd.Series:
-    g = pd.Grouper(freq="ME")
-    return df.loc[df["Subcat"] == subcat, "Amount"].groupby(g).sum()
-
-
-def get_pty_summary(df: pd.DataFrame) -> pd.DataFrame:
-    df_pty = pd.DataFrame()
-    df_pty["Mortgage"] = sum_of(df, "Mortgage")
-    df_pty["PropertyExpense"] = sum_of(df, "PropertyExpense")
-    df_pty["ServiceCharge"] = sum_of(df, "ServiceCharge")
-    df_pty["OurRent"] = sum_of(df, "OurRent")
-    df_pty["BealsRent"] = sum_of(df, "BealsRent")
-    df_pty = df_pty.fillna(0)
-    df_pty["TotalRent"] = df_pty["OurRent"] + df_pty["BealsRent"]
-    df_pty["NetProfit"] = (
-        df_pty["OurRent"] + df_pty["BealsRent"] + df_pty["Mortgage"]
-        + df_pty["PropertyExpense"] + df_pty["ServiceCharge"]
-    )
-    return df_pty
-
-
-def get_outgoings(df: pd.DataFrame) -> pd.DataFrame:
-    df_out = pd.DataFrame()
-    df_out["MTPersonal"] = sum_of(df.loc[df["Account"] == "20-74-09 60458872"], "PersonalExpense")
-    df_out["MTCar"] = (
-        sum_of_subcat(df, "MTCar").fillna(0).add(sum_of(df, "Car").fillna(0), fill_value=0)
-    )
-    df_out["IVPersonal"] = sum_of(df.loc[~(df["Account"] == "20-74-09 60458872")], "PersonalExpense")
-    df_out["IVCar"] = sum_of_subcat(df, "IVCar")
-    df_out["SFLoan"] = sum_of_subcat(df, "SFLoan")
-    df_out["Hilltop"] = sum_of(df, "Hilltop")
-    df_out["RegularPayment"] = sum_of(
-        df.loc[~df["Subcat"].isin(["MTCar", "IVCar", "SFLoan"])], "RegularPayment"
-    )
-    df_out["SchoolFee"] = sum_of(df, "SchoolFee")
-    df_out["HMRCDD"] = sum_of(df, "HMRCDD")
-    df_out["HMRCPayment"] = sum_of(df, "HMRCPayment")
-    df_out["OtherIncome"] = sum_of(df, "OtherIncome")
-    df_out["OtherExpense"] = sum_of(df, "OtherExpense")
-    df_out = df_out.fillna(0)
-    df_out["HMRC"] = df_out["HMRCDD"] + df_out["HMRCPayment"]
-    df_out["TotalOther"] = df_out["OtherIncome"] + df_out["OtherExpense"]
-    df_out["TotalOutgoings"] = (
-        df_out["IVPersonal"] + df_out["IVCar"] + df_out["SchoolFee"]
-        + df_out["Hilltop"] + df_out["RegularPayment"]
-        + df_out["HMRCDD"] + df_out["HMRCPayment"] + df_out["TotalOther"]
-    )
-    df_out["TotalOutgoingsExclSchool"] = (
-        df_out["IVPersonal"] + df_out["IVCar"] + df_out["Hilltop"]
-        + df_out["RegularPayment"] + df_out["HMRCDD"] + df_out["HMRCPayment"] + df_out["TotalOther"]
-    )
-    return df_out
-
-
-def get_personal_spending_summary(df: pd.DataFrame) -> pd.DataFrame:
-    df_ps = pd.DataFrame()
-    df_ps["TotalPersonalExpense"] = sum_of(df, "PersonalExpense")
-    df_ps["Garage"] = sum_of_subcat(df, "Garage")
-    food_cols = [
-        "Tesco", "Garage", "M&S", "Waitrose", "Morrisons", "LIDL",
-        "COOP", "Budgens", "Costco", "A1 Foods", "Sainsburys", "ASDA",
-    ]
-    food_parts = [sum_of_subcat(df, x) for x in food_cols]
-    df_ps["Food"] = pd.concat(food_parts, axis=1).sum(axis=1)
-    df_ps["Body"] = sum_of_subcat(df, "Pharmacy/Opticians/Dental")
-    df_ps["Beauty"] = sum_of_subcat(df, "Beauty")
-    df_ps["EatingOut"] = sum_of_subcat(df, "EatingOut")
-    df_ps["Coffee"] = sum_of_subcat(df, "Coffee")
-    df_ps["Car"] = sum_of_subcat(df, "Car")
-    df_ps["Amazon"] = sum_of_subcat(df, "Amazon")
-    df_ps["Clothing"] = sum_of_subcat(df, "Clothing")
-    df_ps["Household"] = sum_of_subcat(df, "Household")
-    df_ps["Holiday"] = sum_of_subcat(df, "Holiday")
-    df_ps["Cash"] = sum_of_subcat(df, "Cash")
-    df_ps["Other"] = sum_of_subcat(df, "Other")
-    df_ps = df_ps.fillna(0)
-    return df_ps
+    return [d.strftime("%b").upper() + d.strftime("%Y") for d in rrule(MONTHLY, dtstart=start_date, until=end_date)]
+
+
+def iter_checked_months(
+    months: list[str],
+    checked_dir: Path | None = None,
+    max_workers: int = LOAD_WORKERS,
+) -> Iterator[tuple[str, pd.DataFrame]]:
+    """Yield (month, frame) for each month with a checked file, in month order.
+
+    Files are read on a thread pool, at most max_workers ahead of the consumer.
+    """
+    checked_dir = checked_dir or CHECKED_DIR
+    found = [(m, p) for m in months if (p := checked_path(m, checked_dir)) is not None]
+    if not found:
+        return
+    max_workers = max(1, min(max_workers, len(found)))
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        items = iter(found)
+        pending = deque((m, pool.submit(read_checked_file, p)) for m, p in islice(items, max_workers))
+        while pending:
+            month, future = pending.popleft()
+            for m, p in islice(items, 1):
+                pending.append((m, pool.submit(read_checked_file, p)))
+            yield month, future.result()
+
+
+def load_data(start: str, end: str, checked_dir: Path | None = None, dataset_dir: Path | None = None) -> pd.DataFrame:
+    """Load checked files for date range. start/end as YYYY-MM-DD.
+    Returns DataFrame with DatetimeIndex and columns Account, Amount, Subcategory, Memo, Property, Description, Cat, Subcat.
+    With dataset_dir, the months are read from that Parquet dataset (see dataset.py) instead of the checked files.
+    """
+    if dataset_dir is not None:
+        from .dataset import read_dataset
+        return read_dataset(start, end, dataset_dir=dataset_dir)
+    frames = [df for _, df in iter_checked_months(months_in_range(start, end), checked_dir)]
+    if not frames:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+    return pd.concat(frames)[OUTPUT_COLUMNS]
+
+
+# Report specs: (column, line) in output order. A line is either a filter dict, summing Amount over
+# matching rows per month, or a formula over earlier columns (evaluated with DataFrame.eval).
+# Filter keys: cat, subcat, account (value or list: row must match) and not_cat, not_subcat,
+# not_account (row must not match). Columns starting with "_" are helpers left out of the output.
+MT_ACCOUNT = "20-74-09 60458872"
+
+FOOD_SUBCATS = [
+    "Tesco", "Garage", "M&S", "Waitrose", "Morrisons", "LIDL",
+    "COOP", "Budgens", "Costco", "A1 Foods", "Sainsburys", "ASDA",
+]
+
+PROPERTY_SUMMARY_SPEC = [
+    ("Mortgage", {"cat": "Mortgage"}),
+    ("PropertyExpense", {"cat": "PropertyExpense"}),
+    ("ServiceCharge", {"cat": "ServiceCharge"}),
+    ("OurRent", {"cat": "OurRent"}),
+    ("BealsRent", {"cat": "BealsRent"}),
+    ("TotalRent", "OurRent + BealsRent"),
+    ("NetProfit", "OurRent + BealsRent + Mortgage + PropertyExpense + ServiceCharge"),
+]
+
+OUTGOINGS_SPEC = [
+    ("MTPersonal", {"cat": "PersonalExpense", "account": MT_ACCOUNT}),
+    ("_MTCarSubcat", {"subcat": "MTCar"}),
+    ("_CarCat", {"cat": "Car"}),
+    ("MTCar", "_MTCarSubcat + _CarCat"),
+    ("IVPersonal", {"cat": "PersonalExpense", "not_account": MT_ACCOUNT}),
+    ("IVCar", {"subcat": "IVCar"}),
+    ("SFLoan", {"subcat": "SFLoan"}),
+    ("Hilltop", {"cat": "Hilltop"}),
+    ("RegularPayment", {"cat": "RegularPayment", "not_subcat": ["MTCar", "IVCar", "SFLoan"]}),
+    ("SchoolFee", {"cat": "SchoolFee"}),
+    ("HMRCDD", {"cat": "HMRCDD"}),
+    ("HMRCPayment", {"cat": "HMRCPayment"}),
+    ("OtherIncome", {"cat": "OtherIncome"}),
+    ("OtherExpense", {"cat": "OtherExpense"}),
+    ("HMRC", "HMRCDD + HMRCPayment"),
+    ("TotalOther", "OtherIncome + OtherExpense"),
+    ("TotalOutgoings", "IVPersonal + IVCar + SchoolFee + Hilltop + RegularPayment + HMRCDD + HMRCPayment + TotalOther"),
+    ("TotalOutgoingsExclSchool", "IVPersonal + IVCar + Hilltop + RegularPayment + HMRCDD + HMRCPayment + TotalOther"),
+]
+
+PERSONAL_SPENDING_SPEC = [
+    ("TotalPersonalExpense", {"cat": "PersonalExpense"}),
+    ("Garage", {"subcat": "Garage"}),
+    ("Food", {"subcat": FOOD_SUBCATS}),
+    ("Body", {"subcat": "Pharmacy/Opticians/Dental"}),
+    ("Beauty", {"subcat": "Beauty"}),
+    ("EatingOut", {"subcat": "EatingOut"}),
+    ("Coffee", {"subcat": "Coffee"}),
+    ("Car", {"subcat": "Car"}),
+    ("Amazon", {"subcat": "Amazon"}),
+    ("Clothing", {"subcat": "Clothing"}),
+    ("Household", {"subcat": "Household"}),
+    ("Holiday", {"subcat": "Holiday"}),
+    ("Cash", {"subcat": "Cash"}),
+    ("Other", {"subcat": "Other"}),
+]
+
+_FILTER_LEVELS = {"cat": "Cat", "subcat": "Subcat", "account": "Account"}
+
+
+def monthly_pivot(df: pd.DataFrame) -> pd.DataFrame:
+    """Amount summed per month-end (rows, every month from first to last) x (Cat, Subcat, Account) (columns)."""
+    keys = {level: df[level].fillna("").astype(str) for level in _FILTER_LEVELS.values()}
+    frame = pd.DataFrame({"Month": df.index.to_period("M").to_timestamp("M"), **keys,
+                          "Amount": pd.to_numeric(df["Amount"], errors="coerce")}).dropna(subset=["Month"])
+    pivot = frame.pivot_table(index="Month", columns=list(_FILTER_LEVELS.values()), values="Amount",
+                              aggfunc="sum", fill_value=0.0)
+    if pivot.empty:
+        return pivot
+    months = pd.date_range(pivot.index.min(), pivot.index.max(), freq="ME")
+    return pivot.reindex(months, fill_value=0.0)
+
+
+def _line_mask(columns: pd.MultiIndex, line: dict) -> np.ndarray:
+    mask = np.ones(len(columns), dtype=bool)
+    for key, value in line.items():
+        negate = key.startswith("not_")
+        level = _FILTER_LEVELS[key[4:] if negate else key]
+        values = [value] if isinstance(value, str) else list(value)
+        hit = np.isin(columns.get_level_values(level), values)
+        mask &= ~hit if negate else hit
+    return mask
+
+
+def evaluate_report(pivot: pd.DataFrame, spec: list[tuple[str, dict | str]]) -> pd.DataFrame:
+    """Evaluate a report spec against monthly_pivot output: one matrix product for the filter lines, then formulas."""
+    filters = [(name, line) for name, line in spec if isinstance(line, dict)]
+    if pivot.empty:
+        return pd.DataFrame(columns=[name for name, _ in spec if not name.startswith("_")], dtype=float)
+    weights = np.column_stack([_line_mask(pivot.columns, line) for _, line in filters]).astype(float)
+    out = pd.DataFrame(pivot.to_numpy() @ weights, index=pivot.index, columns=[name for name, _ in filters])
+    for name, line in spec:
+        if isinstance(line, str):
+            out[name] = out.eval(line)
+    return out[[name for name, _ in spec if not name.startswith("_")]]
+
+
+def get_pty_summary(df: pd.DataFrame, pivot: pd.DataFrame | None = None) -> pd.DataFrame:
+    return evaluate_report(monthly_pivot(df) if pivot is None else pivot, PROPERTY_SUMMARY_SPEC)
+
+
+def get_outgoings(df: pd.DataFrame, pivot: pd.DataFrame | None = None) -> pd.DataFrame:
+    return evaluate_report(monthly_pivot(df) if pivot is None else pivot, OUTGOINGS_SPEC)
+
+
+def get_personal_spending_summary(df: pd.DataFrame, pivot: pd.DataFrame | None = None) -> pd.DataFrame:
+    return evaluate_report(monthly_pivot(df) if pivot is None else pivot, PERSONAL_SPENDING_SPEC)
 
 
 def _dataframe_to_monthly_list(df: pd.DataFrame) -> list[dict]:
@@ -153,21 +258,34 @@ def _dataframe_to_monthly_list(df: pd.DataFrame) -> list[dict]:
     return out
 
 
-def build_report_summary(month_from: str, month_to: str, checked_dir: Path | None = None) -> dict:
-    """Build property summary, outgoings, personal spending for the given month range (e.g. OCT2025, NOV2025)."""
-    start, end = _month_str_to_range(month_from)
-    _, end_last = _month_str_to_range(month_to)
-    end = end_last
-    df = load_data(start, end, checked_dir=checked_dir)
+def build_report_summary(
+    month_from: str,
+    month_to: str,
+    checked_dir: Path | None = None,
+    db_path: Path | str | None = None,
+) -> dict:
+    """Build property summary, outgoings, personal spending for the given month range (e.g. OCT2025, NOV2025).
+
+    Answered from the monthly_aggregates table; months whose checked file is new or was
+    edited since it was aggregated are (re)read from checked/ first.
+    """
+    from .aggregates import load_aggregate_frame
+    from .db import get_db
+
+    start, _ = _month_str_to_range(month_from)
+    _, end = _month_str_to_range(month_to)
+    with get_db(db_path) as conn:
+        df = load_aggregate_frame(conn, months_in_range(start, end), checked_dir=checked_dir)
     if df.empty:
         return {
             "property_summary": [],
             "outgoings": [],
             "personal_spending": [],
         }
-    pty = get_pty_summary(df)
-    out = get_outgoings(df)
-    ps = get_personal_spending_summary(df)
+    pivot = monthly_pivot(df)
+    pty = get_pty_summary(df, pivot)
+    out = get_outgoings(df, pivot)
+    ps = get_personal_spending_summary(df, pivot)
     return {
         "property_summary": _dataframe_to_monthly_list(pty),
         "outgoings": _dataframe_to_monthly_list(out),
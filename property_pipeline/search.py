@@ -0,0 +1,50 @@
+"""Full-text search over canonical transactions (SQLite FTS5 index ``transactions_fts``)."""
+
+import re
+import sqlite3
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text: str | None) -> str | None:
+    """Turn free text into an FTS5 MATCH expression.
+
+    Each word becomes a quoted prefix term ("tesco"*) and all terms must match,
+    so user input never needs FTS5 syntax. Returns None if there is nothing to search for.
+    """
+    tokens = _TOKEN_RE.findall(text or "")
+    if not tokens:
+        return None
+    return " AND ".join(f'"{t}"*' for t in tokens)
+
+
+def search_tx_ids(
+    conn: sqlite3.Connection,
+    text: str,
+    month: str | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """Return matches as [{tx_id, import_batch_id, score}], best first.
+
+    month restricts results to one import_batch_id (e.g. OCT2025); score is the
+    bm25 rank (lower is better).
+    """
+    query = build_match_query(text)
+    if query is None:
+        return []
+    sql = """
+        SELECT f.tx_id, c.import_batch_id, f.rank AS score
+        FROM transactions_fts f
+        JOIN transactions_canonical c ON c.tx_id = f.tx_id
+        WHERE transactions_fts MATCH ? AND c.is_superseded = 0
+    """
+    params: list = [query]
+    if month:
+        sql += " AND c.import_batch_id = ?"
+        params.append(month)
+    sql += " ORDER BY f.rank"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    cursor = conn.execute(sql, params)
+    return [dict(row) for row in cursor.fetchall()]
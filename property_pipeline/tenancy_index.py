@@ -0,0 +1,160 @@
+"""In-memory interval index over the tenancies table.
+
+Tenancies are grouped by property_code and sorted by start date, with a running maximum
+of end dates alongside. "Who was the tenant of X on D" and "is X let at any point in R"
+are a bisect on the start dates plus a short walk back that the running maximum cuts off,
+so O(log n) per property when tenancies don't overlap (the usual case). Dates are ISO
+strings, compared as text; an open-ended tenancy ends on OPEN_END.
+"""
+
+import re
+import sqlite3
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Iterable, NamedTuple
+
+OPEN_END = "9999-12-31"
+
+# Rent arriving this many days either side of a tenancy (paid in advance / in arrears) still counts as let
+RENT_GRACE_DAYS = 31
+RENT_CATEGORIES = ("OurRent", "BealsRent")
+
+_NAME_STOPWORDS = {"MR", "MRS", "MS", "MISS", "DR", "AND", "THE", "LTD", "LIMITED"}
+
+
+class Tenancy(NamedTuple):
+    property_code: str
+    tenant_name: str
+    start_date: str
+    end_date: str | None
+    monthly_rent: float | None
+    agent_name: str | None
+
+
+def _iso(d) -> str:
+    """'YYYY-MM-DD' for a date, datetime, Timestamp or ISO string."""
+    return d.isoformat()[:10] if hasattr(d, "isoformat") else str(d)[:10]
+
+
+def name_tokens(name: str | None) -> set[str]:
+    """Upper-case words of a tenant name worth matching in bank text (no titles, initials or 'and')."""
+    return set(re.findall(r"[A-Z]{3,}", (name or "").upper())) - _NAME_STOPWORDS
+
+
+class TenancyIndex:
+    def __init__(self, tenancies: Iterable[Tenancy]):
+        by_code: dict[str, list[Tenancy]] = {}
+        for t in tenancies:
+            by_code.setdefault(t.property_code, []).append(t)
+        self._tenancies: dict[str, list[Tenancy]] = {}
+        self._starts: dict[str, list[str]] = {}
+        self._ends: dict[str, list[str]] = {}
+        self._max_end: dict[str, list[str]] = {}
+        for code, items in by_code.items():
+            items.sort(key=lambda t: t.start_date)  # stable: equal starts keep table order
+            ends = [t.end_date or OPEN_END for t in items]
+            running, max_end = "", []
+            for e in ends:
+                running = max(running, e)
+                max_end.append(running)
+            self._tenancies[code] = items
+            self._starts[code] = [t.start_date for t in items]
+            self._ends[code] = ends
+            self._max_end[code] = max_end
+        self._tokens_on: dict[str, dict[str, str]] = {}
+
+    @classmethod
+    def from_db(cls, conn: sqlite3.Connection) -> "TenancyIndex":
+        cur = conn.execute(
+            """SELECT property_code, tenant_name, start_date, end_date, monthly_rent, agent_name
+               FROM tenancies ORDER BY tenancy_id"""
+        )
+        return cls(Tenancy(*row) for row in cur)
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._tenancies.values())
+
+    @property
+    def property_codes(self) -> list[str]:
+        """Properties with at least one tenancy."""
+        return sorted(self._tenancies)
+
+    def tenancies(self, property_code: str) -> list[Tenancy]:
+        return list(self._tenancies.get(property_code, ()))
+
+    def active_in(self, property_code: str, start, end=None) -> Tenancy | None:
+        """Latest-starting tenancy of property_code overlapping [start, end] (end defaults to start)."""
+        starts = self._starts.get(property_code)
+        if not starts:
+            return None
+        lo = _iso(start)
+        hi = _iso(end) if end is not None else lo
+        ends, max_end = self._ends[property_code], self._max_end[property_code]
+        j = bisect_right(starts, hi) - 1
+        while j >= 0 and max_end[j] >= lo:
+            if ends[j] >= lo:
+                return self._tenancies[property_code][j]
+            j -= 1
+        return None
+
+    def tenant_on(self, property_code: str, on) -> Tenancy | None:
+        """Tenancy of property_code on date `on`, or None if it was void."""
+        return self.active_in(property_code, on)
+
+    def is_let(self, property_code: str, start, end=None) -> bool:
+        return self.active_in(property_code, start, end) is not None
+
+    def void_properties(self, start, end=None, property_codes: Iterable[str] | None = None) -> list[str]:
+        """Properties (default: every property with tenancies) not let at any point in [start, end]."""
+        codes = self.property_codes if property_codes is None else property_codes
+        return [c for c in codes if self.active_in(c, start, end) is None]
+
+    def tenants_on(self, on) -> dict[str, Tenancy]:
+        """property_code -> tenancy for every property let on date `on`."""
+        found = {}
+        for code in self._tenancies:
+            t = self.active_in(code, on)
+            if t is not None:
+                found[code] = t
+        return found
+
+    def tenant_property(self, text: str | None, on) -> str | None:
+        """Property whose tenant on date `on` is named in text (bank memo/reference), if exactly one matches."""
+        if not text or not self._tenancies:
+            return None
+        day = _iso(on)
+        tokens = self._tokens_on.get(day)
+        if tokens is None:
+            # token -> property, dropping tokens shared by tenants of different properties
+            tokens = {}
+            for code, t in self.tenants_on(day).items():
+                for tok in name_tokens(t.tenant_name):
+                    tokens[tok] = code if tokens.get(tok, code) == code else ""
+            self._tokens_on[day] = tokens
+        hits = {tokens[w] for w in re.findall(r"[A-Z]{3,}", text.upper()) if tokens.get(w)}
+        return hits.pop() if len(hits) == 1 else None
+
+
+def flag_rent_on_void(transactions: list[dict], labels: list[dict], index: TenancyIndex) -> int:
+    """Send rent labelled to a property with no tenancy around the payment date to review. Returns rows flagged.
+
+    Only properties that appear in the tenancies table are checked; rent is allowed
+    RENT_GRACE_DAYS either side of a tenancy for payments in advance or in arrears.
+    """
+    flagged = 0
+    if not len(index):
+        return 0
+    let_codes = set(index.property_codes)
+    grace = timedelta(days=RENT_GRACE_DAYS)
+    for tx, lab in zip(transactions, labels):
+        code = lab.get("property_code")
+        if lab.get("needs_review") or lab.get("category") not in RENT_CATEGORIES or code not in let_codes:
+            continue
+        try:
+            posted = date.fromisoformat(_iso(tx.get("posted_date")))
+        except ValueError:
+            continue
+        if not index.is_let(code, posted - grace, posted + grace):
+            lab["needs_review"] = 1
+            flagged += 1
+    return flagged
@@ -0,0 +1,156 @@
+"""Pairing of transfers between our own accounts.
+
+A transfer shows up twice: out of one account and into another, usually a day or two
+apart. Rows are bucketed on amount in pence, so only an outflow and an inflow of the
+same size on different accounts within TRANSFER_WINDOW_DAYS are ever compared. Pairs
+are recorded in transfer_pairs. When both sides are labelled as transfers they get the
+categories the account pair implies (TRANSFER_LABELS); when only one is, the other side
+goes to review, as does a row labelled as a transfer with no other side.
+"""
+
+import re
+import sqlite3
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date
+
+TRANSFER_CATEGORIES = ("Funds3072", "Funds4040", "Funds6045", "Interbank", "MortgageRefund")
+TRANSFER_WINDOW_DAYS = 5
+
+# (from account, to account) -> (category of the outflow, category of the inflow); "*" is any account.
+# Accounts are the first four digits of the account number (Starling business is 0055). None leaves
+# that side as labelled: money drawn from Starling for the household is the director's personal expense.
+TRANSFER_LABELS = {
+    ("0055", "3072"): ("MortgageRefund", "Interbank"),
+    ("0055", "4040"): (None, "Interbank"),
+    ("6045", "4040"): ("Funds4040", "Funds4040"),
+    ("4040", "6045"): ("Funds6045", "Funds6045"),
+    ("*", "3072"): ("Funds3072", "Funds3072"),
+}
+
+
+def account_key(source_account: str | None) -> str:
+    """'20-53-97 30728691' -> '3072'."""
+    m = re.search(r"(\d{4})\d*\s*$", source_account or "")
+    return m.group(1) if m else (source_account or "")
+
+
+def transfer_labels(out_account: str | None, in_account: str | None) -> tuple[str | None, str | None] | None:
+    out_key, in_key = account_key(out_account), account_key(in_account)
+    return TRANSFER_LABELS.get((out_key, in_key)) or TRANSFER_LABELS.get(("*", in_key))
+
+
+def pair_transfers(rows: list[dict], window_days: int = TRANSFER_WINDOW_DAYS) -> list[tuple[dict, dict, int]]:
+    """(outflow, inflow, days apart) pairs among rows (tx_id, source_account, posted_date, amount, category).
+
+    Each row is used at most once. Pairs where both sides are labelled as transfers are
+    preferred, then the closest dates; at least one side must be labelled as a transfer.
+    """
+    buckets: dict[int, tuple[list, list]] = defaultdict(lambda: ([], []))
+    for r in rows:
+        amount = r.get("amount") or 0
+        if amount == 0:
+            continue
+        try:
+            day = date.fromisoformat(str(r.get("posted_date"))[:10]).toordinal()
+        except ValueError:
+            continue
+        buckets[round(abs(amount) * 100)][0 if amount < 0 else 1].append((day, r))
+
+    pairs = []
+    for outs, ins in buckets.values():
+        if not outs or not ins:
+            continue
+        ins.sort(key=lambda x: x[0])
+        in_days = [d for d, _ in ins]
+        candidates = []
+        for out_day, out in outs:
+            lo = bisect_left(in_days, out_day - window_days)
+            hi = bisect_right(in_days, out_day + window_days)
+            for in_day, inn in ins[lo:hi]:
+                days = abs(in_day - out_day)
+                if out["source_account"] == inn["source_account"]:
+                    continue
+                labelled = (out.get("category") in TRANSFER_CATEGORIES) + (inn.get("category") in TRANSFER_CATEGORIES)
+                if labelled:
+                    candidates.append((-labelled, days, out_day, out, inn))
+        candidates.sort(key=lambda c: c[:3])
+        used: set[str] = set()
+        for _, days, _, out, inn in candidates:
+            if out["tx_id"] in used or inn["tx_id"] in used:
+                continue
+            used.update((out["tx_id"], inn["tx_id"]))
+            pairs.append((out, inn, days))
+    return pairs
+
+
+def _neighbour_rows(conn: sqlite3.Connection, month_str: str, first: str, last: str) -> list[dict]:
+    """Unpaired rows of other months dated within the window around this month (transfers across month ends)."""
+    cur = conn.execute(
+        """SELECT c.tx_id, c.source_account, c.posted_date, c.amount, l.category
+           FROM transactions_canonical c
+           LEFT JOIN transactions_labels_latest l ON l.tx_id = c.tx_id
+           WHERE c.import_batch_id != ? AND c.is_superseded = 0
+             AND c.posted_date BETWEEN date(?, ?) AND date(?, ?)
+             AND c.tx_id NOT IN (SELECT out_tx_id FROM transfer_pairs)
+             AND c.tx_id NOT IN (SELECT in_tx_id FROM transfer_pairs)""",
+        (month_str, first, f"-{TRANSFER_WINDOW_DAYS} days", last, f"+{TRANSFER_WINDOW_DAYS} days"),
+    )
+    return [dict(row) for row in cur]
+
+
+def match_transfers(conn: sqlite3.Connection, month_str: str, transactions: list[dict], labels: list[dict]) -> dict:
+    """Pipeline stage: pair the month's transfers, record the pairs and label both sides consistently.
+
+    Sides are relabelled only when every side the account pair gives a transfer category
+    (TRANSFER_LABELS) is already labelled as a transfer. Otherwise the pair is recorded and
+    the sides that are not keep their labels but go to review. Review flags
+    set by earlier stages are never cleared. Only this month's labels are changed; a pair
+    with a row from a neighbouring month is recorded but that row keeps its stored label.
+    Returns counts.
+    """
+    labels_by_tx = {lab["tx_id"]: lab for lab in labels}
+    rows = [
+        {**{k: tx.get(k) for k in ("tx_id", "source_account", "posted_date", "amount")},
+         "category": labels_by_tx.get(tx["tx_id"], {}).get("category")}
+        for tx in transactions
+        if not tx.get("is_superseded")
+    ]
+    dates = sorted(str(r["posted_date"])[:10] for r in rows if r["posted_date"])
+    if dates:
+        rows += _neighbour_rows(conn, month_str, dates[0], dates[-1])
+    pairs = [p for p in pair_transfers(rows) if p[0]["tx_id"] in labels_by_tx or p[1]["tx_id"] in labels_by_tx]
+
+    relabelled = one_sided = 0
+    paired: set[str] = set()
+    for out, inn, _ in pairs:
+        paired.update((out["tx_id"], inn["tx_id"]))
+        cats = transfer_labels(out["source_account"], inn["source_account"]) or (None, None)
+        # Sides the account pair gives a transfer category (None: left as labelled)
+        sides = [(row, labels_by_tx.get(row["tx_id"]), cat) for row, cat in zip((out, inn), cats) if cat is not None]
+        if not all(row.get("category") in TRANSFER_CATEGORIES for row, _, _ in sides):
+            # Only the amount and dates tie the other side to a transfer: keep its label, have it checked
+            for row, lab, _ in sides:
+                if lab is not None and row.get("category") not in TRANSFER_CATEGORIES:
+                    lab["needs_review"] = 1
+                    one_sided += 1
+            continue
+        for row, lab, cat in sides:
+            if lab is None or lab.get("category") == cat:
+                continue
+            lab.update(category=cat, subcategory="", property_code="", source="transfer", confidence=1.0,
+                       rule_id=None)
+            relabelled += 1
+
+    unpaired = 0
+    for tx_id, lab in labels_by_tx.items():
+        if lab.get("category") in TRANSFER_CATEGORIES and tx_id not in paired:
+            lab["needs_review"] = 1
+            unpaired += 1
+
+    conn.executemany(
+        """INSERT OR REPLACE INTO transfer_pairs (out_tx_id, in_tx_id, amount, days_apart)
+           VALUES (?, ?, ?, ?)""",
+        [(out["tx_id"], inn["tx_id"], inn["amount"], days) for out, inn, days in pairs],
+    )
+    return {"pairs": len(pairs), "relabelled": relabelled, "one_sided": one_sided, "unpaired": unpaired}
@@ -4,6 +4,7 @@ import os.path
 import shutil
 import datetime
 from dateutil.rrule import rrule, MONTHLY
+from concurrent.futures import ThreadPoolExecutor
 
 #generated_path = 'E:\\dtuklaptop\\e\\Users\\Mat\\python\\data\\property\\checked\\'
 #tcy_path=r'E:\\dtuklaptop\\e\Users\\Mat\\python\\data\\property\\bank-download\\'
@@ -137,36 +138,40 @@ def load_tenancies(tenancy_datafile):
     dfT = pd.read_excel(input_file,index_col=0,header=None,sheet_name='Sheet 1',names=['PROPERTY_ID','PROPERTY_NAME','TENANCY_ID','TENANT','START_DATE','END_DATE','RENT_AMOUNT','RENT_FREQ','AGENT_NAME','FEE_AMOUNT','FEE_TYPE','VAT'])
     return dfT
 
-def load_data(start, end):
+def read_month(dateStr):
     csvext='.csv'
     xlsext='.xlsx'
-    start_date=datetime.datetime.strptime(start, '%Y-%m-%d')
-    end_date=datetime.datetime.strptime(end, '%Y-%m-%d')  
-    dates = [dt for dt in rrule(MONTHLY, dtstart=start_date, until=end_date)]
-
-    dfAll=pd.DataFrame()
-    dfAll=pd.DataFrame(columns=['Account','Amount','Subcategory','Memo','Property','Description','Cat','Subcat'])
+    input_file=generated_path + dateStr + '_codedAndCategorised'
+    csvExist=os.path.isfile(input_file + csvext)
+    xlsExist=os.path.isfile(input_file + xlsext)
+    if((not csvExist)&(not xlsExist)):
+        print('Warning missing file: ' + input_file)
+        return None
+    # Load excel file if both types exist
+    if xlsExist:
+        print('Reading file: ' + input_file + xlsext)
+        return pd.read_excel(input_file + xlsext, index_col=0, parse_dates=True, engine='openpyxl')
+    print('Reading file: ' + input_file + csvext)
+    return pd.read_csv(input_file + csvext, index_col=0, parse_dates=True)
 
-    for date in dates:
-        dateStr= date.strftime("%b").upper() + date.strftime("%Y")
-        input_file=generated_path + dateStr + '_codedAndCategorised'
-        csvExist=os.path.isfile(input_file + csvext)
-        xlsExist=os.path.isfile(input_file + xlsext)
-        if((not csvExist)&(not xlsExist)):
-            print('Warning missing file: ' + input_file)
-            continue
-        # Load excel file if both types exist
-        if xlsExist:
-            print('Reading file: ' + input_file + xlsext)
-            dfTemp=pd.read_excel(input_file + xlsext, index_col=0, parse_dates=True, engine='openpyxl')
-        else:
-            print('Reading file: ' + input_file + csvext)
-            dfTemp=pd.read_csv(input_file + csvext, index_col=0, parse_dates=True)
-        dfAll=pd.concat([dfAll,dfTemp])
-        dfAll=dfAll[['Account','Amount','Subcategory','Memo','Property','Description','Cat','Subcat']]
-        dfAll
+def iter_months(start, end, max_workers=8):
+    # Lazily yields each month's frame in order; files are read in parallel on a thread pool
+    start_date=datetime.datetime.strptime(start, '%Y-%m-%d')
+    end_date=datetime.datetime.strptime(end, '%Y-%m-%d')
+    dateStrs = [dt.strftime("%b").upper() + dt.strftime("%Y") for dt in rrule(MONTHLY, dtstart=start_date, until=end_date)]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for dfTemp in pool.map(read_month, dateStrs):
+            if dfTemp is not None:
+                yield dfTemp
 
-    return dfAll
+def load_data(start, end):
+    columns=['Account','Amount','Subcategory','Memo','Property','Description','Cat','Subcat']
+    # Single concat at the end: concatenating inside the loop copies everything read so far each month
+    frames=list(iter_months(start, end))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    dfAll=pd.concat(frames)
+    return dfAll[columns]
 
 def get_tenancy(dfT, property_id, start, end):
     tenancy=dfT.loc[(dfT.index==property_id)&(dfT.START_DATE<=end)&((dfT.END_DATE.isnull())|(dfT.END_DATE>=start))].sort_values(['START_DATE'], ascending=False).head(1)
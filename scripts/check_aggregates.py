@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Check that re-running a finalized month leaves its monthly_aggregates as they were.
+
+On a scratch copy of the data directory (labels.db, bank-download/, checked/) it runs
+finalize_month, records the month's aggregates, runs run_month on the same month and
+reads them again through sync_months (as the reports API does). Both must match the
+month's checked file bucket for bucket. Exits 1 on any difference.
+
+  python scripts/check_aggregates.py OCT2025
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+COPIED = ["labels.db", "bank-download", "checked", "beals"]
+
+
+def _month_buckets(conn, month: str) -> dict[tuple, tuple[float, int]]:
+    return {
+        tuple(row[:5]): (round(row[5], 2), row[6])
+        for row in conn.execute(
+            """SELECT period, account, property_code, category, subcategory, total, n
+               FROM monthly_aggregates WHERE month = ?""",
+            (month,),
+        )
+    }
+
+
+def _diff(label: str, got: dict, expected: dict) -> list[str]:
+    return [f"  {label} {key}: {got.get(key)} != {expected.get(key)}"
+            for key in sorted(set(got) | set(expected), key=str) if got.get(key) != expected.get(key)]
+
+
+def check(month: str) -> int:
+    from property_pipeline.aggregates import aggregate_checked_frame, sync_months
+    from property_pipeline.config import CHECKED_DIR, DB_PATH
+    from property_pipeline.db import get_db
+    from property_pipeline.pipeline import finalize_month, run_month
+    from property_pipeline.report_summary import checked_path, read_checked_file
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        finalize_month(month)
+    with get_db(DB_PATH) as conn:
+        after_finalize = _month_buckets(conn, month)
+    checked = aggregate_checked_frame(read_checked_file(checked_path(month, CHECKED_DIR)))
+    expected = {tuple(r[:5]): (round(r[5], 2), r[6]) for r in checked.itertuples(index=False, name=None)}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_month(month)
+        with get_db(DB_PATH) as conn:
+            sync_months(conn, [month], CHECKED_DIR)
+            after_rerun = _month_buckets(conn, month)
+
+    problems = _diff("after finalize_month", after_finalize, expected) + _diff("after run_month", after_rerun, expected)
+    total = sum(t for t, _ in after_rerun.values())
+    n = sum(n for _, n in after_rerun.values())
+    print(f"{month}: {len(expected)} buckets; after finalize_month then run_month total {total:.2f}, n {n}")
+    for line in problems[:20]:
+        print(line)
+    print("OK" if not problems else f"{len(problems)} bucket(s) differ")
+    return 1 if problems else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("month", help="e.g. OCT2025 (needs its bank files and labels.db rows)")
+    parser.add_argument("--data", type=Path, help="Data directory to copy (default: DATA_PATH)")
+    args = parser.parse_args()
+
+    source = args.data or Path(os.environ.get("DATA_PATH", str(repo_root / "data" / "property")))
+    with tempfile.TemporaryDirectory(prefix="pp-aggcheck-") as tmp:
+        for name in COPIED:
+            src = source / name
+            if src.is_dir():
+                shutil.copytree(src, Path(tmp) / name, ignore=shutil.ignore_patterns(".cache"))
+            elif src.exists():
+                shutil.copy2(src, Path(tmp) / name)
+        # The package reads its paths at import: point it at the copy first
+        for var in ("DB_PATH", "BACKTEST_DB_PATH", "MODEL_PATH", "DATASET_DIR", "BACKUP_DIR"):
+            os.environ.pop(var, None)
+        os.environ["DATA_PATH"] = tmp
+        status = check(args.month.upper())
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,8 +12,11 @@ from property_pipeline.config import DB_PATH
 from property_pipeline.db import get_db, get_connection
 
 
-# Tables in dependency order (children first) so FK checks don't block deletes
+# Tables in dependency order (children first) so FK checks don't block deletes.
+# data_revision is deliberately kept: its counter must keep increasing so API caches see the wipe.
 TABLES = [
+    "transfer_pairs",
+    "beals_matches",
     "transactions_labels",
     "transactions_canonical",
     "raw_import_rows",
@@ -24,6 +27,11 @@ TABLES = [
     "merchant_alias",
     "config",
     "custom_list_entries",
+    "jobs",
+    "monthly_aggregates",
+    "monthly_aggregate_sources",
+    "payment_exceptions",
+    "beals_statement_lines",
 ]
 
 